@@ -11,39 +11,30 @@ import argparse
 import os
 from datetime import datetime
 
-def load_k6_results(results_file):
-    """Load and process k6 JSON results"""
+from nova_perf import profiling
+from nova_perf.capacity import capacity_model
+from nova_perf.k6_stream import is_point_stream, read_k6_points, read_k6_summary, summarize_points
+from nova_perf.knee import find_knee_point
+from nova_perf.merge import generator_table, merge_k6_points
+from nova_perf.regimes import aggregate_by_regime, detect_regimes
+from nova_perf.stages import aggregate_by_concurrency, aggregate_by_stage, parse_stage_profile
+
+def load_k6_results(results_file, workers=1):
+    """Load and process k6 JSON results (a list of files is merged across load generators)"""
+    if not isinstance(results_file, str):
+        if len(results_file) > 1:
+            print(f"📊 Merging k6 results of {len(results_file)} load generators")
+            return load_k6_points(results_file, workers)
+        results_file = results_file[0]
     print(f"📊 Loading k6 results from {results_file}")
     
-    # Try to load as single JSON file first (summary.json)
-    try:
-        with open(results_file, 'r') as f:
-            data = json.load(f)
-        if 'metrics' in data:
-            print("✅ Loaded k6 summary JSON format")
-        else:
-            data = None
-    except json.JSONDecodeError:
-        data = None
-    
-    # If that fails, try line-delimited JSON format
-    if data is None:
-        with open(results_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Find the summary data (usually the last complete JSON object)
-        for line in reversed(lines):
-            line = line.strip()
-            if line and line.startswith('{') and 'metrics' in line:
-                try:
-                    data = json.loads(line)
-                    print("✅ Loaded k6 line-delimited JSON format")
-                    break
-                except json.JSONDecodeError:
-                    continue
-    
-    if data is None:
-        raise ValueError("Could not find valid k6 summary data in results file")
+    # `--out json` point streams are parsed in a single streaming pass
+    if is_point_stream(results_file):
+        return load_k6_points(results_file, workers)
+    
+    # Summary export (single JSON document) or a file ending with a summary line
+    data = read_k6_summary(results_file)
+    print("✅ Loaded k6 summary JSON format")
     
     # Extract key metrics
     metrics = data.get('metrics', {})
@@ -75,49 +66,84 @@ def load_k6_results(results_file):
         'max_concurrent_users': vus_max,
         'error_rate': error_rate,
         'success_rate': 1 - error_rate,
-        'raw_data': data
+        'raw_data': data,
+        'points': None
     }
 
-def generate_knee_graph(k6_data, output_dir):
+def load_k6_points(results_file, workers=1):
+    """Stream a k6 NDJSON point file (or merge several) and derive the summary metrics from raw samples"""
+    if isinstance(results_file, str):
+        points = read_k6_points(results_file, workers=workers)
+    else:
+        points = merge_k6_points(results_file)
+    print(f"✅ Loaded k6 line-delimited JSON format: {points.lines_read:,} lines in "
+          f"{points.parse_seconds:.1f}s ({points.lines_per_second:,.0f} lines/s)")
+    
+    generators = generator_table(points)
+    if generators is not None:
+        for name, skew, bottleneck in zip(generators['generator'], generators['skew_s'], generators['bottleneck']):
+            clock = 'unknown' if np.isnan(skew) else f"{skew:+.2f}s"
+            print(f"🖥️  {name}: clock skew {clock}, {'looks load-generator bound: ' + bottleneck if bottleneck else 'ok'}")
+    
+    summary = summarize_points(points)
+    
+    return {
+        'avg_response_time': summary['avg'],
+        'p95_response_time': summary['p95'],
+        'p90_response_time': summary['p90'],
+        'total_requests': summary['total_requests'],
+        'requests_per_second': summary['rps'],
+        'max_concurrent_users': summary['vus_max'] or summary['max_vus'],
+        'error_rate': summary['error_rate'],
+        'success_rate': 1 - summary['error_rate'],
+        'raw_data': None,
+        'points': points
+    }
+
+def generate_knee_graph(k6_data, output_dir, stages=None):
     """Generate a clean knee graph based on k6 data"""
     print("📊 Generating knee graph...")
     
-    # Create realistic performance curve based on actual test data
+    points = k6_data.get('points')
+    if points is None:
+        print("⚠️  The knee graph needs the k6 point stream (--out json results file), "
+              "not the end-of-test summary - skipping it")
+        return None
+    
     max_users = k6_data['max_concurrent_users']
     actual_p95 = k6_data['p95_response_time']
     actual_rps = k6_data['requests_per_second']
     
-    # Generate user load stages (0 to max_users)
-    user_stages = np.linspace(0, max_users, 50)
-    
-    # Generate realistic response time curve (knee-shaped)
-    response_times = []
-    throughputs = []
-    
-    for users in user_stages:
-        if users <= 500:
-            # Good performance zone
-            response_time = 500 + (users * 2)  # Linear increase
-            tpm = users * 12  # Good throughput scaling
-        elif users <= 1000:
-            # Stress zone - response time starts increasing faster
-            response_time = 1500 + ((users - 500) * 4)
-            tpm = 6000 + ((users - 500) * 8)
-        elif users <= 1500:
-            # Knee zone - significant degradation
-            response_time = 3500 + ((users - 1000) * 8)
-            tpm = 10000 + ((users - 1000) * 4)
-        else:
-            # Overload zone - based on actual test data
-            response_time = 7500 + ((users - 1500) * (actual_p95 - 7500) / (max_users - 1500))
-            tpm = 12000 * (1 - (users - 1500) / (max_users - 1000))
-        
-        response_times.append(max(response_time, 0))
-        throughputs.append(max(tpm, 0))
+    # Measured latency and throughput for each concurrency level
+    curve = aggregate_by_concurrency(points)
+    if curve is None or len(curve['vus']) == 0:
+        print("⚠️  No http_req_duration/vus samples found in the k6 results - skipping the knee graph")
+        return None
+    
+    user_stages = curve['vus']
+    response_times = curve['p95']
+    throughputs = curve['rpm']
     
     # Find knee point (where response time starts increasing rapidly)
-    knee_users = 1000  # Based on actual curve analysis - visible inflection point
-    knee_response_time = 3500  # Response time at 1000 users (corrected from visual analysis)
+    knee_users, knee_response_time, _ = find_knee_point(user_stages, response_times)
+    knee_users = int(round(knee_users))
+    knee_response_time = int(round(knee_response_time))
+    
+    # Performance zones: stress begins once p95 reaches 1.5x the lightest-load p95; without
+    # such a level before the knee there is no stress zone and the optimal zone runs up to the knee
+    degraded = user_stages[response_times > response_times[0] * 1.5]
+    stress_start = int(round(degraded[0])) if len(degraded) else None
+    if stress_start is not None and stress_start >= knee_users:
+        stress_start = None
+    zones = {'stress_start': stress_start, 'knee': knee_users, 'max_users': max_users}
+    k6_data['zones'] = zones
+    # Stages as the run went through them; the script's options.stages only without a VU series
+    regimes = detect_regimes(points)
+    if regimes is not None and regimes['signal'] == 'vus':
+        k6_data['stage_stats'] = aggregate_by_regime(points, regimes)
+    else:
+        k6_data['stage_stats'] = aggregate_by_stage(points, stages) if stages else None
+    k6_data['capacity'] = capacity_model(curve)
     
     # Create the knee graph
     plt.figure(figsize=(14, 10))
@@ -142,10 +168,11 @@ def generate_knee_graph(k6_data, output_dir):
     ax1.legend(fontsize=11)
     
     # Add performance zones
-    ax1.axvspan(0, 500, alpha=0.1, color='green', label='Optimal Zone')
-    ax1.axvspan(500, 1000, alpha=0.1, color='yellow', label='Stress Zone')
-    ax1.axvspan(1000, 1300, alpha=0.1, color='orange', label='Knee Zone')
-    ax1.axvspan(1300, max_users, alpha=0.1, color='red', label='Overload Zone')
+    optimal_end = knee_users if stress_start is None else stress_start
+    ax1.axvspan(0, optimal_end, alpha=0.1, color='green', label='Optimal Zone')
+    if stress_start is not None:
+        ax1.axvspan(stress_start, knee_users, alpha=0.1, color='yellow', label='Stress Zone')
+    ax1.axvspan(knee_users, max_users, alpha=0.1, color='red', label='Overload Zone')
     
     # Add annotations
     ax1.annotate(f'Knee Point\n{knee_users} users\n{knee_response_time}ms', 
@@ -170,10 +197,10 @@ def generate_knee_graph(k6_data, output_dir):
     ax2.legend(fontsize=11)
     
     # Add performance zones to throughput plot
-    ax2.axvspan(0, 500, alpha=0.1, color='green')
-    ax2.axvspan(500, 1000, alpha=0.1, color='yellow')
-    ax2.axvspan(1000, 1300, alpha=0.1, color='orange')
-    ax2.axvspan(1300, max_users, alpha=0.1, color='red')
+    ax2.axvspan(0, optimal_end, alpha=0.1, color='green')
+    if stress_start is not None:
+        ax2.axvspan(stress_start, knee_users, alpha=0.1, color='yellow')
+    ax2.axvspan(knee_users, max_users, alpha=0.1, color='red')
     
     plt.tight_layout()
     
@@ -187,9 +214,77 @@ def generate_knee_graph(k6_data, output_dir):
     
     return knee_users, knee_response_time, png_path, pdf_path
 
+def format_stage_table(stage_stats):
+    """Render the per-stage breakdown as a markdown table"""
+    if stage_stats is None:
+        return ""
+    
+    rows = ["", "## 📶 Per-Stage Results",
+            "| Stage | Regime | VUs | RPS | p90 (ms) | p95 (ms) | Errors |",
+            "|-------|--------|-----|-----|----------|----------|--------|"]
+    for i in range(len(stage_stats['stage'])):
+        rows.append(f"| {stage_stats['stage'][i]} "
+                    f"| {stage_stats['kind'][i]} "
+                    f"| {stage_stats['start_vus'][i]:.0f} → {stage_stats['target_vus'][i]:.0f} "
+                    f"| {stage_stats['rps'][i]:.1f} | {stage_stats['p90'][i]:.1f} "
+                    f"| {stage_stats['p95'][i]:.1f} | {stage_stats['error_rate'][i]:.1%} |")
+    return "\n".join(rows) + "\n"
+
+def format_knee_sections(k6_data, knee_users, knee_response_time):
+    """Knee point and performance zone sections (a note when the results hold no per-request samples)"""
+    if knee_users is None:
+        return """## 🔍 Knee Point Analysis
+- **Skipped**: the knee needs per-request samples (the k6 `--out json` point stream), and these results
+  only hold the end-of-test summary
+"""
+    zones = k6_data['zones']
+    if zones['stress_start'] is None:
+        zone_lines = f"""1. **Optimal Zone (0-{zones['knee']} users)**: p95 within 1.5x of the lightest-load p95 up to the knee
+2. **Overload Zone ({zones['knee']}+ users)**: Past the knee, high response times
+"""
+    else:
+        zone_lines = f"""1. **Optimal Zone (0-{zones['stress_start']} users)**: p95 within 1.5x of the lightest-load p95
+2. **Stress Zone ({zones['stress_start']}-{zones['knee']} users)**: Good performance, some degradation
+3. **Overload Zone ({zones['knee']}+ users)**: Past the knee, high response times
+"""
+    return f"""## 🔍 Knee Point Analysis
+- **Identified Knee Point**: {knee_users} concurrent users
+- **Response Time at Knee**: {knee_response_time} ms
+- **Recommendation**: System performs optimally up to {knee_users} users
+
+## 🎯 Performance Zones
+{zone_lines}"""
+
+def format_recommendations(knee_users, planning_users):
+    """Recommendations section; the load figures need a knee"""
+    if knee_users is None:
+        return """## 📊 Recommendations
+1. **Database Scaling**: Consider upgrading from db-f1-micro to handle more connections
+2. **Knee Analysis**: Rerun k6 with `--out json` to locate the knee and plan capacity from it
+"""
+    return f"""## 📊 Recommendations
+1. **Optimal Load**: Keep concurrent users below {knee_users} for best performance
+2. **Database Scaling**: Consider upgrading from db-f1-micro to handle more connections
+3. **Monitoring**: Set alerts at 80% of knee point ({int(knee_users * 0.8)} users)
+4. **Capacity Planning**: Plan for {planning_users} users maximum sustainable load (the knee or 80% of the modelled peak, whichever is lower)
+"""
+
 def generate_summary_report(k6_data, knee_users, knee_response_time, output_dir):
     """Generate a comprehensive summary report"""
     report_path = f"{output_dir}/performance_summary_clean.md"
+    capacity = k6_data.get('capacity')
+    if knee_users is None:
+        bottleneck = "No per-request samples to fit a capacity model to"
+        planning_users = None
+    elif capacity is None:
+        bottleneck = "Not enough concurrency levels to fit a capacity model"
+        planning_users = knee_users
+    else:
+        peak_users = (f"{capacity['peak_users']:,.0f} users" if np.isfinite(capacity['peak_users'])
+                      else "beyond any tested load")
+        bottleneck = (f"Scaling limited by {capacity['bottleneck']} (USL σ = {capacity['sigma']:.3g}, "
+                      f"κ = {capacity['kappa']:.3g}); predicted peak {capacity['peak_rps']:,.1f} RPS at {peak_users}")
+        planning_users = int(min(knee_users, capacity['planning_users']))
     
     with open(report_path, 'w') as f:
         f.write(f"""# Nova Performance Test - Clean Analysis Report
@@ -213,38 +308,35 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **Peak RPS**: {k6_data['requests_per_second']:.1f}
 - **Peak RPM**: {k6_data['requests_per_second'] * 60:.0f}
 
-## 🔍 Knee Point Analysis
-- **Identified Knee Point**: {knee_users} concurrent users
-- **Response Time at Knee**: {knee_response_time} ms
-- **Recommendation**: System performs optimally up to {knee_users} users
-
-## 🎯 Performance Zones
-1. **Optimal Zone (0-500 users)**: Excellent performance, linear scaling
-2. **Stress Zone (500-1000 users)**: Good performance, some degradation
-3. **Knee Zone (1000-1300 users)**: Significant performance degradation begins
-4. **Overload Zone (1300+ users)**: System under stress, high response times
-
+{format_knee_sections(k6_data, knee_users, knee_response_time)}{format_stage_table(k6_data.get('stage_stats'))}
 ## 🏆 Key Findings
 - System successfully handled {k6_data['max_concurrent_users']:,} concurrent users
 - Achieved {k6_data['success_rate']:.1%} success rate under extreme load
-- Database connection limits identified as primary bottleneck
+- {bottleneck}
 - HPA scaling worked effectively to maintain partial service
 
-## 📊 Recommendations
-1. **Optimal Load**: Keep concurrent users below {knee_users} for best performance
-2. **Database Scaling**: Consider upgrading from db-f1-micro to handle more connections
-3. **Monitoring**: Set alerts at 80% of knee point ({int(knee_users * 0.8)} users)
-4. **Capacity Planning**: Plan for {int(knee_users * 1.2)} users maximum sustainable load
-""")
+{format_recommendations(knee_users, planning_users)}""")
     
     return report_path
 
 def main():
     parser = argparse.ArgumentParser(description='Clean Nova Performance Analysis')
-    parser.add_argument('--k6-results', required=True, help='Path to k6 results JSON file')
+    parser.add_argument('--k6-results', required=True, nargs='+',
+                        help='Path to k6 results JSON file; the point streams of several load generators are merged')
     parser.add_argument('--output-dir', required=True, help='Output directory for analysis')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes used to parse the k6 point stream (newline-aligned byte ranges)')
+    parser.add_argument('--load-script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nova-load-test.js'),
+                        help='k6 script whose options.stages defines the per-stage breakdown when the run has no VU series')
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help='Time every pipeline stage (wall, CPU, peak RSS, rows) and write a JSON trace '
+                             '(default <output-dir>/profile_trace.json)')
+    parser.add_argument('--profile-dump', action='store_true',
+                        help='With --profile, also save a cProfile of the slowest stage')
     
     args = parser.parse_args()
+    if args.profile is not None:
+        profiling.enable(cprofile=args.profile_dump)
     
     # Create output directory
     os.makedirs(args.output_dir, exist_ok=True)
@@ -253,19 +345,30 @@ def main():
     print("=" * 50)
     
     # Load k6 data
-    k6_data = load_k6_results(args.k6_results)
+    with profiling.stage('load_k6_results') as stage:
+        k6_data = load_k6_results(args.k6_results, args.workers)
+        stage['rows'] = len(k6_data['points']) if k6_data['points'] is not None else None
     
-    # Generate knee graph
-    knee_users, knee_response_time, png_path, pdf_path = generate_knee_graph(k6_data, args.output_dir)
+    # Generate knee graph (knee detection and plotting)
+    stages = parse_stage_profile(args.load_script) if os.path.exists(args.load_script) else None
+    with profiling.stage('knee_graph'):
+        graph = generate_knee_graph(k6_data, args.output_dir, stages)
+    knee_users, knee_response_time, png_path, pdf_path = graph if graph is not None else (None, None, None, None)
     
     # Generate summary report
-    report_path = generate_summary_report(k6_data, knee_users, knee_response_time, args.output_dir)
+    with profiling.stage('report'):
+        report_path = generate_summary_report(k6_data, knee_users, knee_response_time, args.output_dir)
     
-    print(f"✅ Clean knee graph saved to {png_path}")
-    print(f"📄 Clean knee graph PDF saved to {pdf_path}")
+    if graph is not None:
+        print(f"✅ Clean knee graph saved to {png_path}")
+        print(f"📄 Clean knee graph PDF saved to {pdf_path}")
     print(f"📋 Performance report saved to {report_path}")
-    print(f"📊 Knee point identified at {knee_users} concurrent users")
+    if graph is not None:
+        print(f"📊 Knee point identified at {knee_users} concurrent users")
     print("\n🎉 Clean Analysis Complete!")
+    
+    if args.profile is not None:
+        profiling.finish(args.profile or os.path.join(args.output_dir, 'profile_trace.json'), dump=args.profile_dump)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
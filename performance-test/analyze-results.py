@@ -2,6 +2,8 @@
 # Use virtual environment for dependencies
 import sys
 import os
+import time
+_IMPORT_STARTED = time.perf_counter()
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
 """
 Nova Performance Test Results Analyzer
@@ -9,40 +11,56 @@ Generates knee graph from k6 results and HPA scaling data
 """
 
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+from contextlib import redirect_stdout
 from datetime import datetime
 import argparse
 import os
 import glob
 
-# Set up plotting style
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+from nova_perf.k6_stream import is_point_stream, read_k6_points, read_k6_summary, summarize_points
+from nova_perf import profiling, run_cache
+from nova_perf.capacity import capacity_model
+from nova_perf.correlate import correlate_run, format_seconds, format_time
+from nova_perf.decimate import PLOT_DPI, decimate, pixel_budget
+from nova_perf.endpoints import endpoint_path, endpoint_table, endpoint_timeseries
+from nova_perf.follow import SATURATED_EXIT_CODE, run_follow
+from nova_perf.knee import detect_knee
+from nova_perf.lazy import pandas, pyplot
+from nova_perf.merge import generator_table, merge_k6_points
+from nova_perf.omission import coordinated_omission
+from nova_perf.regimes import aggregate_by_regime, detect_regimes, profile_mismatch
+from nova_perf.rollup import load_rollup, rollup_path
+from nova_perf.sketch import percentile_series, windowed_sketches
+from nova_perf.slo import DEFAULT_APDEX_T_MS, DEFAULT_SLO_WINDOW_S, evaluate_slos, slos_from_script
+from nova_perf.stages import aggregate_by_concurrency, aggregate_by_stage, parse_stage_profile
 
-def load_k6_results(results_file):
-    """Load and process k6 JSON results"""
+# pandas, matplotlib and seaborn are imported on first use (nova_perf.lazy); module import
+# time is checked against this budget by --check-import-time
+IMPORT_BUDGET_SECONDS = 0.5
+
+# Series longer than this are drawn without per-point markers
+MARKER_LIMIT = 200
+_IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+def load_k6_results(results_file, workers=1, use_cache=True, correct_skew=True):
+    """Load and process k6 JSON results (a list of files is merged across load generators)"""
+    if not isinstance(results_file, str):
+        if len(results_file) > 1:
+            print(f"📊 Merging k6 results of {len(results_file)} load generators: {', '.join(results_file)}")
+            not_streams = [path for path in results_file if not is_point_stream(path)]
+            if not_streams:
+                raise ValueError(f"Only k6 point streams (--out json) can be merged: {', '.join(not_streams)}")
+            return load_k6_points(results_file, workers, use_cache, correct_skew)
+        results_file = results_file[0]
     print(f"📊 Loading k6 results from {results_file}")
     
-    # k6 outputs line-delimited JSON, we need the last line which contains the summary
-    with open(results_file, 'r') as f:
-        lines = f.readlines()
-    
-    # Find the summary data (usually the last complete JSON object)
-    data = None
-    for line in reversed(lines):
-        line = line.strip()
-        if line and line.startswith('{') and 'metrics' in line:
-            try:
-                data = json.loads(line)
-                break
-            except json.JSONDecodeError:
-                continue
+    # `--out json` point streams are parsed in a single streaming pass
+    if is_point_stream(results_file):
+        return load_k6_points(results_file, workers, use_cache)
     
-    if data is None:
-        raise ValueError("Could not find valid k6 summary data in results file")
+    # Otherwise this is a summary export (or a file ending with a summary line)
+    data = read_k6_summary(results_file)
     
     # Extract key metrics
     metrics = data.get('metrics', {})
@@ -82,15 +100,80 @@ def load_k6_results(results_file):
         'max_concurrent_users': max_vus,
         'error_rate_percent': error_rate,
         'test_duration_minutes': test_duration,
-        'raw_data': data
+        'raw_data': data,
+        'points': None
+    }
+
+def load_k6_points(results_file, workers=1, use_cache=True, correct_skew=True):
+    """Stream a k6 NDJSON point file (or merge several) and derive the summary metrics from raw samples"""
+    merged = not isinstance(results_file, str)
+    if merged:
+        read = lambda paths: merge_k6_points(paths, correct_skew=correct_skew)
+    else:
+        read = lambda path: read_k6_points(path, workers=workers)
+    if use_cache:
+        points, cached = run_cache.load_points(results_file, read, f'skew={correct_skew}' if merged else None)
+    else:
+        points, cached = read(results_file), False
+    
+    if cached:
+        print(f"⚡ Loaded {len(points):,} samples from the columnar cache")
+    else:
+        print(f"⚡ Parsed {points.lines_read:,} lines in {points.parse_seconds:.1f}s "
+              f"({points.lines_per_second:,.0f} lines/s, {len(points):,} samples kept)")
+    print(f"💾 Sample store: {points.nbytes / 1e6:,.1f} MB ({points.bytes_per_sample:.0f} bytes/sample)")
+    
+    summary = summarize_points(points)
+    generators = generator_table(points)
+    if generators is not None:
+        for name, skew, corrected, bottleneck in zip(generators['generator'], generators['skew_s'],
+                                                     generators['corrected'], generators['bottleneck']):
+            clock = ('unknown' if np.isnan(skew) else f"{skew:+.2f}s{' (corrected)' if corrected else ''}")
+            print(f"🖥️  {name}: clock skew {clock}")
+            if bottleneck:
+                print(f"⚠️  {name} looks load-generator bound: {bottleneck}")
+    
+    return {
+        'response_times': {key: summary[key] for key in ('p50', 'p90', 'p95', 'p99', 'avg', 'max')},
+        'throughput_rps': summary['rps'],
+        'throughput_rpm': summary['rps'] * 60,  # Requests per minute
+        'total_requests': summary['total_requests'],
+        'max_concurrent_users': summary['max_vus'],
+        'error_rate_percent': summary['error_rate'] * 100,  # Convert to percentage
+        'test_duration_minutes': summary['duration_s'] / 60,
+        'raw_data': None,
+        'points': points,
+        'generators': generators
     }
 
-def load_hpa_data(hpa_file):
+def load_run_rollup(k6_data, results_file, output_dir):
+    """Attach the run's rollup index to k6_data, building it from the loaded points when needed"""
+    results_file = results_file[0] if not isinstance(results_file, str) and len(results_file) == 1 else results_file
+    rollup, loaded = load_rollup(results_file, lambda: k6_data['points'], output_dir=output_dir)
+    k6_data['rollup'] = rollup
+    if rollup is not None:
+        print(f"🗂️  Rollup index {'loaded from' if loaded else 'written to'} {rollup_path(results_file, output_dir)} "
+              f"({', '.join(f'{r}s' for r in rollup.resolutions)} buckets, {rollup.nbytes / 1e6:,.1f} MB in memory)")
+    return rollup
+
+def read_timestamped_csv(csv_file):
+    """Read a monitoring CSV and parse its timestamp column"""
+    pd = pandas()
+    df = pd.read_csv(csv_file)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+def load_csv_frame(csv_file, use_cache=True):
+    """Load a monitoring CSV, going through the columnar cache when enabled"""
+    if use_cache:
+        return run_cache.load_frame(csv_file, read_timestamped_csv)[0]
+    return read_timestamped_csv(csv_file)
+
+def load_hpa_data(hpa_file, use_cache=True):
     """Load and process HPA scaling data"""
     print(f"📈 Loading HPA data from {hpa_file}")
     
-    df = pd.read_csv(hpa_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = load_csv_frame(hpa_file, use_cache)
     
     # Group by service and calculate scaling metrics
     scaling_summary = {}
@@ -109,12 +192,11 @@ def load_hpa_data(hpa_file):
     
     return df, scaling_summary
 
-def load_resource_metrics(metrics_file):
+def load_resource_metrics(metrics_file, use_cache=True):
     """Load and process resource usage metrics"""
     print(f"💾 Loading resource metrics from {metrics_file}")
     
-    df = pd.read_csv(metrics_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df = load_csv_frame(metrics_file, use_cache)
     
     # Calculate resource usage by service over time
     resource_summary = df.groupby(['timestamp', 'service']).agg({
@@ -124,93 +206,102 @@ def load_resource_metrics(metrics_file):
     
     return df, resource_summary
 
-def find_knee_point(users, response_times):
-    """Find the knee point in the response time curve using the elbow method"""
-    print("🔍 Analyzing knee point in performance curve...")
+def per_stage_stats(points, stages=None, stage_source='detected', rollup=None):
+    """Per-stage table from the load regimes detected in the run, or from the script's options.stages
+
+    Request statistics come from the rollup index when there is one.
+    """
+    if stage_source == 'detected':
+        with profiling.stage('regimes') as stage:
+            regimes = detect_regimes(points)
+            stage['rows'] = len(regimes['start_ns']) if regimes is not None else None
+        if regimes is not None:
+            print(f"🧭 Detected {len(regimes['start_ns'])} load regimes from the {regimes['signal']} series")
+            mismatch = profile_mismatch(regimes, stages)
+            if mismatch:
+                print(f"⚠️  Run does not follow the load script's stage profile: {mismatch}")
+            return aggregate_by_regime(points, regimes, rollup)
+    return aggregate_by_stage(points, stages, rollup) if stages else None
+
+def analyze_knee(k6_data, stages=None, stage_source='detected'):
+    """Concurrency curve, per-stage stats and latency/throughput knees (no plotting)"""
+    points = k6_data.get('points')
+    if points is None:
+        print("⚠️  The knee graph needs the k6 point stream (--out json results file), "
+              "not the end-of-test summary - skipping the knee analysis")
+        return None
     
-    # Convert to numpy arrays
-    x = np.array(users)
-    y = np.array(response_times)
+    # Measured latency and throughput for each concurrency level
+    curve = aggregate_by_concurrency(points)
+    if curve is None or len(curve['vus']) == 0:
+        print("⚠️  No http_req_duration/vus samples found in the k6 results - skipping the knee analysis")
+        return None
     
-    # Calculate the angle between consecutive points
-    angles = []
-    for i in range(1, len(x) - 1):
-        # Calculate vectors
-        v1 = np.array([x[i] - x[i-1], y[i] - y[i-1]])
-        v2 = np.array([x[i+1] - x[i], y[i+1] - y[i]])
-        
-        # Calculate angle between vectors
-        cos_angle = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
-        angle = np.arccos(np.clip(cos_angle, -1, 1))
-        angles.append(angle)
-    
-    # Find the point with maximum angle change (the knee)
-    if angles:
-        knee_index = np.argmax(angles) + 1  # +1 because we started from index 1
-        knee_users = x[knee_index]
-        knee_response_time = y[knee_index]
-    else:
-        # Fallback: find point where response time starts increasing rapidly
-        diff = np.diff(y)
-        knee_index = np.argmax(diff) if len(diff) > 0 else 0
-        knee_users = x[knee_index]
-        knee_response_time = y[knee_index]
+    # Per-stage breakdown of the regimes the run actually went through
+    stage_stats = per_stage_stats(points, stages, stage_source, k6_data.get('rollup'))
     
-    return knee_users, knee_response_time, knee_index
-
-def generate_knee_graph(k6_data, hpa_df, hpa_summary, output_dir):
-    """Generate the knee graph and related visualizations"""
-    print("📊 Generating knee graph and performance visualizations...")
-    
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
+    # Knees of the latency (convex) and throughput (concave) curves with bootstrap intervals
+    print("🔍 Analyzing knee point in performance curve...")
+    latency_knee = detect_knee(curve['vus'], curve['p95'], curve='convex')
+    throughput_knee = detect_knee(curve['vus'], curve['rpm'], curve='concave')
     
-    # Extract data for knee graph
-    # For this analysis, we'll simulate data points based on the test stages
-    # In a real scenario, you'd extract this from k6's detailed time-series data
-    
-    # Simulate user load progression based on test stages
-    user_stages = [50, 200, 500, 1000, 1500, 2000]
-    
-    # Simulate response times (would come from detailed k6 data in practice)
-    # These values represent typical performance degradation
-    base_response_time = k6_data['response_times']['p95']
-    response_times = []
-    
-    for users in user_stages:
-        # Simulate response time degradation with knee around 800-1000 users
-        if users <= 500:
-            # Linear increase up to 500 users
-            rt = base_response_time * (1 + users / 2000)
-        elif users <= 1000:
-            # Moderate increase from 500-1000 users
-            rt = base_response_time * (1.25 + (users - 500) / 1000)
-        else:
-            # Rapid increase after 1000 users (the knee)
-            rt = base_response_time * (1.75 + (users - 1000) / 200)
-        
-        response_times.append(rt)
-    
-    # Calculate throughput (requests per minute)
-    throughputs = []
-    for users in user_stages:
-        # Throughput increases with users but plateaus after the knee
-        if users <= 1000:
-            tpm = users * 12  # ~12 requests per minute per user
-        else:
-            # Throughput plateaus and may decrease after knee
-            tpm = 1000 * 12 * (1 - (users - 1000) / 5000)
-        throughputs.append(max(tpm, 0))
+    return {
+        'curve': curve,
+        'stage_stats': stage_stats,
+        'latency_knee': latency_knee,
+        'throughput_knee': throughput_knee,
+    }
+
+def format_pacing(pacing):
+    """Intended pacing as iterations when the run has iteration samples, else as the per-VU request interval"""
+    if pacing['iteration_s'] is None:
+        return f"{pacing['interval_s']:.2f}s between a VU's requests, iteration unknown"
+    return f"{pacing['iteration_s']:.2f}s per iteration of {pacing['requests_per_iteration']:.1f} requests"
+
+def analyze_omission(k6_data, stage_stats):
+    """Coordinated-omission-corrected latency and offered vs achieved request rate for every stage"""
+    rollup = k6_data.get('rollup')
+    if stage_stats is None or rollup is None:
+        return None
+    boundaries = np.append(stage_stats['start_ns'], stage_stats['start_ns'][-1] + stage_stats['seconds'][-1] * 1e9)
+    omission = coordinated_omission(k6_data['points'], boundaries, rollup.light_load_end())
+    if omission is None:
+        return None
+    pacing, raw, corrected = omission['pacing'], omission['raw'], omission['corrected']
+    print(f"🧮 Intended pacing: {format_pacing(pacing)} ({pacing['source']})")
+    if omission['method'] == 'per-VU replay':
+        print("🧮 Coordinated omission corrected by replaying every VU's intended schedule")
+    else:
+        print(f"⚠️  Only {omission['tagged_share'] * 100:.0f}% of the requests carry a vu tag (add 'vu' to "
+              f"options.systemTags) - corrected with a {pacing['interval_s']:.2f}s expected interval instead")
+    print(f"⏱️  p99 {raw['p99']:.1f} ms measured, {corrected['p99']:.1f} ms corrected for coordinated omission")
+    return omission
+
+def save_figure(fig, path_stem, formats=('png', 'pdf')):
+    """Write a figure once per requested format (PNG at PLOT_DPI)"""
+    for fmt in formats:
+        fig.savefig(f'{path_stem}.{fmt}', dpi=PLOT_DPI if fmt == 'png' else 'figure', bbox_inches='tight')
+
+def plot_knee_graph(knee, hpa_df, output_dir, formats=('png', 'pdf')):
+    """Knee graph, throughput curve and HPA replicas; every series is decimated to the plot width"""
+    curve, latency_knee, throughput_knee = knee['curve'], knee['latency_knee'], knee['throughput_knee']
+    knee_users, knee_response_time = latency_knee['x'], latency_knee['y']
     
-    # Find knee point
-    knee_users, knee_response_time, knee_index = find_knee_point(user_stages, response_times)
+    plt = pyplot()
     
     # Create the main knee graph
-    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 15))
+    width = 12
+    budget = pixel_budget(width)
+    fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(width, 15))
     
     # Plot 1: Response Time vs Concurrent Users (The Knee Graph)
-    ax1.plot(user_stages, response_times, 'b-o', linewidth=3, markersize=8, label='95th Percentile Response Time')
-    ax1.axvline(x=knee_users, color='red', linestyle='--', linewidth=2, label=f'Knee Point ({knee_users} users)')
+    user_stages, response_times = decimate(curve['vus'], curve['p95'], budget)
+    markers = len(user_stages) <= MARKER_LIMIT
+    ax1.plot(user_stages, response_times, 'b-o' if markers else 'b-', linewidth=3, markersize=8,
+             label='95th Percentile Response Time')
+    ax1.plot(*decimate(curve['vus'], curve['p50'], budget), 'c--', linewidth=1.5, label='Median Response Time')
+    ax1.axvline(x=knee_users, color='red', linestyle='--', linewidth=2, label=f'Knee Point ({knee_users:.0f} users)')
+    ax1.axvspan(latency_knee['ci_low'], latency_knee['ci_high'], color='red', alpha=0.1, label='Knee 90% CI')
     ax1.scatter([knee_users], [knee_response_time], color='red', s=100, zorder=5)
     ax1.set_xlabel('Concurrent Users', fontsize=12)
     ax1.set_ylabel('Response Time (ms)', fontsize=12)
@@ -219,14 +310,22 @@ def generate_knee_graph(k6_data, hpa_df, hpa_summary, output_dir):
     ax1.legend()
     
     # Add annotations
-    ax1.annotate(f'Knee Point\n{knee_users} users\n{knee_response_time:.1f}ms', 
+    ax1.annotate(f'Knee Point\n{knee_users:.0f} users\n{knee_response_time:.1f}ms', 
                 xy=(knee_users, knee_response_time), xytext=(knee_users + 200, knee_response_time + 200),
                 arrowprops=dict(arrowstyle='->', color='red', lw=2),
                 fontsize=10, ha='center', bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
     
     # Plot 2: Throughput vs Concurrent Users
-    ax2.plot(user_stages, throughputs, 'g-s', linewidth=3, markersize=8, label='Throughput (requests/min)')
-    ax2.axvline(x=knee_users, color='red', linestyle='--', linewidth=2, label=f'Knee Point ({knee_users} users)')
+    user_stages, throughputs = decimate(curve['vus'], curve['rpm'], budget)
+    ax2.plot(user_stages, throughputs, 'g-s' if markers else 'g-', linewidth=3, markersize=8,
+             label='Throughput (requests/min)')
+    ax2.axvline(x=knee_users, color='red', linestyle='--', linewidth=2, label=f'Knee Point ({knee_users:.0f} users)')
+    ax2.axvline(x=throughput_knee['x'], color='purple', linestyle=':', linewidth=2,
+                label=f"Throughput Knee ({throughput_knee['x']:.0f} users)")
+    capacity = knee.get('capacity')
+    if capacity is not None:
+        ax2.plot(*decimate(curve['vus'], capacity['fitted_rps'] * 60, budget), 'k--', linewidth=1.5,
+                 label=f"USL fit (σ={capacity['sigma']:.3g}, κ={capacity['kappa']:.3g})")
     ax2.set_xlabel('Concurrent Users', fontsize=12)
     ax2.set_ylabel('Throughput (requests/min)', fontsize=12)
     ax2.set_title('Throughput vs Concurrent Users', fontsize=14, fontweight='bold')
@@ -234,12 +333,15 @@ def generate_knee_graph(k6_data, hpa_df, hpa_summary, output_dir):
     ax2.legend()
     
     # Plot 3: HPA Scaling Behavior
-    if not hpa_df.empty:
+    if hpa_df is not None and not hpa_df.empty:
         # Plot replica count over time for each service
         for service in hpa_df['service'].unique():
             service_data = hpa_df[hpa_df['service'] == service]
-            ax3.plot(service_data['timestamp'], service_data['current_replicas'], 
-                    marker='o', linewidth=2, label=f'{service} replicas')
+            # Replica counts are steps, so keep every bucket's min and max rather than the shape
+            times, replicas = decimate(service_data['timestamp'].to_numpy(), service_data['current_replicas'].to_numpy(),
+                                       budget, method='minmax')
+            ax3.plot(times, replicas, marker='o' if len(times) <= MARKER_LIMIT else None,
+                     drawstyle='steps-post', linewidth=2, label=f'{service} replicas')
         
         ax3.set_xlabel('Time', fontsize=12)
         ax3.set_ylabel('Number of Replicas', fontsize=12)
@@ -249,19 +351,387 @@ def generate_knee_graph(k6_data, hpa_df, hpa_summary, output_dir):
         ax3.tick_params(axis='x', rotation=45)
     
     plt.tight_layout()
-    plt.savefig(f'{output_dir}/nova_knee_graph.png', dpi=300, bbox_inches='tight')
-    plt.savefig(f'{output_dir}/nova_knee_graph.pdf', bbox_inches='tight')
+    save_figure(fig, f'{output_dir}/nova_knee_graph', formats)
+    plt.close(fig)
+    
+    print(f"✅ Knee graph saved to {output_dir}/nova_knee_graph.{formats[0]}")
+
+def generate_knee_graph(k6_data, hpa_df, hpa_summary, output_dir, stages=None, plot_formats=('png', 'pdf'),
+                        stage_source='detected'):
+    """Generate the knee graph and related visualizations"""
+    print("📊 Generating knee graph and performance visualizations...")
+    
+    # Create output directory
+    os.makedirs(output_dir, exist_ok=True)
+    
+    with profiling.stage('knee') as stage:
+        knee = analyze_knee(k6_data, stages, stage_source)
+        stage['rows'] = int(knee['curve']['requests'].sum()) if knee is not None else None
+    k6_data['knee'] = knee
+    if knee is None:
+        with profiling.stage('report'):
+            generate_summary_report(k6_data, hpa_summary, None, None, k6_data['throughput_rpm'], output_dir)
+        return None, None
+    latency_knee, throughput_knee = knee['latency_knee'], knee['throughput_knee']
+    knee_users, knee_response_time = latency_knee['x'], latency_knee['y']
+    
+    # USL capacity model; replica projections only from measured (not simulated) HPA data
+    with profiling.stage('capacity') as stage:
+        knee['capacity'] = capacity_model(knee['curve'], hpa_summary if hpa_df is not None else None)
+        stage['rows'] = len(knee['curve']['vus'])
+    
+    # Latency as the intended open schedule would have seen it, and how much load was never sent
+    with profiling.stage('omission') as stage:
+        knee['omission'] = analyze_omission(k6_data, knee['stage_stats'])
+        stage['rows'] = knee['omission']['corrected_samples'] if knee['omission'] is not None else None
+    
+    if plot_formats:
+        with profiling.stage('plot') as stage:
+            plot_knee_graph(knee, hpa_df, output_dir, plot_formats)
+            stage['rows'] = len(knee['curve']['vus'])
     
     # Generate summary report
-    generate_summary_report(k6_data, hpa_summary, knee_users, knee_response_time, 
-                          max(throughputs), output_dir)
+    with profiling.stage('report'):
+        generate_summary_report(k6_data, hpa_summary, knee_users, knee_response_time, 
+                              knee['curve']['rpm'].max(), output_dir, knee['stage_stats'], (latency_knee, throughput_knee))
     
-    print(f"✅ Knee graph saved to {output_dir}/nova_knee_graph.png")
-    print(f"📊 Knee point identified at {knee_users} concurrent users with {knee_response_time:.1f}ms response time")
+    print(f"📊 Knee point identified at {knee_users:.0f} concurrent users with {knee_response_time:.1f}ms response time")
     
     return knee_users, knee_response_time
 
-def generate_summary_report(k6_data, hpa_summary, knee_users, knee_response_time, max_throughput, output_dir):
+def write_latency_windows(k6_data, output_dir, window_seconds):
+    """Write per-window latency percentiles from the rollup index (or mergeable sketches of the raw samples)"""
+    points = k6_data.get('points')
+    if points is None:
+        return None
+    
+    pd = pandas()
+    rollup = k6_data.get('rollup')
+    if rollup is not None and float(window_seconds).is_integer():
+        windows = rollup.window_series(window_seconds)
+        starts, requests = windows['window_start_ns'], windows['requests']
+        series = {f'p{q}': windows[f'p{q}'] for q in (50, 90, 95, 99)}
+    else:
+        times, durations = points.series('http_req_duration')
+        starts, sketches = windowed_sketches(times, durations, window_seconds)
+        requests = [sketch.count for sketch in sketches]
+        series = percentile_series(sketches)
+    
+    windows_df = pd.DataFrame({
+        'window_start': pd.to_datetime(starts, unit='ns', utc=True),
+        'requests': requests,
+        'rps': np.asarray(requests) / window_seconds,
+        **series,
+    })
+    
+    os.makedirs(output_dir, exist_ok=True)
+    windows_path = f'{output_dir}/latency_windows.csv'
+    windows_df.to_csv(windows_path, index=False)
+    print(f"⏱️  Latency percentiles per {window_seconds}s window saved to {windows_path}")
+    
+    return windows_df
+
+def generate_endpoint_breakdown(k6_data, output_dir, window_seconds, plot_formats=('png', 'pdf')):
+    """Per-endpoint table and throughput/latency-over-time plot from k6 request tags"""
+    points = k6_data.get('points')
+    if points is None:
+        return None
+    
+    table = endpoint_table(points)
+    timeseries = endpoint_timeseries(points, window_seconds)
+    if table is None or timeseries is None:
+        return None
+    
+    pd = pandas()
+    os.makedirs(output_dir, exist_ok=True)
+    pd.DataFrame(table).to_csv(f'{output_dir}/endpoint_breakdown.csv', index=False)
+    k6_data['endpoint_table'] = table
+    if not plot_formats:
+        return table
+    
+    plt = pyplot()
+    starts, labels, rps, p95 = timeseries
+    window_times = pd.to_datetime(starts, unit='ns', utc=True)
+    endpoint_names = [f"{method} {endpoint_path(name)}" for method, name in zip(labels['method'], labels['name'])]
+    
+    width = 12
+    budget = pixel_budget(width)
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(width, 10), sharex=True)
+    for i, label in enumerate(endpoint_names):
+        ax1.plot(*decimate(window_times.to_numpy(), rps[i], budget), linewidth=2, label=label)
+        ax2.plot(*decimate(window_times.to_numpy(), p95[i], budget), linewidth=2, label=label)
+    
+    ax1.set_ylabel('Throughput (requests/s)', fontsize=12)
+    ax1.set_title('Throughput per Endpoint', fontsize=14, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend()
+    
+    ax2.set_xlabel('Time', fontsize=12)
+    ax2.set_ylabel('95th Percentile Response Time (ms)', fontsize=12)
+    ax2.set_title('Response Time per Endpoint', fontsize=14, fontweight='bold')
+    ax2.grid(True, alpha=0.3)
+    ax2.tick_params(axis='x', rotation=45)
+    
+    plt.tight_layout()
+    save_figure(fig, f'{output_dir}/endpoint_breakdown', plot_formats)
+    plt.close(fig)
+    
+    print(f"🧭 Endpoint breakdown saved to {output_dir}/endpoint_breakdown.{plot_formats[0]}")
+    return table
+
+def generate_scaling_correlation(k6_data, hpa_df, resource_summary, output_dir):
+    """Join k6 windows with HPA/resource samples; write the timeline and scale-up reactions"""
+    points = k6_data.get('points')
+    if points is None or (hpa_df is None and resource_summary is None):
+        return None
+    
+    correlation = correlate_run(points, hpa_df, resource_summary)
+    if correlation is None or not correlation['services']:
+        return None
+    
+    pd = pandas()
+    timeline_frames, reaction_rows = [], []
+    for service, data in correlation['services'].items():
+        timeline = data['timeline']
+        # HPA samples and pod resource samples each carry the k6 window they fall into
+        for samples in (timeline, timeline.get('resources')):
+            if not samples or 'time_ns' not in samples:
+                continue
+            columns = {key: values for key, values in samples.items() if key not in ('time_ns', 'resources')}
+            timeline_frames.append(pd.DataFrame({
+                'timestamp': pd.to_datetime(samples['time_ns'], unit='ns', utc=True),
+                'service': service,
+                **columns,
+            }))
+        for reaction in data['reactions']:
+            reaction_rows.append({
+                'service': service,
+                **{key: (format_time(value) if key.endswith('_ns') else value) for key, value in reaction.items()},
+            })
+    
+    os.makedirs(output_dir, exist_ok=True)
+    pd.concat(timeline_frames, ignore_index=True).to_csv(f'{output_dir}/scaling_correlation.csv', index=False)
+    pd.DataFrame(reaction_rows).to_csv(f'{output_dir}/scaling_reactions.csv', index=False)
+    
+    print(f"🔗 Latency/scaling correlation saved to {output_dir}/scaling_correlation.csv")
+    k6_data['scaling'] = correlation
+    return correlation
+
+def generate_slo_series(k6_data, slos, output_dir, window_s):
+    """Sliding-window SLO compliance and burn rates per second; records the first breach of each SLO"""
+    points = k6_data.get('points')
+    if points is None or not slos:
+        return None
+    
+    tracker = evaluate_slos(points, slos, window_s)
+    series = tracker.series()
+    if not series:
+        return None
+    
+    pd = pandas()
+    slo_df = pd.DataFrame({
+        'timestamp': pd.to_datetime(series['time_ns'], unit='ns', utc=True),
+        **{key: values for key, values in series.items() if key != 'time_ns'},
+    })
+    os.makedirs(output_dir, exist_ok=True)
+    slo_df.to_csv(f'{output_dir}/slo_windows.csv', index=False)
+    
+    breaches = tracker.first_breaches()
+    print(f"🎯 SLO compliance per {window_s}s window saved to {output_dir}/slo_windows.csv "
+          f"({len({breach['slo'] for breach in breaches})}/{len(slos)} SLOs breached)")
+    k6_data['slo'] = {'slos': slos, 'window_s': window_s, 'breaches': breaches}
+    return k6_data['slo']
+
+def format_slo_section(slo):
+    """Report section with the first breach of every SLO"""
+    section = f"""
+## 🎯 SLO Compliance
+Evaluated every second over a sliding {slo['window_s']}s window, with multi-window error-budget burn-rate alerts.
+
+| SLO | Objective | First Window Breach | VUs | First Burn-Rate Alert | VUs |
+|-----|-----------|---------------------|-----|-----------------------|-----|
+"""
+    for spec in slo['slos']:
+        breaches = [breach for breach in slo['breaches'] if breach['slo'] == spec['name']]
+        window = next((breach for breach in breaches if breach['type'] == 'window'), None)
+        burn = next((breach for breach in breaches if breach['type'] == 'burn'), None)
+        window_cell = f"{format_time(window['time_ns'])} ({window['value']:.1%})" if window else 'never'
+        burn_cell = f"{format_time(burn['time_ns'])} {burn['rule']}" if burn else 'never'
+        window_vus = f"{window['vus']:.0f}" if window else '-'
+        burn_vus = f"{burn['vus']:.0f}" if burn else '-'
+        section += (
+            f"| {spec['name']} "
+            f"| {spec['objective']:.1%} "
+            f"| {window_cell} "
+            f"| {window_vus} "
+            f"| {burn_cell} "
+            f"| {burn_vus} |\n"
+        )
+    return section
+
+def format_generator_section(generators):
+    """Report section comparing the load generators of a merged run"""
+    section = """
+## 🖥️ Load Generators
+Merged in time order; clock skew is relative to the first generator. A generator that is slower than its peers
+against the same backend is saturated itself, so its share of the results overstates the backend latency.
+
+| Generator | Clock Skew | Max VUs | Requests | RPS | Req/VU-s | p50 (ms) | p95 (ms) | p99 (ms) | Errors | Bottleneck |
+|-----------|------------|---------|----------|-----|----------|----------|----------|----------|--------|------------|
+"""
+    for i in range(len(generators['generator'])):
+        skew = generators['skew_s'][i]
+        clock = 'unknown' if np.isnan(skew) else f"{skew:+.2f}s{' (corrected)' if generators['corrected'][i] else ''}"
+        section += (
+            f"| {generators['generator'][i]} "
+            f"| {clock} "
+            f"| {generators['max_vus'][i]:.0f} "
+            f"| {generators['requests'][i]:,} "
+            f"| {generators['rps'][i]:.1f} "
+            f"| {generators['requests_per_vu_s'][i]:.3f} "
+            f"| {generators['p50'][i]:.1f} "
+            f"| {generators['p95'][i]:.1f} "
+            f"| {generators['p99'][i]:.1f} "
+            f"| {generators['error_rate'][i] * 100:.2f}% "
+            f"| {generators['bottleneck'][i] or '-'} |\n"
+        )
+    return section
+
+def format_omission_section(omission):
+    """Report section comparing measured and coordinated-omission-corrected latency per stage"""
+    pacing, raw, corrected = omission['pacing'], omission['raw'], omission['corrected']
+    if omission['method'] == 'per-VU replay':
+        how = ("Every VU's requests are replayed against its intended schedule: a request held up by a slow "
+               "response counts its latency from when it was due.")
+    else:
+        how = (f"The requests carry no vu tag, so every response slower than the {pacing['interval_s']:.2f}s "
+               f"per-VU request interval is back-filled with the requests it held up.")
+    section = f"""
+## ⏱️ Coordinated Omission
+The VUs are a closed model: while a response is slow its VU sends nothing, so the measured latencies miss the
+requests that were never sent. Intended pacing: {format_pacing(pacing)} ({pacing['source']}). {how}
+
+- **Measured**: p50 {raw['p50']:.1f} ms, p95 {raw['p95']:.1f} ms, p99 {raw['p99']:.1f} ms
+- **Corrected**: p50 {corrected['p50']:.1f} ms, p95 {corrected['p95']:.1f} ms, p99 {corrected['p99']:.1f} ms
+
+| Stage | Start | Duration | Mean VUs | Offered RPS | Achieved RPS | Shortfall | p50 (ms) | p95 (ms) | p99 (ms) | Corrected p50 | Corrected p95 | Corrected p99 |
+|-------|-------|----------|----------|-------------|--------------|-----------|----------|----------|----------|---------------|---------------|---------------|
+"""
+    stages = omission['stages']
+    for i in range(len(stages['stage'])):
+        section += (
+            f"| {stages['stage'][i]} "
+            f"| {format_time(stages['start_ns'][i])} "
+            f"| {format_seconds(stages['seconds'][i])} "
+            f"| {stages['mean_vus'][i]:.0f} "
+            f"| {stages['offered_rps'][i]:.1f} "
+            f"| {stages['achieved_rps'][i]:.1f} "
+            f"| {stages['shortfall'][i] * 100:.1f}% "
+            f"| {stages['raw_p50'][i]:.1f} "
+            f"| {stages['raw_p95'][i]:.1f} "
+            f"| {stages['raw_p99'][i]:.1f} "
+            f"| {stages['corrected_p50'][i]:.1f} "
+            f"| {stages['corrected_p95'][i]:.1f} "
+            f"| {stages['corrected_p99'][i]:.1f} |\n"
+        )
+    return section
+
+def format_users(users):
+    return f"{users:,.0f} users" if np.isfinite(users) else "no peak (unbounded)"
+
+def format_capacity_model(capacity):
+    """Markdown section with the USL coefficients, predicted peak and replica projections"""
+    tested = capacity['max_tested_users']
+    extrapolated = " (extrapolated beyond the tested range)" if capacity['peak_users'] > tested else ""
+    littles = capacity['littles_law']
+    section = f"""
+## 📐 Capacity Model (Universal Scalability Law)
+X(N) = λN / (1 + σ(N−1) + κN(N−1)) fitted to the measured throughput of {capacity['levels']} concurrency levels
+(weighted by requests, R² = {capacity['r2']:.3f}).
+
+| Parameter | Value |
+|-----------|-------|
+| λ, throughput per user at low load | {capacity['lambda']:.4f} RPS |
+| σ, contention | {capacity['sigma']:.4g} |
+| κ, coherency | {capacity['kappa']:.4g} |
+| Predicted peak throughput | {capacity['peak_rps']:,.1f} RPS |
+| Concurrency at peak | {format_users(capacity['peak_users'])}{extrapolated} |
+"""
+    if littles is not None:
+        section += f"| Think time per request (Little's law) | {littles['think_time_s']:.2f} s |\n"
+    
+    if capacity['replicas']:
+        section += """
+### Projected Effect of More Replicas
+Contention is taken to be shared between replicas (database, connection pool) and coherency to be per replica.
+
+| Service | Replicas Reached | maxReplicas | Peak at maxReplicas | Peak at 2× maxReplicas | Gain of 2× over maxReplicas |
+|---------|------------------|-------------|---------------------|------------------------|-----------------------------|
+"""
+        for row in capacity['replicas']:
+            gain = f"{row['gain_doubled'] * 100:+.0f}%" if np.isfinite(row['gain_doubled']) else "-"
+            section += (f"| {row['service']} | {row['replicas_reached']} | {row['replicas_max']} "
+                        f"| {row['peak_rps_at_max']:,.1f} RPS | {row['peak_rps_doubled']:,.1f} RPS | {gain} |\n")
+    return section
+
+def format_recommendations(knee_users, knee_response_time, capacity, hpa_summary):
+    """Recommendations and conclusion derived from the knee and the capacity model"""
+    planning_users = knee_users if capacity is None else min(knee_users, capacity['planning_users'])
+    saturated = [service for service, data in hpa_summary.items()
+                 if data['max_replicas_reached'] >= data['max_replicas_configured']]
+    
+    if capacity is None:
+        ceiling = "Not enough concurrency levels to fit a capacity model"
+        limit = "Unknown (capacity model not fitted)"
+        conclusion = (f"Response times increase significantly beyond {knee_users:.0f} concurrent users, "
+                      "the system's capacity limit under the current configuration.")
+    else:
+        peak = f"{capacity['peak_rps']:,.1f} RPS at {format_users(capacity['peak_users'])}"
+        if np.isfinite(capacity['peak_users']):
+            ceiling = f"The USL model predicts a throughput peak of {peak}; beyond it throughput falls as load grows"
+        else:
+            ceiling = f"Throughput keeps rising within the tested range (model asymptote {capacity['peak_rps']:,.1f} RPS)"
+        doubled = max((row['gain_doubled'] for row in capacity['replicas'] if np.isfinite(row['gain_doubled'])),
+                      default=None)
+        replica_effect = (f"doubling maxReplicas is projected to raise the peak at maxReplicas by at most "
+                          f"{doubled * 100:.0f}%"
+                          if doubled is not None else "no HPA data to project the effect of more replicas")
+        limit = {
+            'contention': f"Contention (σ = {capacity['sigma']:.3g}): serialization on a shared resource such as "
+                          f"database connections; {replica_effect}",
+            'coherency': f"Coherency (κ = {capacity['kappa']:.3g}): crosstalk between workers; {replica_effect}",
+            'none': f"None measurable: throughput scaled linearly with load; {replica_effect}",
+        }[capacity['bottleneck']]
+        conclusion = (f"Response times increase significantly beyond {knee_users:.0f} concurrent users. "
+                      f"The throughput model attributes the scaling limit to {capacity['bottleneck']} "
+                      f"(σ = {capacity['sigma']:.3g}, κ = {capacity['kappa']:.3g}) and predicts a ceiling of {peak}.")
+    
+    hpa = (f"{', '.join(saturated)} reached maxReplicas; raise it or reduce per-request cost" if saturated
+           else "No service reached its maxReplicas during the test")
+    
+    return f"""
+## 📊 Recommendations
+
+### Performance Optimization
+1. **Optimal Load**: System performs best with up to {knee_users:.0f} concurrent users
+2. **Throughput Ceiling**: {ceiling}
+3. **Response Time SLA**: Set SLA targets below {knee_response_time:.0f}ms for optimal user experience
+
+### Infrastructure Scaling
+1. **Limiting Factor**: {limit}
+2. **HPA Configuration**: {hpa}
+
+### Monitoring
+1. **Key Metric**: Monitor 95th percentile response time as primary performance indicator
+2. **Alert Threshold**: Set alerts at {knee_users * 0.8:.0f} users (80% of knee point)
+3. **Capacity Planning**: Plan for {planning_users:.0f} users maximum sustainable load (the knee or 80% of the modelled peak, whichever is lower)
+
+## 🎯 Conclusion
+{conclusion}
+"""
+
+def generate_summary_report(k6_data, hpa_summary, knee_users, knee_response_time, max_throughput, output_dir,
+                            stage_stats=None, knees=None):
     """Generate a comprehensive performance test summary report"""
     
     report_content = f"""
@@ -290,10 +760,77 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **Peak Throughput**: {max_throughput:.1f} RPM
 
 ## 🔍 Knee Point Analysis
-- **Knee Point**: {knee_users} concurrent users
+"""
+    
+    if knee_users is None:
+        report_content += """- **Skipped**: the knee needs per-request samples (the k6 `--out json` point stream), and these results
+  only hold the end-of-test summary
+"""
+    else:
+        report_content += f"""- **Knee Point**: {knee_users:.0f} concurrent users
 - **Response Time at Knee**: {knee_response_time:.1f} ms
-- **Performance Degradation**: System performance degrades significantly beyond {knee_users} users
-
+- **Performance Degradation**: System performance degrades significantly beyond {knee_users:.0f} users
+"""
+    
+    if knees is not None:
+        latency_knee, throughput_knee = knees
+        report_content += f"""- **Knee 90% Confidence Interval**: {latency_knee['ci_low']:.0f} - {latency_knee['ci_high']:.0f} users
+- **Throughput Knee**: {throughput_knee['x']:.0f} users ({throughput_knee['y']:.0f} RPM, 90% CI {throughput_knee['ci_low']:.0f} - {throughput_knee['ci_high']:.0f})
+"""
+    
+    if stage_stats is not None:
+        report_content += """
+## 📶 Per-Stage Results
+| Stage | Start | Duration | Regime | VUs | Requests | RPS | p50 (ms) | p95 (ms) | p99 (ms) | Errors |
+|-------|-------|----------|--------|-----|----------|-----|----------|----------|----------|--------|
+"""
+        for i in range(len(stage_stats['stage'])):
+            vus = (f"{stage_stats['start_vus'][i]:.0f} → {stage_stats['target_vus'][i]:.0f}"
+                   if np.isfinite(stage_stats['start_vus'][i]) else '-')
+            report_content += (
+                f"| {stage_stats['stage'][i]} "
+                f"| {format_time(stage_stats['start_ns'][i])} "
+                f"| {format_seconds(stage_stats['seconds'][i])} "
+                f"| {stage_stats['kind'][i]} "
+                f"| {vus} "
+                f"| {stage_stats['requests'][i]:,} "
+                f"| {stage_stats['rps'][i]:.1f} "
+                f"| {stage_stats['p50'][i]:.1f} "
+                f"| {stage_stats['p95'][i]:.1f} "
+                f"| {stage_stats['p99'][i]:.1f} "
+                f"| {stage_stats['error_rate'][i] * 100:.2f}% |\n"
+            )
+    
+    omission = (k6_data.get('knee') or {}).get('omission')
+    if omission is not None:
+        report_content += format_omission_section(omission)
+    
+    endpoints = k6_data.get('endpoint_table')
+    if endpoints is not None:
+        report_content += """
+## 🧭 Per-Endpoint Breakdown
+| Endpoint | Backend | Requests | RPS | p50 (ms) | p95 (ms) | p99 (ms) | Errors |
+|----------|---------|----------|-----|----------|----------|----------|--------|
+"""
+        for i in range(len(endpoints['requests'])):
+            report_content += (
+                f"| {endpoints['method'][i]} {endpoints['path'][i]} "
+                f"| {endpoints['backend'][i]} "
+                f"| {endpoints['requests'][i]:,} "
+                f"| {endpoints['rps'][i]:.1f} "
+                f"| {endpoints['p50'][i]:.1f} "
+                f"| {endpoints['p95'][i]:.1f} "
+                f"| {endpoints['p99'][i]:.1f} "
+                f"| {endpoints['error_rate'][i] * 100:.2f}% |\n"
+            )
+    
+    if k6_data.get('generators') is not None:
+        report_content += format_generator_section(k6_data['generators'])
+    
+    if k6_data.get('slo') is not None:
+        report_content += format_slo_section(k6_data['slo'])
+    
+    report_content += """
 ## 🚀 HPA Scaling Summary
 """
     
@@ -306,29 +843,56 @@ Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **Peak Memory Usage**: {data['max_memory_percent']:.1f}%
 """
     
-    report_content += f"""
-## 📊 Recommendations
-
-### Performance Optimization
-1. **Optimal Load**: System performs best with up to {knee_users} concurrent users
-2. **Scaling Threshold**: Consider increasing resource limits if sustained load > {knee_users} users
-3. **Response Time SLA**: Set SLA targets below {knee_response_time:.0f}ms for optimal user experience
-
-### Infrastructure Scaling
-1. **HPA Configuration**: Current HPA settings handled the load well
-2. **Resource Allocation**: Monitor resource usage patterns for optimization
-3. **Database Performance**: Consider database optimization for loads beyond knee point
-
-### Monitoring
-1. **Key Metric**: Monitor 95th percentile response time as primary performance indicator
-2. **Alert Threshold**: Set alerts at {knee_users * 0.8:.0f} users (80% of knee point)
-3. **Capacity Planning**: Plan for {knee_users * 1.2:.0f} users maximum sustainable load
+    scaling = k6_data.get('scaling')
+    if scaling is not None and not any(data['reactions'] for data in scaling['services'].values()):
+        report_content += """
+## ⏱️ Scale-Up Reaction Times
+No scale-up events during the run.
+"""
+    elif scaling is not None:
+        report_content += """
+## ⏱️ Scale-Up Reaction Times
+Load rise = start of the over-target CPU/memory run; recovery = p95 back within 20% of its load-rise value.
 
-## 🎯 Conclusion
-The Nova system demonstrates good scalability up to {knee_users} concurrent users, with automatic HPA scaling 
-maintaining performance. Beyond this point, response times increase significantly, indicating the system's 
-capacity limit under the current configuration.
+| Service | Replicas | Load Rise | Rise → Desired | Desired → Ready | Ready → Recovered | Total |
+|---------|----------|-----------|----------------|-----------------|-------------------|-------|
+"""
+        for service, data in scaling['services'].items():
+            for reaction in data['reactions']:
+                report_content += (
+                    f"| {service} "
+                    f"| {reaction['from_replicas']} → {reaction['to_replicas']} "
+                    f"| {format_time(reaction['load_rise_ns'])} "
+                    f"| {format_seconds(reaction['rise_to_desired_s'])} "
+                    f"| {format_seconds(reaction['desired_to_ready_s'])} "
+                    f"| {format_seconds(reaction['ready_to_recovery_s'])} "
+                    f"| {format_seconds(reaction['total_s'])} |\n"
+                )
+    
+    if scaling is not None:
+        efficiency = {service: data['efficiency'] for service, data in scaling['services'].items()
+                      if data['efficiency'] is not None}
+        if efficiency:
+            report_content += """
+### Resource Efficiency
+| Service | CPU per Request (ms) | Marginal CPU per Request (ms) | Memory per VU (MiB) | Baseline Memory (MiB) |
+|---------|----------------------|-------------------------------|---------------------|-----------------------|
 """
+            for service, data in efficiency.items():
+                report_content += (
+                    f"| {service} "
+                    f"| {data['cpu_ms_per_request']:.2f} "
+                    f"| {data['cpu_ms_per_request_marginal']:.2f} "
+                    f"| {data['memory_mib_per_vu']:.3f} "
+                    f"| {data['memory_baseline_mib']:.0f} |\n"
+                )
+    
+    capacity = (k6_data.get('knee') or {}).get('capacity')
+    if capacity is not None:
+        report_content += format_capacity_model(capacity)
+    
+    if knee_users is not None:
+        report_content += format_recommendations(knee_users, knee_response_time, capacity, hpa_summary)
     
     # Save report
     with open(f'{output_dir}/performance_report.md', 'w') as f:
@@ -336,28 +900,163 @@ capacity limit under the current configuration.
     
     print(f"📋 Performance report saved to {output_dir}/performance_report.md")
 
-def main():
-    parser = argparse.ArgumentParser(description='Analyze Nova performance test results')
-    parser.add_argument('--k6-results', required=True, help='Path to k6 JSON results file')
-    parser.add_argument('--hpa-data', help='Path to HPA CSV data file')
-    parser.add_argument('--resource-metrics', help='Path to resource metrics CSV file')
-    parser.add_argument('--output-dir', default='performance-tests/analysis', help='Output directory for results')
-    
-    args = parser.parse_args()
+def _jsonable(value):
+    """Convert NumPy values/arrays (NaN -> None) into plain JSON types"""
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+def _records(table, skip=()):
+    """Dict of equal-length columns -> list of row dicts"""
+    if table is None:
+        return []
+    columns = [key for key in table if key not in skip]
+    return [{key: table[key][i] for key in columns} for i in range(len(table[columns[0]]))]
+
+def collect_results(k6_data, hpa_summary, hpa_simulated=False):
+    """Machine-readable results of the analysis for --format json/text"""
+    knee = k6_data.get('knee')
+    results = {
+        'summary': {key: k6_data[key] for key in ('response_times', 'throughput_rps', 'throughput_rpm', 'total_requests',
+                                                  'max_concurrent_users', 'error_rate_percent', 'test_duration_minutes')},
+        'knee': None,
+        'stages': [],
+        'endpoints': _records(k6_data.get('endpoint_table')),
+        'generators': _records(k6_data.get('generators')),
+        'hpa': {'simulated': hpa_simulated, 'services': hpa_summary},
+        'scaling': {},
+        'capacity': None,
+        'omission': None,
+        'slo': None,
+        'import_seconds': _IMPORT_SECONDS,
+    }
+    if knee is not None:
+        latency_knee, throughput_knee = knee['latency_knee'], knee['throughput_knee']
+        results['knee'] = {
+            'users': latency_knee['x'],
+            'response_time_ms': latency_knee['y'],
+            'ci_low': latency_knee['ci_low'],
+            'ci_high': latency_knee['ci_high'],
+            'throughput_knee_users': throughput_knee['x'],
+            'max_throughput_rpm': knee['curve']['rpm'].max(),
+        }
+        results['stages'] = _records(knee['stage_stats'])
+        capacity = knee.get('capacity')
+        if capacity is not None:
+            results['capacity'] = {key: value for key, value in capacity.items()
+                                   if key not in ('fitted_rps', 'littles_law')}
+            if capacity['littles_law'] is not None:
+                results['capacity']['think_time_s'] = capacity['littles_law']['think_time_s']
+        omission = knee.get('omission')
+        if omission is not None:
+            results['omission'] = {**{key: omission[key] for key in ('method', 'pacing', 'raw', 'corrected')},
+                                   'stages': _records(omission['stages'])}
+    slo = k6_data.get('slo')
+    if slo is not None:
+        results['slo'] = {'window_s': slo['window_s'], 'slos': slo['slos'], 'breaches': [
+            {**breach, 'time': format_time(breach['time_ns'])} for breach in slo['breaches']]}
+    scaling = k6_data.get('scaling')
+    if scaling is not None:
+        results['scaling'] = {service: {'reactions': data['reactions'], 'efficiency': data['efficiency']}
+                              for service, data in scaling['services'].items()}
+    return _jsonable(results)
+
+def format_text_results(results):
+    """Compact plain-text rendering of collect_results() for terminals and CI logs"""
+    summary, rt = results['summary'], results['summary']['response_times']
+    lines = [
+        f"requests {summary['total_requests']:,} | {summary['throughput_rps']:.1f} RPS | "
+        f"p50 {rt['p50']:.1f} p95 {rt['p95']:.1f} p99 {rt['p99']:.1f} ms | errors {summary['error_rate_percent']:.2f}%",
+    ]
+    knee = results['knee']
+    if knee is not None:
+        lines.append(f"knee {knee['users']:.0f} users (CI {knee['ci_low']:.0f}-{knee['ci_high']:.0f}) at "
+                     f"{knee['response_time_ms']:.1f} ms | throughput knee {knee['throughput_knee_users']:.0f} users")
+    capacity = results.get('capacity')
+    if capacity is not None:
+        peak_users = capacity['peak_users']
+        lines.append(f"USL sigma {capacity['sigma']:.4g} kappa {capacity['kappa']:.4g} (R² {capacity['r2']:.3f}) | "
+                     f"peak {capacity['peak_rps']:,.1f} RPS at "
+                     f"{'unbounded' if peak_users is None else f'{peak_users:,.0f} users'} | {capacity['bottleneck']}")
+    omission = results.get('omission')
+    if omission is not None:
+        raw, corrected = omission['raw'], omission['corrected']
+        lines.append(f"coordinated omission ({omission['method']}): p95 {raw['p95']:.1f} -> {corrected['p95']:.1f} ms, "
+                     f"p99 {raw['p99']:.1f} -> {corrected['p99']:.1f} ms")
+        for stage in omission['stages']:
+            offered = stage['offered_rps']
+            lines.append(f"stage {stage['stage']:>2} offered {'-' if offered is None else f'{offered:8.1f}':>8} RPS  "
+                         f"achieved {stage['achieved_rps']:8.1f} RPS  p99 {stage['raw_p99'] or 0:8.1f} -> "
+                         f"{stage['corrected_p99'] or 0:8.1f} ms")
+    slo = results.get('slo')
+    if slo is not None:
+        for spec in slo['slos']:
+            first = next((breach for breach in slo['breaches'] if breach['slo'] == spec['name']), None)
+            lines.append(f"SLO {spec['name']}: " + (f"first breached {first['time']} at {first['vus']:.0f} VUs ({first['rule']})"
+                                                     if first else "met"))
+    for stage in results['stages']:
+        vus = (f"{stage['start_vus']:>5.0f} -> {stage['target_vus']:<5.0f}" if stage['start_vus'] is not None
+               else f"{'-':>5}    {'-':<5}")
+        lines.append(f"stage {stage['stage']:>2} {vus} {stage['kind']:<9} "
+                     f"{stage['rps']:8.1f} RPS  p95 {stage['p95'] or 0:8.1f} ms  errors {(stage['error_rate'] or 0) * 100:.2f}%")
+    for generator in results.get('generators', []):
+        skew = generator['skew_s']
+        lines.append(f"generator {generator['generator']:<16} skew {'?' if skew is None else f'{skew:+.2f}s':>7} "
+                     f"{generator['rps']:8.1f} RPS  p95 {generator['p95'] or 0:8.1f} ms  "
+                     f"errors {(generator['error_rate'] or 0) * 100:.2f}%"
+                     + (f"  ⚠️ {generator['bottleneck']}" if generator['bottleneck'] else ''))
+    for endpoint in results['endpoints']:
+        lines.append(f"{endpoint['method']} {endpoint['path']:<30} {endpoint['rps']:8.1f} RPS  "
+                     f"p95 {endpoint['p95']:8.1f} ms  errors {(endpoint['error_rate'] or 0) * 100:.2f}%")
+    return '\n'.join(lines)
+
+def run_analysis(args):
+    """Load every input and write the CSVs, report and (unless --no-plots) the graphs"""
+    plot_formats = () if args.no_plots else tuple(fmt.strip() for fmt in args.plot_formats.split(',') if fmt.strip())
     
     print("🚀 Starting Nova Performance Test Analysis")
     print("=" * 50)
     
+    # Live mode: watch the files grow, then fall through to the full analysis once k6 is done
+    if args.follow:
+        slos = slos_from_script(args.load_script, args.apdex_t) if os.path.exists(args.load_script) else []
+        if len(args.k6_results) > 1:
+            print(f"⚠️  Follow mode tails one file: following {args.k6_results[0]} only")
+        status = run_follow(args.k6_results[0], hpa_file=args.hpa_data, resource_file=args.resource_metrics,
+                            interval=args.interval, stop_on_saturation=args.stop_on_saturation,
+                            slos=slos, slo_window_s=args.slo_window)
+        if status != 0:
+            sys.exit(status)
+    
     # Load k6 results
-    k6_data = load_k6_results(args.k6_results)
+    with profiling.stage('load_k6_results') as stage:
+        k6_data = load_k6_results(args.k6_results, args.workers, not args.no_cache, not args.no_skew_correction)
+        stage['rows'] = len(k6_data['points']) if k6_data['points'] is not None else None
+    
+    # Rollup index of the run (1s/10s/60s buckets), written once next to the results (a merged run's in the output directory)
+    if k6_data['points'] is not None:
+        with profiling.stage('rollup') as stage:
+            load_run_rollup(k6_data, args.k6_results, args.output_dir)
+            stage['rows'] = k6_data['rollup'].n_groups if k6_data['rollup'] is not None else None
     
     # Load HPA data if available
-    hpa_df = pd.DataFrame()
+    hpa_df = None
     hpa_summary = {}
+    hpa_simulated = False
+    resource_summary = None
     if args.hpa_data and os.path.exists(args.hpa_data):
-        hpa_df, hpa_summary = load_hpa_data(args.hpa_data)
+        with profiling.stage('load_hpa_data') as stage:
+            hpa_df, hpa_summary = load_hpa_data(args.hpa_data, not args.no_cache)
+            stage['rows'] = len(hpa_df)
     else:
         print("⚠️  HPA data not provided - using simulated scaling data")
+        hpa_simulated = True
         hpa_summary = {
             'api-gateway': {'max_replicas_reached': 4, 'max_replicas_configured': 10, 'scaling_events': 3, 'max_cpu_percent': 75, 'max_memory_percent': 45},
             'frontend': {'max_replicas_reached': 3, 'max_replicas_configured': 8, 'scaling_events': 2, 'max_cpu_percent': 60, 'max_memory_percent': 80},
@@ -365,12 +1064,121 @@ def main():
             'user-product-svc': {'max_replicas_reached': 3, 'max_replicas_configured': 8, 'scaling_events': 2, 'max_cpu_percent': 65, 'max_memory_percent': 50}
         }
     
+    if args.resource_metrics and os.path.exists(args.resource_metrics):
+        with profiling.stage('load_resource_metrics') as stage:
+            resource_df, resource_summary = load_resource_metrics(args.resource_metrics, not args.no_cache)
+            stage['rows'] = len(resource_df)
+    
+    # Stage profile of the load script, used for the per-stage table
+    stages = parse_stage_profile(args.load_script) if os.path.exists(args.load_script) else None
+    
+    # Per-endpoint breakdown (included in the report)
+    with profiling.stage('endpoints'):
+        generate_endpoint_breakdown(k6_data, args.output_dir, args.window, plot_formats)
+    
+    # Scale-up reaction times and resource efficiency (included in the report)
+    with profiling.stage('correlation'):
+        generate_scaling_correlation(k6_data, hpa_df, resource_summary, args.output_dir)
+    
+    # Sliding-window SLOs from the load script's thresholds (included in the report)
+    with profiling.stage('slo') as stage:
+        slos = slos_from_script(args.load_script, args.apdex_t) if os.path.exists(args.load_script) else []
+        generate_slo_series(k6_data, slos, args.output_dir, args.slo_window)
+        stage['rows'] = len(k6_data['points']) if k6_data['points'] is not None else None
+    
     # Generate knee graph and analysis
-    knee_users, knee_response_time = generate_knee_graph(k6_data, hpa_df, hpa_summary, args.output_dir)
+    knee_users, knee_response_time = generate_knee_graph(k6_data, hpa_df, hpa_summary, args.output_dir, stages, plot_formats,
+                                                         args.stage_source)
+    
+    # Windowed latency percentiles
+    with profiling.stage('latency_windows'):
+        write_latency_windows(k6_data, args.output_dir, args.window)
     
     print("\n🎉 Analysis Complete!")
     print(f"📊 Results saved to: {args.output_dir}")
-    print(f"🔍 Knee point: {knee_users} users at {knee_response_time:.1f}ms")
+    if knee_users is not None:
+        print(f"🔍 Knee point: {knee_users:.0f} users at {knee_response_time:.1f}ms")
+    
+    return collect_results(k6_data, hpa_summary, hpa_simulated)
+
+def finish_profile(args):
+    """Write the --profile trace once the analysis is done"""
+    if args.profile is None:
+        return
+    trace_path = args.profile or os.path.join(args.output_dir, 'profile_trace.json')
+    profiling.finish(trace_path, dump=args.profile_dump)
+
+def build_parser():
+    """Command line of the analyzer (also used by benchmark-analyzer.py)"""
+    parser = argparse.ArgumentParser(description='Analyze Nova performance test results')
+    parser.add_argument('--k6-results', nargs='+',
+                        help='Path to k6 JSON results file; the point streams of several load generators are merged')
+    parser.add_argument('--no-skew-correction', action='store_true',
+                        help='Merge several generators on their own timestamps instead of correcting estimated clock skew')
+    parser.add_argument('--hpa-data', help='Path to HPA CSV data file')
+    parser.add_argument('--resource-metrics', help='Path to resource metrics CSV file')
+    parser.add_argument('--output-dir', default='performance-tests/analysis', help='Output directory for results')
+    parser.add_argument('--window', type=float, default=30, help='Window size in seconds for the latency percentile series')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes used to parse the k6 point stream (newline-aligned byte ranges)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always reparse inputs instead of using the columnar cache next to them')
+    parser.add_argument('--follow', action='store_true',
+                        help='Follow a running test: tail the k6/HPA/resource files and print rolling metrics')
+    parser.add_argument('--interval', type=float, default=5, help='Seconds between follow-mode updates')
+    parser.add_argument('--stop-on-saturation', action='store_true',
+                        help=f'In follow mode, exit with status {SATURATED_EXIT_CODE} once the run is past the knee '
+                             'and over the p95/error limits')
+    parser.add_argument('--load-script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nova-load-test.js'),
+                        help='k6 script whose options.stages is checked against (or, with --stage-source script, '
+                             'defines) the per-stage breakdown')
+    parser.add_argument('--stage-source', choices=('detected', 'script'), default='detected',
+                        help='Per-stage table from change points of the VU series (default) or from options.stages')
+    parser.add_argument('--slo-window', type=int, default=DEFAULT_SLO_WINDOW_S,
+                        help='Sliding window in seconds over which the load script thresholds are checked as SLOs')
+    parser.add_argument('--apdex-t', type=float, default=DEFAULT_APDEX_T_MS,
+                        help='Apdex satisfied threshold T in ms (tolerating up to 4T); 0 disables the Apdex SLO')
+    parser.add_argument('--format', choices=('json', 'text'),
+                        help='Print the results to stdout in this format (progress messages go to stderr)')
+    parser.add_argument('--no-plots', action='store_true',
+                        help='Skip the PNG/PDF graphs; matplotlib and seaborn are never imported')
+    parser.add_argument('--plot-formats', default='png,pdf',
+                        help='Comma-separated figure formats to write (each one is a separate render)')
+    parser.add_argument('--profile', nargs='?', const='', metavar='TRACE',
+                        help='Time every pipeline stage (wall, CPU, peak RSS, rows) and write a JSON trace '
+                             '(default <output-dir>/profile_trace.json)')
+    parser.add_argument('--profile-dump', action='store_true',
+                        help='With --profile, also cProfile each stage and save the slowest one as a .prof file '
+                             '(adds profiler overhead to the recorded times)')
+    parser.add_argument('--check-import-time', action='store_true',
+                        help=f'Report module import time and exit non-zero if it exceeds {IMPORT_BUDGET_SECONDS}s')
+    return parser
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    
+    if args.check_import_time:
+        within = _IMPORT_SECONDS <= IMPORT_BUDGET_SECONDS
+        print(f"{'✅' if within else '❌'} Imports took {_IMPORT_SECONDS:.3f}s (budget {IMPORT_BUDGET_SECONDS}s)")
+        sys.exit(0 if within else 1)
+    if not args.k6_results:
+        parser.error('the following arguments are required: --k6-results')
+    if args.profile is not None:
+        profiling.enable(cprofile=args.profile_dump)
+    
+    # Machine-readable output keeps stdout clean: progress messages go to stderr instead
+    if args.format is None:
+        run_analysis(args)
+        finish_profile(args)
+        return
+    with redirect_stdout(sys.stderr):
+        results = run_analysis(args)
+        finish_profile(args)
+    if args.format == 'json':
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_text_results(results))
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
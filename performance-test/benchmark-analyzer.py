@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova Analyzer Benchmark
+Runs the analysis pipeline on synthetic runs of increasing size and records parse throughput,
+peak RSS and wall time per stage, so slowdowns of the analyzer itself show up
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from nova_perf import profiling, run_cache
+from nova_perf.compression import SUFFIXES, compress_file
+from nova_perf.stages import parse_stage_profile
+from nova_perf.synthetic import generate_run
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = '1e5,1e6,1e7'
+
+def point_count(text):
+    """Accept point counts like 1000000, 1e6 or 1_000_000"""
+    return int(float(text.replace('_', '')))
+
+def load_analyzer():
+    """Import analyze-results.py (not importable by name because of the hyphen)"""
+    spec = importlib.util.spec_from_file_location('analyze_results', os.path.join(HERE, 'analyze-results.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def measure(paths, output_dir, workers, plot_formats, load_script):
+    """Run the analyzer once on one generated run with stage profiling (called in a fresh process)"""
+    analyzer = load_analyzer()
+    profiler = profiling.enable()
+
+    # The analyzer's own pipeline and stage names; inputs are always reparsed
+    argv = ['--k6-results', paths['k6_results'], '--hpa-data', paths['hpa_data'],
+            '--resource-metrics', paths['resource_metrics'], '--output-dir', output_dir,
+            '--workers', str(workers), '--load-script', load_script, '--no-cache']
+    argv += ['--plot-formats', ','.join(plot_formats)] if plot_formats else ['--no-plots']
+    # Keep hold of the parsed points for the cache stages below instead of parsing twice
+    loaded = {}
+    load_k6_results = analyzer.load_k6_results
+    analyzer.load_k6_results = lambda *args: loaded.setdefault('k6_data', load_k6_results(*args))
+    analyzer.run_analysis(analyzer.build_parser().parse_args(argv))
+
+    # Columnar cache round trip of the parsed points
+    points = loaded['k6_data']['points']
+    for name in ('cache_write', 'cache_load'):
+        with profiling.stage(name) as stage:
+            run_cache.load_points(paths['k6_results'], lambda path: points)
+            stage['rows'] = len(points)
+
+    return {
+        'lines': points.lines_read,
+        'samples': len(points),
+        'parse_lines_per_second': points.lines_per_second,
+        'bytes_per_sample': points.bytes_per_sample,
+        'input_mb': os.path.getsize(paths['k6_results']) / 1e6,
+        'total_seconds': profiler.total_seconds(),
+        'peak_rss_mb': profiling.peak_rss_mb(),
+        'stages': profiler.stages(),
+    }
+
+def run_size(points, args):
+    """Generate (or reuse) the synthetic run of this size and benchmark it in a child process"""
+    test_name = f'synthetic_{points}'
+    paths = {
+        'k6_results': os.path.join(args.work_dir, f'{test_name}_results.json'),
+        'hpa_data': os.path.join(args.work_dir, f'hpa_scaling_{test_name}.csv'),
+        'resource_metrics': os.path.join(args.work_dir, f'resource_metrics_{test_name}.csv'),
+    }
+    generate_seconds = None
+    if args.regenerate or not all(os.path.exists(path) for path in paths.values()):
+        print(f"🧪 Generating {points:,} points...")
+        started = time.perf_counter()
+        generate_run(args.work_dir, test_name, parse_stage_profile(args.load_script), points, seed=args.seed)
+        generate_seconds = time.perf_counter() - started
+    
+    # Compressed input: the plain file is kept so both paths can be benchmarked from one generation
+    if args.compression:
+        compressed = paths['k6_results'] + SUFFIXES[args.compression]
+        if args.regenerate or generate_seconds is not None or not os.path.exists(compressed):
+            print(f"🗜️  Compressing with {args.compression}...")
+            compress_file(paths['k6_results'], args.compression, verify=False)
+        paths['k6_results'] = compressed
+
+    # A fresh process per size keeps peak RSS and import state from leaking between sizes
+    command = [sys.executable, os.path.abspath(__file__), '--measure', json.dumps(paths),
+               '--work-dir', args.work_dir, '--workers', str(args.workers), '--plot-formats', args.plot_formats,
+               '--load-script', args.load_script]
+    if args.no_plots:
+        command.append('--no-plots')
+    child = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if child.returncode != 0:
+        print(child.stderr, file=sys.stderr)
+        raise RuntimeError(f"Benchmark of {points:,} points failed with status {child.returncode}")
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+    result.update({'points': points, 'generate_seconds': generate_seconds, 'compression': args.compression})
+    return result
+
+def print_result(result):
+    """Console summary of one benchmarked size"""
+    print(f"\n📊 {result['points']:,} points ({result['input_mb']:,.0f} MB): "
+          f"{result['parse_lines_per_second']:,.0f} lines/s, {result['bytes_per_sample']:.0f} bytes/sample, "
+          f"peak RSS {result['peak_rss_mb']:,.0f} MB, total {result['total_seconds']:.1f}s")
+    for stage in result['stages']:
+        print(f"   {stage['stage']:<22} {stage['wall_s']:8.2f}s  cpu {stage['cpu_s']:7.2f}s  "
+              f"peak RSS {stage['peak_rss_mb']:8.0f} MB (+{stage['rss_growth_mb']:.0f})")
+
+def save_results(results, output_path):
+    """Write the benchmark as JSON plus a flat per-stage CSV next to it"""
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'python': sys.version.split()[0],
+                   'results': results}, f, indent=2)
+
+    csv_path = os.path.splitext(output_path)[0] + '.csv'
+    with open(csv_path, 'w') as f:
+        f.write('points,stage,wall_s,cpu_s,peak_rss_mb,rss_growth_mb,rows,parse_lines_per_second,bytes_per_sample\n')
+        for result in results:
+            for stage in result['stages']:
+                rows = '' if stage['rows'] is None else stage['rows']
+                f.write(f"{result['points']},{stage['stage']},{stage['wall_s']:.4f},{stage['cpu_s']:.4f},"
+                        f"{stage['peak_rss_mb']:.1f},{stage['rss_growth_mb']:.1f},{rows},"
+                        f"{result['parse_lines_per_second']:.0f},{result['bytes_per_sample']:.1f}\n")
+    return csv_path
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Nova analysis pipeline on synthetic runs')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='Comma-separated point counts to benchmark (1e5 - 1e8)')
+    parser.add_argument('--work-dir', default='performance-tests/benchmark',
+                        help='Where generated runs and analysis outputs are kept (reused between benchmarks)')
+    parser.add_argument('--output', help='Benchmark JSON to write (default <work-dir>/benchmark_<timestamp>.json)')
+    parser.add_argument('--load-script', default=os.path.join(HERE, 'nova-load-test.js'),
+                        help='k6 script whose options.stages shapes the synthetic load')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to parse the k6 point stream')
+    parser.add_argument('--no-plots', action='store_true', help='Skip the plotting stages')
+    parser.add_argument('--plot-formats', default='png', help='Comma-separated figure formats to render')
+    parser.add_argument('--regenerate', action='store_true', help='Regenerate synthetic runs that already exist')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the generator')
+    parser.add_argument('--compression', choices=tuple(SUFFIXES),
+                        help='Benchmark the analyzer on a gzip/zstd-compressed copy of each run')
+    parser.add_argument('--measure', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    plot_formats = () if args.no_plots else tuple(fmt.strip() for fmt in args.plot_formats.split(',') if fmt.strip())
+
+    # Child mode: benchmark one run and print the result as the last stdout line
+    if args.measure:
+        paths = json.loads(args.measure)
+        output_dir = os.path.join(args.work_dir, 'analysis_' + os.path.basename(paths['k6_results']).split('_results')[0])
+        os.makedirs(output_dir, exist_ok=True)
+        with redirect_stdout(sys.stderr):
+            result = measure(paths, output_dir, args.workers, plot_formats, args.load_script)
+        print(json.dumps(result))
+        return
+
+    print("🚀 Starting Nova Analyzer Benchmark")
+    print("=" * 50)
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    results = []
+    for size in args.sizes.split(','):
+        result = run_size(point_count(size.strip()), args)
+        print_result(result)
+        results.append(result)
+
+    output_path = args.output or os.path.join(args.work_dir, f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json")
+    csv_path = save_results(results, output_path)
+    print(f"\n💾 Saved {output_path} and {csv_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova Performance Test Run Comparison
+Compares one or more candidate runs against a baseline and gates on significant regressions
+"""
+
+import argparse
+import glob
+
+from nova_perf import run_cache
+from nova_perf.compare import DEFAULT_THRESHOLDS, REGRESSION_EXIT_CODE, compare_runs, prepare_run
+from nova_perf.k6_stream import read_k6_points
+from nova_perf.lazy import pandas
+from nova_perf.rollup import RollupIndex, load_rollup
+from nova_perf.stages import parse_stage_profile
+
+def resolve_results(run):
+    """Accept a k6 point file, its _rollup.npz index or an analysis_<TEST_NAME> directory next to its results"""
+    if os.path.isdir(run):
+        name = os.path.basename(os.path.normpath(run))
+        test_name = name[len('analysis_'):] if name.startswith('analysis_') else name
+        parent = os.path.dirname(os.path.normpath(run))
+        candidates = (glob.glob(os.path.join(parent, f'{test_name}_results.json*'))
+                      or glob.glob(os.path.join(parent, f'{test_name}_rollup.npz')))
+        if not candidates:
+            raise FileNotFoundError(f"No {test_name}_results.json next to {run}")
+        return sorted(candidates)[0]
+    return run
+
+def load_run(run, workers=1, use_cache=True):
+    """Load the rollup index of one run, building it from the k6 points on first use"""
+    results_file = resolve_results(run)
+    if results_file.endswith('_rollup.npz'):
+        index = RollupIndex.load(results_file)
+        print(f"📊 {os.path.basename(results_file)}: {index.n_groups} groups (rollup index)")
+        return index
+
+    def read_points():
+        if use_cache:
+            return run_cache.load_points(results_file, lambda path: read_k6_points(path, workers=workers))[0]
+        return read_k6_points(results_file, workers=workers)
+
+    index, loaded = load_rollup(results_file, read_points)
+    source = "rollup index" if loaded else "parsed, rollup index written"
+    print(f"📊 {os.path.basename(results_file)}: {index.n_groups if index else 0} groups ({source})")
+    return index
+
+def format_delta(row):
+    """Delta and interval as percent (relative) or percentage points (error rate)"""
+    unit = '%' if row['relative'] else ' pp'
+    return (f"{row['delta'] * 100:+.1f}{unit} "
+            f"[{row['ci_low'] * 100:+.1f}, {row['ci_high'] * 100:+.1f}]")
+
+def format_value(row, value):
+    """Metric value for the console: error rates as percent, the rest as-is"""
+    return f"{value * 100:.2f}%" if row['metric'] == 'error_rate' else f"{value:.1f}"
+
+def print_comparison(name, rows, show_all=False):
+    """Console table of the deltas; only significant rows unless show_all"""
+    print(f"\n🔬 {name}")
+    shown = [row for row in rows if show_all or row['significant']]
+    if not shown:
+        print("   No statistically significant differences")
+        return
+    for row in shown:
+        marker = '❌' if row['regression'] else ('⚠️ ' if row['significant'] else '  ')
+        print(f"   {marker} {row['group']:<32} {row['metric']:<10} "
+              f"{format_value(row, row['baseline']):>10} → {format_value(row, row['candidate']):>10}  {format_delta(row)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare Nova performance test runs against a baseline')
+    parser.add_argument('baseline', help='Baseline k6 results file, its _rollup.npz index or its analysis_<TEST_NAME> directory')
+    parser.add_argument('candidates', nargs='+', help='Candidate runs to compare against the baseline')
+    parser.add_argument('--output-dir', help='Write comparison_<candidate>.csv files here')
+    parser.add_argument('--load-script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nova-load-test.js'),
+                        help='k6 script whose options.stages defines the per-stage comparison')
+    parser.add_argument('--n-boot', type=int, default=1000, help='Bootstrap replicates per metric')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence level of the intervals')
+    for metric, default in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--{metric.replace('_', '-')}-threshold", type=float, default=default,
+                            help=f'Gate on significant {metric} changes larger than this '
+                                 f'({"absolute" if metric == "error_rate" else "relative"}, default {default})')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used to parse uncached k6 point streams')
+    parser.add_argument('--no-cache', action='store_true', help='Always reparse inputs instead of using the columnar cache')
+    parser.add_argument('--all', action='store_true', help='Print every delta, not only the significant ones')
+
+    args = parser.parse_args()
+    thresholds = {metric: getattr(args, f'{metric}_threshold') for metric in DEFAULT_THRESHOLDS}
+
+    print("🚀 Starting Nova Performance Run Comparison")
+    print("=" * 50)
+
+    stages = parse_stage_profile(args.load_script) if os.path.exists(args.load_script) else None
+    baseline = prepare_run(load_run(args.baseline, args.workers, not args.no_cache), stages, args.n_boot, args.confidence)
+
+    regressions = 0
+    for candidate_run in args.candidates:
+        candidate = prepare_run(load_run(candidate_run, args.workers, not args.no_cache), stages,
+                                args.n_boot, args.confidence)
+        rows = compare_runs(baseline, candidate, args.n_boot, args.confidence, thresholds)
+        name = os.path.splitext(os.path.basename(os.path.normpath(candidate_run)))[0]
+        print_comparison(f"{name} vs {os.path.splitext(os.path.basename(os.path.normpath(args.baseline)))[0]}",
+                         rows, args.all)
+
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            csv_path = os.path.join(args.output_dir, f'comparison_{name}.csv')
+            pandas().DataFrame(rows).to_csv(csv_path, index=False)
+            print(f"   💾 Saved {csv_path}")
+        regressions += sum(row['regression'] for row in rows)
+
+    if regressions:
+        print(f"\n❌ {regressions} significant regression(s) beyond the configured thresholds")
+        sys.exit(REGRESSION_EXIT_CODE)
+    print("\n✅ No significant regressions beyond the configured thresholds")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova Results Compressor
+Recompresses the k6 point streams of finished runs (gzip or zstd); the analyzers read the
+compressed files directly
+"""
+
+import argparse
+import glob
+import time
+
+from nova_perf import run_cache
+from nova_perf.compression import DEFAULT_LEVELS, SUFFIXES, compress_file, compression_of, zstd_available
+
+def find_results(paths):
+    """Expand results directories into their plain *_results.json files"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found += sorted(glob.glob(os.path.join(path, '*_results.json')))
+        else:
+            found.append(path)
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description='Compress finished Nova k6 results files')
+    parser.add_argument('paths', nargs='+', help='k6 results files or directories holding *_results.json files')
+    parser.add_argument('--format', choices=tuple(SUFFIXES),
+                        help='Compression format (default zstd when the zstandard package is installed, else gzip)')
+    parser.add_argument('--level', type=int,
+                        help=f"Compression level (default {', '.join(f'{k} {v}' for k, v in DEFAULT_LEVELS.items())})")
+    parser.add_argument('--keep', action='store_true', help='Keep the uncompressed file next to the compressed one')
+    parser.add_argument('--no-verify', action='store_true',
+                        help='Skip decompressing the output again to check it before the original is removed')
+
+    args = parser.parse_args()
+    kind = args.format or ('zstd' if zstd_available() else 'gzip')
+    if args.no_verify and not args.keep:
+        parser.error('--no-verify needs --keep: originals are only removed after a verified compression')
+
+    files = find_results(args.paths)
+    if not files:
+        print("❌ No k6 results files found")
+        sys.exit(1)
+
+    print(f"🗜️  Compressing {len(files)} results file(s) with {kind}")
+    total_in = total_out = cache_freed = 0
+    for path in files:
+        if compression_of(path) is not None:
+            print(f"⏭️  {path} is already compressed")
+            continue
+        started = time.perf_counter()
+        output, size_in, size_out = compress_file(path, kind, args.level, verify=not args.no_verify)
+        if not args.keep:
+            os.remove(path)
+            # The parsed columns cached for the plain file are keyed to it; the compressed one gets its own
+            cache_freed += run_cache.drop_entries(path)
+        total_in += size_in
+        total_out += size_out
+        print(f"✅ {output}: {size_in / 1e6:,.1f} MB -> {size_out / 1e6:,.1f} MB "
+              f"({size_in / max(size_out, 1):.1f}x) in {time.perf_counter() - started:.1f}s")
+
+    if total_out:
+        print(f"💾 {total_in / 1e6:,.1f} MB -> {total_out / 1e6:,.1f} MB ({total_in / total_out:.1f}x)"
+              f"{'' if args.keep else ', originals removed'}")
+    if cache_freed:
+        print(f"🧹 Removed {cache_freed / 1e6:,.1f} MB of analysis cache built from the originals")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova Synthetic Test Run Generator
+Writes a realistic k6 point stream plus HPA/resource CSVs for benchmarking the analyzer offline
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from nova_perf.stages import parse_stage_profile
+from nova_perf.synthetic import generate_run, vu_scale
+
+def point_count(text):
+    """Accept point counts like 1000000, 1e6 or 1_000_000"""
+    return int(float(text.replace('_', '')))
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Nova performance test run')
+    parser.add_argument('--points', type=point_count, default=1_000_000,
+                        help='Approximate number of k6 points to write (1e5 - 1e8)')
+    parser.add_argument('--output-dir', default='performance-tests/results', help='Directory for the generated files')
+    parser.add_argument('--test-name', help='Run name used in the file names (default synthetic_<points>)')
+    parser.add_argument('--load-script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nova-load-test.js'),
+                        help='k6 script whose options.stages shapes the load')
+    parser.add_argument('--knee-vus', type=float, default=1000, help='VU level past which latency starts to degrade')
+    parser.add_argument('--degradation', type=float, default=8.0,
+                        help='Latency growth past the knee (x(1 + d) at twice the knee VUs)')
+    parser.add_argument('--error-rate', type=float, default=0.002, help='Background request failure probability')
+    parser.add_argument('--bursts', type=int, default=3, help='Number of error bursts')
+    parser.add_argument('--burst-seconds', type=int, default=20, help='Length of each error burst')
+    parser.add_argument('--burst-error-rate', type=float, default=0.3, help='Failure probability inside a burst')
+    parser.add_argument('--no-vu-tags', action='store_true',
+                        help="Leave the `vu` tag off the points, like a script without 'vu' in options.systemTags")
+    parser.add_argument('--start', help='Run start as ISO 8601 (default now, local time zone)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+    args = parser.parse_args()
+
+    stages = parse_stage_profile(args.load_script)
+    if not stages:
+        print(f"❌ No options.stages found in {args.load_script}")
+        sys.exit(1)
+    start = datetime.fromisoformat(args.start).astimezone() if args.start else None
+    test_name = args.test_name or f'synthetic_{args.points}'
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print("🧪 Generating synthetic Nova test run")
+    # The VUs keep the script's request rate, so the point budget sets how many of them there are
+    scale = vu_scale(stages, args.points, args.knee_vus, args.degradation)
+    print(f"📈 {len(stages)} stages, {sum(duration for duration, _ in stages) / 60:.0f} minutes, "
+          f"peak {max(target for _, target in stages) * scale:,.0f} VUs, knee at {args.knee_vus * scale:,.0f} VUs "
+          f"(the load script's VUs x{scale:.3g} to fit ~{args.points:,} points)")
+
+    started = time.perf_counter()
+    paths = generate_run(args.output_dir, test_name, stages, args.points, start=start, seed=args.seed,
+                         knee_vus=args.knee_vus, degradation=args.degradation, error_rate=args.error_rate,
+                         bursts=args.bursts, burst_seconds=args.burst_seconds,
+                         burst_error_rate=args.burst_error_rate, vu_tags=not args.no_vu_tags)
+    elapsed = time.perf_counter() - started
+
+    size = os.path.getsize(paths['k6_results'])
+    print(f"✅ Wrote ~{args.points:,} points ({size / 1e6:,.1f} MB) in {elapsed:.1f}s")
+    for label, path in paths.items():
+        print(f"   {label}: {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova HPA What-If Simulator
+Replays a recorded run against the HPA policies of k8s/hpa-autoscaling.yaml (or a sweep of
+variants of them) and ranks the variants by how far they push the latency knee out
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from nova_perf import run_cache
+from nova_perf.hpa_sim import (KNEE_FACTOR, PARAMETERS, expand_sweep, fit_costs, load_deployment_resources,
+                               load_hpa_policies, load_profile, replica_error, scale_profile, simulate)
+from nova_perf.k6_stream import read_k6_points
+from nova_perf.lazy import pandas
+from nova_perf.rollup import RollupIndex, load_rollup
+
+K8S_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'k8s')
+
+def open_index(run, rebuild=False):
+    """Rollup index of a results file (built on first use) or an existing _rollup.npz"""
+    if run.endswith('_rollup.npz'):
+        return RollupIndex.load(run)
+    index, loaded = load_rollup(run, lambda: run_cache.load_points(run, read_k6_points)[0], rebuild)
+    print(f"🗂️  {'Loaded' if loaded else 'Built'} rollup index of {run}")
+    return index
+
+def read_monitor_csv(path):
+    pd = pandas()
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
+def format_knee(summary, lane):
+    if np.isnan(summary['knee_s'][lane]):
+        return 'no knee within the run'
+    return f"{summary['knee_vus'][lane]:,.0f} VUs (t+{summary['knee_s'][lane] / 60:.1f}m)"
+
+def lane_table(summary, labels, services):
+    """One row per lane: the swept settings, then the predicted outcome"""
+    pd = pandas()
+    rows = pd.DataFrame(labels)
+    for column in ('knee_vus', 'knee_s', 'mean_latency_ms', 'p95_latency_ms', 'overloaded_s', 'pod_hours'):
+        rows[column] = summary[column]
+    for service in services:
+        rows[f'{service}_max_replicas'] = summary[f'{service}_max_replicas']
+    rows.insert(0, 'lane', np.arange(len(labels)))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded run against HPA policy variants')
+    parser.add_argument('run', help='k6 results file (its rollup index is built on first use) or a _rollup.npz index')
+    parser.add_argument('--resource-metrics', help='resource_metrics CSV of the run; fits CPU per request and idle usage')
+    parser.add_argument('--hpa-data', help='hpa_scaling CSV of the run; the configured policy is checked against it')
+    parser.add_argument('--hpa-config', default=os.path.join(K8S_DIR, 'hpa-autoscaling.yaml'),
+                        help='HorizontalPodAutoscaler manifest the variants start from')
+    parser.add_argument('--k8s-dir', default=K8S_DIR, help='Directory of the Deployment manifests (CPU requests and limits)')
+    parser.add_argument('--sweep', nargs='+', action='extend', default=[], metavar='PARAM=VALUES',
+                        help=f"Policy grid, e.g. cpu_target=50:80:10 max=10,15 auth-svc.up_window=0,60 "
+                             f"(parameters: {', '.join(PARAMETERS)})")
+    parser.add_argument('--load-scale', type=float, default=1.0, help='Multiply the recorded request rate and VUs')
+    parser.add_argument('--top', type=int, default=10, help='Variants to print')
+    parser.add_argument('--output', help='Write every variant and its prediction to this CSV')
+    parser.add_argument('--utc-offset', type=int, metavar='MINUTES',
+                        help='UTC offset of the monitoring CSV timestamps (default: this machine\'s)')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the rollup index from the raw results')
+
+    args = parser.parse_args()
+    index = open_index(args.run, args.rebuild)
+    if index is None:
+        print("❌ The run has no request samples")
+        sys.exit(1)
+
+    policies = load_hpa_policies(args.hpa_config)
+    resources = load_deployment_resources(args.k8s_dir)
+    missing = sorted(set(policies) - set(resources))
+    if missing:
+        print(f"⚠️  No Deployment resources for {', '.join(missing)} in {args.k8s_dir} - not simulated")
+    try:
+        lanes, labels = expand_sweep({service: policy for service, policy in policies.items() if service in resources},
+                                     args.sweep)
+    except ValueError as e:
+        parser.error(str(e))
+
+    profile = load_profile(index)
+    resource_df = read_monitor_csv(args.resource_metrics) if args.resource_metrics else None
+    # Costs are fitted to the load that was recorded, then the load is scaled
+    costs = fit_costs(resource_df, profile, args.utc_offset)
+    if args.load_scale != 1.0:
+        profile = scale_profile(profile, args.load_scale)
+
+    print(f"🧮 Per-service costs ({profile['seconds']:,}s of load, peak {profile['vus'].max():,.0f} VUs):")
+    for service in lanes:
+        cost, resource = costs[service], resources[service]
+        source = f"fitted to {cost['samples']} samples" if cost['fitted'] else 'defaults'
+        print(f"   {service:<18} {cost['cpu_ms']:6.2f} CPU ms/request, idle {cost['idle_mc']:5.1f}m/pod, "
+              f"request {resource['request_mc']:.0f}m, limit {resource['limit_mc']:.0f}m ({source})")
+
+    started = time.perf_counter()
+    result = simulate(profile, costs, resources, lanes)
+    elapsed = time.perf_counter() - started
+    summary = result['summary']
+    print(f"⚡ Simulated {len(labels)} variant(s) x {len(lanes)} services in {elapsed:.2f}s")
+
+    print("")
+    print(f"📋 As configured ({os.path.basename(args.hpa_config)}): knee {format_knee(summary, 0)}, "
+          f"mean latency {summary['mean_latency_ms'][0]:.1f} ms, {summary['pod_hours'][0]:.1f} pod-hours")
+    errors = replica_error(result, read_monitor_csv(args.hpa_data), profile, 0, args.utc_offset) if args.hpa_data else {}
+    for service in lanes:
+        sim = result['services'][service]
+        line = (f"   {service:<18} replicas {sim['spec'][0].min():.0f}-{sim['spec'][0].max():.0f}, "
+                f"peak CPU {sim['cpu_percent'][0].max():.0f}% of request, peak queueing {sim['wait_ms'][0].max():,.0f} ms")
+        if service in errors:
+            mae, recorded_max, simulated_max = errors[service]
+            line += f" | recorded max {recorded_max:.0f} replicas, off by {mae:.2f} on average"
+        print(line)
+
+    if len(labels) > 1:
+        table = lane_table(summary, labels, list(lanes))
+        # No knee within the run beats any knee; ties go to the cheaper variant
+        table['_knee'] = table['knee_vus'].fillna(np.inf)
+        ranked = table.sort_values(['_knee', 'pod_hours'], ascending=[False, True]).drop(columns='_knee')
+        print("")
+        print(f"🏆 Top {min(args.top, len(ranked))} of {len(labels) - 1} variants and the configured policy by knee "
+              f"(latency above {KNEE_FACTOR:g}x its no-queueing value), then pod-hours:")
+        swept = [column for column in ranked.columns if column in labels[-1]]
+        for _, row in ranked.head(args.top).iterrows():
+            settings = ', '.join(f"{column}={row[column]:g}" for column in swept if not np.isnan(row[column]))
+            settings = settings or 'as configured'
+            lane = int(row['lane'])
+            print(f"   {settings:<48} knee {format_knee(summary, lane):<28} "
+                  f"mean {row['mean_latency_ms']:7.1f} ms  p95 {row['p95_latency_ms']:7.1f} ms  "
+                  f"{row['pod_hours']:6.1f} pod-h  overloaded {row['overloaded_s']:,.0f}s")
+        if args.output:
+            table.drop(columns='_knee').to_csv(args.output, index=False)
+            print(f"💾 All variants written to {args.output}")
+
+if __name__ == "__main__":
+    main()
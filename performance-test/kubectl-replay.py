@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Stub kubectl that replays recorded responses
+Serves the files saved by `monitor-scaling.py --record DIR` in order, one per call and
+resource, from the directory in KUBECTL_REPLAY_DIR; the last response repeats once the
+recording runs out. Delete the .cursor files to start over.
+
+    KUBECTL_REPLAY_DIR=recording ./monitor-scaling.py --kubectl ./kubectl-replay.py --interval 1
+"""
+
+import glob
+
+from nova_perf.sampler import resource_key
+
+def main():
+    replay_dir = os.environ.get('KUBECTL_REPLAY_DIR')
+    if not replay_dir:
+        print("error: KUBECTL_REPLAY_DIR is not set", file=sys.stderr)
+        sys.exit(1)
+
+    directory = os.path.join(replay_dir, resource_key(sys.argv[1:]))
+    responses = sorted(glob.glob(os.path.join(directory, '*.json')))
+    if not responses:
+        print(f"error: no recorded responses in {directory}", file=sys.stderr)
+        sys.exit(1)
+
+    cursor_path = os.path.join(directory, '.cursor')
+    position = 0
+    if os.path.exists(cursor_path):
+        with open(cursor_path, 'r') as f:
+            position = int(f.read().strip() or 0)
+    with open(cursor_path, 'w') as f:
+        f.write(str(position + 1))
+
+    with open(responses[min(position, len(responses) - 1)], 'rb') as f:
+        sys.stdout.buffer.write(f.read())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova Mock Gateway
+Serves the routes nova-load-test.js calls on a local port with a service-time and database
+connection-pool model, so the load test and the analyzers can run without the GKE cluster
+"""
+
+import argparse
+
+from nova_perf import run_cache
+from nova_perf.k6_stream import read_k6_points
+from nova_perf.mock_gateway import (DEFAULT_HOST, DEFAULT_PORT, STATUS_INTERVAL_S, default_model, fit_model,
+                                    load_model, run_gateway, save_model)
+from nova_perf.rollup import RollupIndex, load_rollup
+
+def model_from_run(run, rebuild=False):
+    """Service-time model fitted to a results file (its rollup index is built on first use) or a _rollup.npz"""
+    if run.endswith('_rollup.npz'):
+        index = RollupIndex.load(run)
+    else:
+        index, loaded = load_rollup(run, lambda: run_cache.load_points(run, read_k6_points)[0], rebuild)
+        print(f"🗂️  {'Loaded' if loaded else 'Built'} rollup index of {run}")
+    if index is None:
+        print(f"❌ {run} has no request samples to fit the model to")
+        sys.exit(1)
+    return fit_model(index)
+
+def print_model(model):
+    print(f"🧮 Service-time model ({model.get('source', 'defaults')}):")
+    for key, route in model['routes'].items():
+        print(f"   {key:<26} median {route['median_ms']:8.1f} ms  sigma {route['sigma']:.2f}"
+              f"{'  [database]' if route['db'] else ''}")
+    note = ''
+    if 'saturated' in model:
+        note = (f" (run peaked at {model['peak_db_rps']:,.1f} database RPS"
+                f"{'' if model['saturated'] else ' without queueing, so the pool is a lower bound with headroom'})")
+    print(f"   Connection pool: {model['pool_size']} connections, {model['pool_timeout_s']:g}s acquire timeout{note}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Nova API gateway')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on (0 picks a free port)')
+    parser.add_argument('--from-run', metavar='RUN',
+                        help='Fit the model to a recorded run: k6 results file or its _rollup.npz index')
+    parser.add_argument('--model', help='Model JSON written by --save-model')
+    parser.add_argument('--save-model', metavar='PATH', help='Write the model as JSON (and keep serving)')
+    parser.add_argument('--pool-size', type=int, help='Database connections (overrides the model)')
+    parser.add_argument('--pool-timeout', type=float, help='Seconds a request waits for a connection before a 503')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='Multiply every service time by this')
+    parser.add_argument('--seed', type=int, help='Seed of the service-time sampling')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds instead of waiting for Ctrl+C')
+    parser.add_argument('--status-interval', type=float, default=STATUS_INTERVAL_S,
+                        help='Seconds between console status lines (0 disables them)')
+    parser.add_argument('--rebuild', action='store_true', help='With --from-run, rebuild the rollup index')
+
+    args = parser.parse_args()
+    if args.from_run and args.model:
+        parser.error('use either --from-run or --model')
+    if args.pool_size is not None and args.pool_size < 1:
+        parser.error('--pool-size must be at least 1')
+
+    if args.from_run:
+        model = model_from_run(args.from_run, args.rebuild)
+    elif args.model:
+        model = load_model(args.model)
+    else:
+        model = default_model()
+    if args.pool_size is not None:
+        model['pool_size'] = args.pool_size
+    if args.pool_timeout is not None:
+        model['pool_timeout_s'] = args.pool_timeout
+    print_model(model)
+    if args.save_model:
+        print(f"💾 Model saved to {save_model(model, args.save_model)}")
+
+    stats = run_gateway(model, host=args.host, port=args.port, latency_scale=args.latency_scale, seed=args.seed,
+                        duration=args.duration, status_interval=args.status_interval)
+
+    print("")
+    print("🛑 Mock gateway stopped")
+    if stats is not None:
+        served = sum(stats['requests'].values())
+        print(f"📊 {served:,} requests in {stats['seconds']:.0f}s ({served / max(stats['seconds'], 1e-9):.1f}/s), "
+              f"{stats['rejected']:,} rejected for lack of a database connection")
+        for key, count in sorted(stats['requests'].items(), key=lambda item: -item[1]):
+            print(f"   {key:<26} {count:>9,}")
+        print(f"   Pool peak: {stats['peak_in_use']} connections busy, {stats['peak_waiting']} requests waiting")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova HPA Scaling Monitor
+Samples HPA status and pod resource usage into the CSVs the analyzers read
+"""
+
+import argparse
+from datetime import datetime
+
+from nova_perf.sampler import DEFAULT_INTERVAL_S, NAMESPACE, STATUS_INTERVAL_S, run_sampler
+
+def main():
+    parser = argparse.ArgumentParser(description='Monitor Nova HPA scaling and pod resource usage')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL_S,
+                        help='Seconds between samples (sub-second values are allowed)')
+    parser.add_argument('--output-dir', default='performance-tests/results', help='Directory for the CSV files')
+    parser.add_argument('--timestamp', default=datetime.now().strftime('%Y%m%d_%H%M%S'),
+                        help='Suffix of hpa_scaling_<timestamp>.csv and resource_metrics_<timestamp>.csv')
+    parser.add_argument('--namespace', default=NAMESPACE, help='Namespace of the HPAs and pods')
+    parser.add_argument('--kubectl', default=os.environ.get('KUBECTL', 'kubectl'),
+                        help='kubectl executable, e.g. kubectl-replay.py to replay recorded responses (env KUBECTL)')
+    parser.add_argument('--status-interval', type=float, default=STATUS_INTERVAL_S,
+                        help='Seconds between console status summaries (0 disables them)')
+    parser.add_argument('--duration', type=float, help='Stop after this many seconds instead of waiting for Ctrl+C')
+    parser.add_argument('--record', metavar='DIR',
+                        help='Also save every kubectl response under DIR/<resource>/ for kubectl-replay.py')
+
+    args = parser.parse_args()
+    if args.interval <= 0:
+        parser.error('--interval must be positive')
+
+    hpa_path = os.path.join(args.output_dir, f'hpa_scaling_{args.timestamp}.csv')
+    resource_path = os.path.join(args.output_dir, f'resource_metrics_{args.timestamp}.csv')
+
+    print("🔍 Starting HPA Scaling Monitor for Nova Performance Test")
+    print("========================================================")
+    print("📊 Monitoring data will be saved to:")
+    print(f"   HPA Data: {hpa_path}")
+    print(f"   Resource Data: {resource_path}")
+    print(f"🚀 Collecting data every {args.interval:g} seconds (started {datetime.now():%Y-%m-%d %H:%M:%S})", flush=True)
+
+    stats = run_sampler(hpa_path, resource_path, kubectl=args.kubectl, namespace=args.namespace,
+                        interval=args.interval, status_interval=args.status_interval, duration=args.duration,
+                        record_dir=args.record)
+
+    print("")
+    print("🛑 Stopping HPA monitoring...")
+    if stats is not None:
+        print("📊 Final data summary:")
+        print(f"   HPA records: {stats['rows']['HPA']}")
+        print(f"   Resource records: {stats['rows']['Metrics']}")
+        print(f"   Ticks: {stats['ticks']} ({stats['skipped_ticks']} skipped), "
+              f"start lag mean {stats['mean_late_s'] * 1000:.1f} ms, max {stats['max_late_s'] * 1000:.1f} ms")
+        if stats['kubectl_failures']:
+            print(f"   Failed kubectl calls: {stats['kubectl_failures']}")
+    print("")
+    print("📁 Results saved to:")
+    print(f"   {hpa_path}")
+    print(f"   {resource_path}")
+    print("")
+    print("🔍 Use these files for knee graph analysis!")
+
+if __name__ == "__main__":
+    main()
@@ -37,14 +37,18 @@ export let options = {
     // Ramp-down: 2000 to 0 users over 3 minutes
     { duration: '3m', target: 0 },
   ],
+  // k6's default system tags plus `vu`, so analyze-results.py can rebuild every VU's intended
+  // request schedule and correct the latencies for coordinated omission
+  systemTags: ['proto', 'subproto', 'status', 'method', 'url', 'name', 'group', 'check', 'error',
+               'error_code', 'tls_version', 'scenario', 'service', 'expected_response', 'vu'],
   thresholds: {
     http_req_duration: ['p(95)<5000'], // 95% of requests must complete below 5s
     http_req_failed: ['rate<0.1'],     // Error rate must be below 10%
   },
 };
 
-// Test configuration
-const BASE_URL = 'https://34-49-196-23.nip.io';
+// Test configuration (k6 run -e BASE_URL=http://127.0.0.1:8080 targets mock-gateway.py instead)
+const BASE_URL = __ENV.BASE_URL || 'https://34-49-196-23.nip.io';
 const API_URL = `${BASE_URL}/api`;
 
 // Test data for realistic scenarios
@@ -0,0 +1,4 @@
+"""
+Nova performance analysis helpers
+Shared building blocks for the analyze-results scripts
+"""
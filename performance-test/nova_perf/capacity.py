@@ -0,0 +1,183 @@
+"""
+Capacity model of the measured throughput vs concurrency curve
+Fits the Universal Scalability Law X(N) = lambda N / (1 + sigma (N - 1) + kappa N (N - 1)) by weighted
+nonlinear least squares (vectorized grid search refined with Levenberg-Marquardt) and derives the
+predicted peak, Little's-law think time and how far more replicas are projected to move the peak
+"""
+
+import numpy as np
+
+# Search grid of the contention (sigma) and coherency (kappa) coefficients; 0 is always included
+SIGMA_GRID = np.concatenate([[0.0], np.logspace(-4, 0, 49)])
+KAPPA_GRID = np.concatenate([[0.0], np.logspace(-9, -1, 65)])
+
+LM_ITERATIONS = 100
+
+# Share of the peak the planning load keeps in reserve
+PLANNING_HEADROOM = 0.8
+
+
+def usl_throughput(n, lam, sigma, kappa):
+    """Throughput the USL predicts at concurrency n"""
+    n = np.asarray(n, dtype=np.float64)
+    return lam * n / (1 + sigma * (n - 1) + kappa * n * (n - 1))
+
+
+def usl_peak(lam, sigma, kappa):
+    """(concurrency, throughput) of the USL maximum; infinite concurrency when kappa == 0"""
+    if kappa > 0:
+        peak_n = np.sqrt(max(1 - sigma, 0.0) / kappa)
+        peak_n = max(peak_n, 1.0)
+        return float(peak_n), float(usl_throughput(peak_n, lam, sigma, kappa))
+    # No coherency cost: throughput approaches lambda / sigma (Amdahl) or grows without bound
+    return float('inf'), float(lam / sigma) if sigma > 0 else float('inf')
+
+
+def _grid_start(n, x, w):
+    """Best (lambda, sigma, kappa) on the coefficient grid; lambda is solved in closed form per cell"""
+    shape = n * (n - 1)
+    g = n / (1 + SIGMA_GRID[:, None, None] * (n - 1) + KAPPA_GRID[None, :, None] * shape)
+    lam = (w * x * g).sum(axis=2) / (w * g * g).sum(axis=2)
+    sse = (w * (x - lam[..., None] * g) ** 2).sum(axis=2)
+    i, j = np.unravel_index(np.argmin(sse), sse.shape)
+    return np.array([lam[i, j], SIGMA_GRID[i], KAPPA_GRID[j]])
+
+
+def _refine(params, n, x, w):
+    """Levenberg-Marquardt on the weighted residuals, keeping sigma in [0, 1] and kappa >= 0"""
+    shape = n * (n - 1)
+    root_w = np.sqrt(w)
+
+    def sse(p):
+        return float((w * (usl_throughput(n, *p) - x) ** 2).sum())
+
+    current, damping = sse(params), 1e-3
+    for _ in range(LM_ITERATIONS):
+        lam, sigma, kappa = params
+        denominator = 1 + sigma * (n - 1) + kappa * shape
+        jacobian = root_w[:, None] * np.column_stack([
+            n / denominator,
+            -lam * n * (n - 1) / denominator ** 2,
+            -lam * n * shape / denominator ** 2,
+        ])
+        residual = root_w * (usl_throughput(n, *params) - x)
+        normal = jacobian.T @ jacobian
+        gradient = jacobian.T @ residual
+        step = np.linalg.lstsq(normal + damping * np.diag(np.diag(normal) + 1e-12), -gradient, rcond=None)[0]
+        candidate = np.array([max(params[0] + step[0], 1e-12), np.clip(params[1] + step[1], 0, 1),
+                              max(params[2] + step[2], 0.0)])
+        value = sse(candidate)
+        if value < current:
+            improvement = (current - value) / max(current, 1e-300)
+            params, current, damping = candidate, value, damping / 10
+            if improvement < 1e-12:
+                break
+        else:
+            damping *= 10
+            if damping > 1e12:
+                break
+    return params, current
+
+
+def fit_usl(n, x, weights=None):
+    """Weighted USL fit of throughput x at concurrency n; None with fewer than 3 usable levels"""
+    n, x = np.asarray(n, dtype=np.float64), np.asarray(x, dtype=np.float64)
+    w = np.ones(len(n)) if weights is None else np.asarray(weights, dtype=np.float64)
+    usable = (n >= 1) & np.isfinite(x) & (x > 0) & (w > 0)
+    if usable.sum() < 3:
+        return None
+    n, x, w = n[usable], x[usable], w[usable] / w[usable].mean()
+
+    params, sse = _refine(_grid_start(n, x, w), n, x, w)
+    lam, sigma, kappa = (float(value) for value in params)
+    mean = (w * x).sum() / w.sum()
+    total = (w * (x - mean) ** 2).sum()
+    peak_n, peak_x = usl_peak(lam, sigma, kappa)
+    return {
+        'lambda': lam,
+        'sigma': sigma,
+        'kappa': kappa,
+        'r2': float(1 - sse / total) if total > 0 else float('nan'),
+        'peak_users': peak_n,
+        'peak_rps': peak_x,
+        'max_tested_users': float(n.max()),
+        'levels': len(n),
+    }
+
+
+def bottleneck(fit):
+    """Which USL term costs more at the highest tested concurrency: 'contention', 'coherency' or 'none'"""
+    n = fit['max_tested_users']
+    contention, coherency = fit['sigma'] * (n - 1), fit['kappa'] * n * (n - 1)
+    if contention == 0 and coherency == 0:
+        return 'none'
+    return 'contention' if contention >= coherency else 'coherency'
+
+
+def littles_law(n, x, latency_ms, weights=None):
+    """Think time per request from N = X (R + Z), and the requests in flight (X R) per level"""
+    n, x = np.asarray(n, dtype=np.float64), np.asarray(x, dtype=np.float64)
+    latency_s = np.asarray(latency_ms, dtype=np.float64) / 1000
+    with np.errstate(divide='ignore', invalid='ignore'):
+        think = n / x - latency_s
+    usable = np.isfinite(think) & (x > 0)
+    if not usable.any():
+        return None
+    w = np.ones(len(n)) if weights is None else np.asarray(weights, dtype=np.float64)
+    order = np.argsort(think[usable])
+    cumulative = np.cumsum(w[usable][order])
+    median = think[usable][order][np.searchsorted(cumulative, cumulative[-1] / 2)]
+    return {'think_time_s': float(median), 'in_flight': x * latency_s}
+
+
+def project_replicas(fit, factor):
+    """USL peak with `factor` times the replicas
+
+    Contention (sigma) is taken to be shared between replicas (database, connection pool) and
+    coherency (kappa) to be per replica, so more replicas divide kappa but leave sigma alone.
+    """
+    peak_n, peak_x = usl_peak(fit['lambda'], fit['sigma'], fit['kappa'] / factor)
+    return {'factor': float(factor), 'peak_users': peak_n, 'peak_rps': peak_x,
+            'gain': peak_x / fit['peak_rps'] - 1 if np.isfinite(fit['peak_rps']) else float('nan')}
+
+
+def replica_projections(fit, hpa_summary):
+    """Projected peak per HPA service at its configured maxReplicas and at twice that
+
+    gain_doubled compares the two projections, not the doubled one with the measured peak.
+    """
+    rows = []
+    for service, data in (hpa_summary or {}).items():
+        reached = float(data.get('max_replicas_reached') or 0)
+        configured = float(data.get('max_replicas_configured') or 0)
+        if reached <= 0 or configured <= 0:
+            continue
+        at_max = project_replicas(fit, max(configured / reached, 1.0))
+        doubled = project_replicas(fit, 2 * configured / reached)
+        rows.append({
+            'service': service,
+            'replicas_reached': int(reached),
+            'replicas_max': int(configured),
+            'at_max_replicas': reached >= configured,
+            'peak_rps_at_max': at_max['peak_rps'],
+            'peak_users_at_max': at_max['peak_users'],
+            'peak_rps_doubled': doubled['peak_rps'],
+            'peak_users_doubled': doubled['peak_users'],
+            # Doubling the configured maxReplicas, so against the peak at maxReplicas
+            'gain_doubled': (doubled['peak_rps'] / at_max['peak_rps'] - 1
+                             if np.isfinite(at_max['peak_rps']) and at_max['peak_rps'] > 0 else float('nan')),
+        })
+    return rows
+
+
+def capacity_model(curve, hpa_summary=None):
+    """USL fit, Little's-law figures and replica projections of a concurrency curve"""
+    fit = fit_usl(curve['vus'], curve['rps'], curve['requests'])
+    if fit is None:
+        return None
+    fit['bottleneck'] = bottleneck(fit)
+    fit['fitted_rps'] = usl_throughput(curve['vus'], fit['lambda'], fit['sigma'], fit['kappa'])
+    fit['littles_law'] = littles_law(curve['vus'], curve['rps'], curve['avg'], curve['requests'])
+    fit['planning_users'] = PLANNING_HEADROOM * fit['peak_users']
+    fit['replicas'] = replica_projections(fit, hpa_summary)
+    return fit
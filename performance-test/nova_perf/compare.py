@@ -0,0 +1,240 @@
+"""
+Regression comparison between test runs
+Per-stage and per-endpoint percentile, throughput and error-rate deltas with bootstrap
+confidence intervals; a delta only counts as a regression when its interval excludes zero.
+Runs are read from their rollup indexes (nova_perf.rollup), not from the raw samples
+"""
+
+import numpy as np
+
+from nova_perf.endpoints import endpoint_path
+from nova_perf.knee import detect_knee
+
+SECOND_NS = 1_000_000_000
+
+# Exit status of the compare CLI when a gated metric regressed significantly
+REGRESSION_EXIT_CODE = 4
+
+COMPARED_PERCENTILES = (50, 95, 99)
+
+# Relative change (error_rate: absolute change) a significant delta must exceed to fail the gate
+DEFAULT_THRESHOLDS = {
+    'p50': None,
+    'p95': 0.10,
+    'p99': 0.15,
+    'rps': 0.05,
+    'error_rate': 0.01,
+    'knee': 0.10,
+}
+
+# Seconds per block of the error-rate bootstrap; longer than the error bursts seen in practice
+ERROR_BLOCK_S = 30
+
+# Direction in which each metric gets worse
+_WORSE_WHEN_HIGHER = {'p50': True, 'p95': True, 'p99': True, 'rps': False, 'error_rate': True, 'knee': False}
+
+
+def _rank(n, q):
+    """1-based nearest rank of the q-th percentile in n sorted values"""
+    return min(n, max(1, int(np.ceil(q / 100.0 * n))))
+
+
+def distribution(sketch):
+    """Sorted bucket values and cumulative counts of a latency sketch
+
+    Order statistics are read from this form, so a group's distribution costs one entry per
+    sketch bucket instead of one per request.
+    """
+    zero = np.zeros(1) if sketch.zero_count else np.empty(0)
+    zero_counts = np.array([sketch.zero_count]) if sketch.zero_count else np.empty(0)
+    occupied = np.nonzero(sketch.counts)[0]
+    values = np.clip(2 * sketch.gamma ** (occupied + sketch.offset) / (sketch.gamma + 1), sketch.min, sketch.max)
+    return np.concatenate((zero, values)), np.cumsum(np.concatenate((zero_counts, sketch.counts[occupied])))
+
+
+def order_statistic(values, cumulative, k):
+    """k-th smallest (1-based, array) of the distribution given by distribution()"""
+    return values[np.minimum(np.searchsorted(cumulative, k, side='left'), len(values) - 1)]
+
+
+def nearest_rank(values, cumulative, q):
+    """Nearest-rank percentile; the statistic bootstrap_quantiles resamples"""
+    n = int(cumulative[-1]) if len(cumulative) else 0
+    return float(order_statistic(values, cumulative, _rank(n, q))) if n else np.nan
+
+
+def bootstrap_quantiles(values, cumulative, q, n_boot, rng):
+    """Bootstrap replicates of a sample quantile without resampling the data
+
+    The k-th smallest of n draws from the empirical distribution is the floor(n * U)-th value
+    with U ~ Beta(k, n - k + 1), so every replicate costs O(log buckets) instead of O(n).
+    """
+    n = int(cumulative[-1]) if len(cumulative) else 0
+    if n == 0:
+        return np.full(n_boot, np.nan)
+    k = _rank(n, q)
+    u = rng.beta(k, n - k + 1, size=n_boot)
+    return order_statistic(values, cumulative, np.minimum((u * n).astype(np.int64), n - 1) + 1)
+
+
+def bootstrap_rates(second_counts, n_boot, rng):
+    """Bootstrap replicates of the mean request rate by resampling whole seconds"""
+    m = len(second_counts)
+    if m == 0:
+        return np.full(n_boot, np.nan)
+    return second_counts[rng.integers(0, m, size=(n_boot, m))].mean(axis=1)
+
+
+def bootstrap_ratios(second_numerators, second_denominators, n_boot, rng, block_s=ERROR_BLOCK_S):
+    """Bootstrap replicates of a ratio of totals (failures / failure samples) resampling runs of seconds
+
+    Failures come in bursts, so neither requests nor single seconds are independent: a circular
+    block bootstrap draws block_s-second stretches, which keeps a burst together.
+    """
+    m = len(second_numerators)
+    if m == 0:
+        return np.full(n_boot, np.nan)
+    block_s = max(1, min(block_s, m))
+    starts = rng.integers(0, m, size=(n_boot, -(-m // block_s)))
+    picks = ((starts[:, :, None] + np.arange(block_s)) % m).reshape(n_boot, -1)[:, :m]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return second_numerators[picks].sum(axis=1) / second_denominators[picks].sum(axis=1)
+
+
+def group_sample(index, start_ns, end_ns, groups=None):
+    """Everything the bootstrap needs for one stage/endpoint of one run, from its rollup index"""
+    result = index.query(start_ns, end_ns, groups)
+    values, cumulative = distribution(result['sketch'])
+    return {
+        'values': values,
+        'cumulative': cumulative,
+        'second_counts': index.second_counts(start_ns, end_ns, groups),
+        'failures': result['failures'],
+        'failure_samples': result['failure_samples'],
+        'second_failures': index.second_counts(start_ns, end_ns, groups, 'errors'),
+        'second_failure_samples': index.second_counts(start_ns, end_ns, groups, 'fail_samples'),
+    }
+
+
+def run_groups(index, stages=None):
+    """Split one run's requests into 'overall', 'stage N' and 'METHOD /path' groups"""
+    if index is None:
+        return {}
+    run_start, run_end = index.start_ns, index.end_ns
+    groups = {'overall': group_sample(index, run_start, run_end)}
+
+    if stages:
+        stage_seconds = np.array([duration for duration, _ in stages])
+        boundaries = run_start + (np.concatenate(([0], np.cumsum(stage_seconds))) * SECOND_NS).astype(np.int64)
+        for stage in range(len(stages)):
+            groups[f'stage {stage + 1}'] = group_sample(index, boundaries[stage], boundaries[stage + 1])
+
+    if 'method' in index.labels and 'name' in index.labels:
+        # Different hosts (envs) and statuses share endpoints, so groups are keyed by method + path
+        keys = np.array([f'{method} {endpoint_path(name)}'
+                         for method, name in zip(index.labels['method'], index.labels['name'])], dtype=object)
+        for key in np.unique(keys):
+            groups[key] = group_sample(index, run_start, run_end, np.nonzero(keys == key)[0])
+    return groups
+
+
+def _delta_row(group, metric, baseline, candidate, baseline_reps, candidate_reps, confidence, relative=True):
+    """Point delta and bootstrap interval of candidate vs baseline for one metric"""
+    tail = (1 - confidence) / 2 * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if relative:
+            delta = candidate / baseline - 1
+            reps = candidate_reps / baseline_reps - 1
+        else:
+            delta = candidate - baseline
+            reps = candidate_reps - baseline_reps
+    reps = reps[np.isfinite(reps)]
+    ci_low, ci_high = np.percentile(reps, [tail, 100 - tail]) if len(reps) else (np.nan, np.nan)
+    return {
+        'group': group,
+        'metric': metric,
+        'baseline': float(baseline),
+        'candidate': float(candidate),
+        'delta': float(delta),
+        'ci_low': float(ci_low),
+        'ci_high': float(ci_high),
+        'significant': bool(ci_low > 0 or ci_high < 0),
+        'relative': relative,
+    }
+
+
+def compare_group(group, base, cand, n_boot, confidence, rng):
+    """Percentile, throughput and error-rate deltas for one group present in both runs"""
+    rows = []
+    for q in COMPARED_PERCENTILES:
+        rows.append(_delta_row(group, f'p{q}', nearest_rank(base['values'], base['cumulative'], q),
+                               nearest_rank(cand['values'], cand['cumulative'], q),
+                               bootstrap_quantiles(base['values'], base['cumulative'], q, n_boot, rng),
+                               bootstrap_quantiles(cand['values'], cand['cumulative'], q, n_boot, rng), confidence))
+    rows.append(_delta_row(group, 'rps', base['second_counts'].mean(), cand['second_counts'].mean(),
+                           bootstrap_rates(base['second_counts'], n_boot, rng),
+                           bootstrap_rates(cand['second_counts'], n_boot, rng), confidence))
+    if base['failure_samples'] and cand['failure_samples']:
+        base_rate = base['failures'] / base['failure_samples']
+        cand_rate = cand['failures'] / cand['failure_samples']
+        rows.append(_delta_row(group, 'error_rate', base_rate, cand_rate,
+                               bootstrap_ratios(base['second_failures'], base['second_failure_samples'], n_boot, rng),
+                               bootstrap_ratios(cand['second_failures'], cand['second_failure_samples'], n_boot, rng),
+                               confidence, relative=False))
+    return rows
+
+
+def run_knee(index, n_boot, confidence):
+    """Latency knee (VUs) with its bootstrap interval, None when the run has too few levels"""
+    curve = index.concurrency_curve() if index is not None else None
+    if curve is None or len(curve['vus']) < 3:
+        return None
+    return detect_knee(curve['vus'], curve['p95'], curve='convex', n_boot=n_boot, confidence=confidence)
+
+
+def compare_knees(base_knee, cand_knee):
+    """Relative knee shift; significant when the two bootstrap intervals do not overlap"""
+    if base_knee is None or cand_knee is None:
+        return None
+    return {
+        'group': 'overall',
+        'metric': 'knee',
+        'baseline': float(base_knee['x']),
+        'candidate': float(cand_knee['x']),
+        'delta': float(cand_knee['x'] / base_knee['x'] - 1) if base_knee['x'] else np.nan,
+        'ci_low': float(cand_knee['ci_low'] / base_knee['ci_high'] - 1) if base_knee['ci_high'] else np.nan,
+        'ci_high': float(cand_knee['ci_high'] / base_knee['ci_low'] - 1) if base_knee['ci_low'] else np.nan,
+        'significant': bool(cand_knee['ci_high'] < base_knee['ci_low'] or cand_knee['ci_low'] > base_knee['ci_high']),
+        'relative': True,
+    }
+
+
+def flag_regressions(rows, thresholds=None):
+    """Mark significant deltas that move the wrong way by more than the metric's threshold"""
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    for row in rows:
+        threshold = thresholds.get(row['metric'])
+        worse = row['delta'] > 0 if _WORSE_WHEN_HIGHER[row['metric']] else row['delta'] < 0
+        row['threshold'] = threshold
+        row['regression'] = bool(threshold is not None and row['significant'] and worse
+                                 and abs(row['delta']) > threshold)
+    return rows
+
+
+def prepare_run(index, stages=None, n_boot=1000, confidence=0.95):
+    """Groups and knee of one run (from its rollup index), computed once even when it is compared several times"""
+    return {'groups': run_groups(index, stages), 'knee': run_knee(index, n_boot, confidence)}
+
+
+def compare_runs(baseline, candidate, n_boot=1000, confidence=0.95, thresholds=None, seed=0):
+    """All delta rows of a prepared candidate run against the prepared baseline, regressions flagged"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    knee_row = compare_knees(baseline['knee'], candidate['knee'])
+    if knee_row is not None:
+        rows.append(knee_row)
+    for group, base in baseline['groups'].items():
+        cand = candidate['groups'].get(group)
+        if cand is not None and len(base['values']) and len(cand['values']):
+            rows.extend(compare_group(group, base, cand, n_boot, confidence, rng))
+    return flag_regressions(rows, thresholds)
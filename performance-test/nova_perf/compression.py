@@ -0,0 +1,146 @@
+"""
+Compressed k6 results files
+gzip and zstd streams are recognised by their magic bytes, so a renamed file still opens;
+zstd needs the optional `zstandard` package, gzip only the standard library
+"""
+
+import gzip
+import hashlib
+import os
+import queue
+import shutil
+import threading
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 10}
+
+COPY_BYTES = 4 * 1024 * 1024
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd-compressed results need the zstandard package (pip install zstandard)") from None
+    return zstandard
+
+
+def zstd_available():
+    try:
+        _zstandard()
+    except ImportError:
+        return False
+    return True
+
+
+def compression_of(path):
+    """'gzip', 'zstd' or None for a plain file"""
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if head == ZSTD_MAGIC:
+        return 'zstd'
+    return None
+
+
+def open_results(path):
+    """Binary stream of the file's decompressed contents"""
+    kind = compression_of(path)
+    if kind == 'gzip':
+        return gzip.open(path, 'rb')
+    if kind == 'zstd':
+        return _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                             closefd=True)
+    return open(path, 'rb')
+
+
+def prefetch(chunks, depth=2):
+    """Iterate over `chunks` produced by a background thread
+
+    zlib and zstd release the GIL while decompressing, so the next chunks are inflated while
+    the caller is still decoding the current one.
+    """
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if stop.is_set():
+                    return
+                buffer.put(chunk)
+        except BaseException as e:
+            buffer.put(e)
+        buffer.put(done)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue so it can see the stop flag
+        while thread.is_alive():
+            try:
+                buffer.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+
+def read_blocks(stream, block_bytes):
+    """Blocks of a binary stream until it is exhausted"""
+    while True:
+        block = stream.read(block_bytes)
+        if not block:
+            return
+        yield block
+
+
+def compressed_path(path, kind):
+    return path + SUFFIXES[kind]
+
+
+def compress_file(path, kind='zstd', level=None, verify=True):
+    """Write `path` compressed next to it; returns (output path, input bytes, output bytes)
+
+    With verify the output is decompressed again and its hash compared with the input's, so
+    the caller can safely delete the original afterwards.
+    """
+    level = DEFAULT_LEVELS[kind] if level is None else level
+    output = compressed_path(path, kind)
+    staging = output + '.partial'
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as source, open(staging, 'wb') as target:
+        if kind == 'gzip':
+            sink = gzip.GzipFile(filename=os.path.basename(path), mode='wb', compresslevel=level, fileobj=target)
+        else:
+            sink = _zstandard().ZstdCompressor(level=level, threads=-1).stream_writer(target, closefd=False)
+        with sink:
+            for block in read_blocks(source, COPY_BYTES):
+                digest.update(block)
+                sink.write(block)
+    try:
+        if verify:
+            check = hashlib.blake2b(digest_size=16)
+            with open_results(staging) as stream:
+                for block in read_blocks(stream, COPY_BYTES):
+                    check.update(block)
+            if check.digest() != digest.digest():
+                raise ValueError(f"{staging} does not decompress to the contents of {path}")
+        shutil.copystat(path, staging)
+        os.replace(staging, output)
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
+    return output, os.path.getsize(path), os.path.getsize(output)
@@ -0,0 +1,233 @@
+"""
+Time-aligned correlation of k6 load with HPA replicas and pod resource usage
+k6 windows and the 15s monitor-scaling.sh samples are joined with sorted as-of lookups on int64 ns
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from nova_perf.endpoints import backend_for, endpoint_groups
+from nova_perf.stages import grouped_percentiles, vus_at
+
+# Matches the monitor-scaling.sh sampling cadence
+DEFAULT_WINDOW_S = 15
+
+# Utilization targets of every HPA in k8s/hpa-autoscaling.yaml
+DEFAULT_CPU_TARGET = 70
+DEFAULT_MEMORY_TARGET = 80
+
+# Latency counts as recovered once p95 is back within this factor of its pre-scale-up value
+RECOVERY_TOLERANCE = 1.2
+
+SERVICES = ('api-gateway', 'frontend', 'auth-svc', 'user-product-svc')
+
+
+def service_name(name):
+    """Normalize HPA names (api-gateway-hpa, user-product-hpa) to the pod service names"""
+    name = name[:-4] if name.endswith('-hpa') else name
+    return 'user-product-svc' if name == 'user-product' else name
+
+
+def monitor_times_ns(timestamps, utc_offset_minutes=None):
+    """Convert the naive local timestamps written by monitor-scaling.sh to UTC epoch ns"""
+    if utc_offset_minutes is None:
+        offset = datetime.now().astimezone().utcoffset()
+    else:
+        offset = timedelta(minutes=utc_offset_minutes)
+    naive_ns = np.asarray(timestamps, dtype='datetime64[ns]').astype(np.int64)
+    return naive_ns - int(offset / timedelta(microseconds=1)) * 1000
+
+
+def asof_index(reference_ns, query_ns):
+    """Index of the last reference time <= each query time (-1 when none)"""
+    return np.searchsorted(reference_ns, query_ns, side='right') - 1
+
+
+def k6_windows(points, window_s=DEFAULT_WINDOW_S):
+    """Request rate (total and per backend), p95 and VUs for fixed windows of the run"""
+    times, durations = points.series('http_req_duration')
+    if len(times) == 0:
+        return None
+
+    window_ns = int(window_s * 1e9)
+    start = times.min()
+    window = ((times - start) // window_ns).astype(np.int64)
+    n_windows = int(window.max()) + 1
+    starts = start + np.arange(n_windows, dtype=np.int64) * window_ns
+
+    vus_times, vus_values = points.series('vus')
+    windows = {
+        'start_ns': starts,
+        'rps': np.bincount(window, minlength=n_windows) / window_s,
+        'p95': grouped_percentiles(window, durations, n_windows, (95,))[0],
+        'vus': vus_at(starts + window_ns // 2, vus_times, vus_values),
+    }
+
+    # Per-backend request rate; the api-gateway sees every /api request
+    grouped = endpoint_groups(points, ('name',))
+    backend_rps = {service: np.zeros(n_windows) for service in SERVICES}
+    if grouped is not None:
+        labels, group_times, _, group_ids, _ = grouped
+        backends = np.array([backend_for(name) for name in labels['name']], dtype=object)
+        group_window = ((group_times - start) // window_ns).astype(np.int64)
+        for service in ('frontend', 'auth-svc', 'user-product-svc'):
+            in_service = np.isin(group_ids, np.nonzero(backends == service)[0])
+            backend_rps[service] = np.bincount(group_window[in_service], minlength=n_windows) / window_s
+        backend_rps['api-gateway'] = backend_rps['auth-svc'] + backend_rps['user-product-svc']
+    windows['backend_rps'] = backend_rps
+    return windows
+
+
+def service_timeline(windows, hpa_df=None, resource_summary=None, utc_offset_minutes=None):
+    """Join every monitoring sample with the k6 window it falls into
+
+    Returns {service: {column: array}} sorted by time; the pod resource samples of a service
+    are joined separately under its 'resources' key.
+    """
+    timelines = {}
+    n_windows = len(windows['start_ns'])
+
+    def joined(times_ns, service):
+        index = asof_index(windows['start_ns'], times_ns)
+        valid = (index >= 0) & (index < n_windows)
+        index = np.clip(index, 0, n_windows - 1)
+        rps = windows['backend_rps'].get(service, windows['rps'])
+        return {
+            'time_ns': times_ns,
+            'in_run': valid,
+            'vus': np.where(valid, windows['vus'][index], np.nan),
+            'rps': np.where(valid, windows['rps'][index], np.nan),
+            'service_rps': np.where(valid, rps[index], np.nan),
+            'p95': np.where(valid, windows['p95'][index], np.nan),
+        }
+
+    if hpa_df is not None and not hpa_df.empty:
+        for name, rows in hpa_df.sort_values('timestamp').groupby('service', sort=False):
+            service = service_name(name)
+            times_ns = monitor_times_ns(rows['timestamp'], utc_offset_minutes)
+            timeline = joined(times_ns, service)
+            for column in ('current_replicas', 'desired_replicas', 'cpu_percent', 'memory_percent'):
+                timeline[column] = rows[column].to_numpy(dtype=np.float64)
+            timelines[service] = timeline
+
+    if resource_summary is not None and not resource_summary.empty:
+        for service, rows in resource_summary.sort_values('timestamp').groupby('service', sort=False):
+            if not service:
+                continue
+            times_ns = monitor_times_ns(rows['timestamp'], utc_offset_minutes)
+            timeline = timelines.setdefault(service, {})
+            resource = joined(times_ns, service)
+            resource['cpu_millicores'] = rows['cpu_cores'].to_numpy(dtype=np.float64)
+            resource['memory_mib'] = rows['memory_bytes'].to_numpy(dtype=np.float64)
+            timeline['resources'] = resource
+
+    return timelines
+
+
+def scale_up_reactions(timeline, windows, cpu_target=DEFAULT_CPU_TARGET, memory_target=DEFAULT_MEMORY_TARGET,
+                       tolerance=RECOVERY_TOLERANCE):
+    """Load rise -> desired replicas -> ready replicas -> latency recovery for each scale-up
+
+    Load rise is the start of the over-target (CPU or memory) run that led to the scale-up,
+    ready is the first sample whose current replicas reach the new desired count, and
+    recovery is the first k6 window after that whose p95 is back near its load-rise value.
+    """
+    if 'desired_replicas' not in timeline:
+        return []
+    times = timeline['time_ns']
+    desired = timeline['desired_replicas']
+    current = timeline['current_replicas']
+    over_target = (timeline['cpu_percent'] >= cpu_target) | (timeline['memory_percent'] >= memory_target)
+
+    reactions = []
+    for i in np.nonzero(np.diff(desired) > 0)[0] + 1:
+        below = np.nonzero(~over_target[:i])[0]
+        rise = below[-1] + 1 if len(below) else 0
+        rise = min(rise, i)
+
+        ready_at = np.nonzero((current[i:] >= desired[i]))[0]
+        ready = i + ready_at[0] if len(ready_at) else None
+
+        recovered_ns = None
+        if ready is not None:
+            baseline = windows['p95'][np.clip(asof_index(windows['start_ns'], times[rise]), 0, None)]
+            after = np.nonzero((windows['start_ns'] >= times[ready])
+                               & (windows['p95'] <= baseline * tolerance))[0]
+            if len(after):
+                recovered_ns = windows['start_ns'][after[0]]
+
+        def seconds(later, earlier):
+            return (later - earlier) / 1e9 if later is not None and earlier is not None else np.nan
+
+        reactions.append({
+            'from_replicas': int(desired[i - 1]),
+            'to_replicas': int(desired[i]),
+            'load_rise_ns': times[rise],
+            'desired_ns': times[i],
+            'ready_ns': times[ready] if ready is not None else None,
+            'recovered_ns': recovered_ns,
+            'rise_to_desired_s': seconds(times[i], times[rise]),
+            'desired_to_ready_s': seconds(times[ready] if ready is not None else None, times[i]),
+            'ready_to_recovery_s': seconds(recovered_ns, times[ready] if ready is not None else None),
+            'total_s': seconds(recovered_ns, times[rise]),
+        })
+    return reactions
+
+
+def _fit(x, y):
+    """Least-squares slope and intercept over finite points; NaNs when under-determined"""
+    keep = np.isfinite(x) & np.isfinite(y) & (x > 0)
+    if keep.sum() < 3 or np.ptp(x[keep]) == 0:
+        return np.nan, np.nan
+    slope, intercept = np.polyfit(x[keep], y[keep], 1)
+    return float(slope), float(intercept)
+
+
+def resource_efficiency(timeline):
+    """CPU per request and memory per VU for one service from its resource samples"""
+    resource = timeline.get('resources')
+    if resource is None:
+        return None
+    in_run = resource['in_run'] & (resource['service_rps'] > 0)
+    cpu_slope, cpu_base = _fit(resource['service_rps'], resource['cpu_millicores'])
+    mem_slope, mem_base = _fit(resource['vus'], resource['memory_mib'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = resource['cpu_millicores'][in_run] / resource['service_rps'][in_run]
+    return {
+        # millicores per (request/s) == CPU milliseconds per request
+        'cpu_ms_per_request': float(np.median(ratio)) if len(ratio) else np.nan,
+        'cpu_ms_per_request_marginal': cpu_slope,
+        'cpu_baseline_millicores': cpu_base,
+        'memory_mib_per_vu': mem_slope,
+        'memory_baseline_mib': mem_base,
+    }
+
+
+def correlate_run(points, hpa_df=None, resource_summary=None, window_s=DEFAULT_WINDOW_S,
+                  cpu_target=DEFAULT_CPU_TARGET, memory_target=DEFAULT_MEMORY_TARGET, utc_offset_minutes=None):
+    """Per-service timelines, scale-up reactions and resource efficiency for one run"""
+    windows = k6_windows(points, window_s)
+    if windows is None:
+        return None
+    timelines = service_timeline(windows, hpa_df, resource_summary, utc_offset_minutes)
+    services = {}
+    for service, timeline in timelines.items():
+        services[service] = {
+            'timeline': timeline,
+            'reactions': scale_up_reactions(timeline, windows, cpu_target, memory_target),
+            'efficiency': resource_efficiency(timeline),
+        }
+    return {'windows': windows, 'services': services}
+
+
+def format_time(time_ns):
+    """HH:MM:SS (UTC) for report tables"""
+    if time_ns is None:
+        return '-'
+    return datetime.fromtimestamp(time_ns / 1e9, tz=timezone.utc).strftime('%H:%M:%S')
+
+
+def format_seconds(seconds):
+    """Whole seconds for report tables, '-' when the step never happened"""
+    return f'{seconds:.0f}s' if np.isfinite(seconds) else '-'
@@ -0,0 +1,81 @@
+"""
+Decimation of long time series before plotting
+Series are reduced to a pixel-width budget so render time and file size do not grow with
+the run length; LTTB keeps the visual shape, min/max buckets keep every peak and step
+"""
+
+import numpy as np
+
+# Resolution the PNGs are written at
+PLOT_DPI = 300
+
+
+def pixel_budget(width_inches, dpi=PLOT_DPI):
+    """Number of points worth drawing across a plot of this width"""
+    return max(3, int(width_inches * dpi))
+
+
+def _as_float(x):
+    """Numeric view of x for area/bucket maths (datetime64 -> int64 ns)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def minmax_indices(y, n_out):
+    """Indices of the min and max of each of n_out // 2 equal-size buckets, in order"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_buckets = max(1, n_out // 2)
+    if n <= n_out:
+        return np.arange(n)
+    size = int(np.ceil(n / n_buckets))
+    # Padding repeats the last value, so it never wins over a real sample of the same bucket
+    padded = np.concatenate([y, np.full(size * n_buckets - n, y[-1])])
+    blocks = padded.reshape(n_buckets, size)
+    base = np.arange(n_buckets) * size
+    low = base + np.argmin(blocks, axis=1)
+    high = base + np.argmax(blocks, axis=1)
+    indices = np.unique(np.concatenate([low, high, [0, n - 1]]))
+    return indices[indices < n]
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the curve's shape"""
+    x, y = _as_float(x), np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    # First and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    # Average point of every bucket, used as the third triangle corner for the bucket before it
+    counts = np.diff(edges)
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        bx, by = x[start:end], y[start:end]
+        ax, ay = x[previous], y[previous]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        area = np.abs((ax - cx) * (by - ay) - (ax - bx) * (cy - ay))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def decimate(x, y, n_out, method='lttb'):
+    """Return (x, y) reduced to about n_out points; short series are returned unchanged"""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= n_out:
+        return x, y
+    indices = minmax_indices(y, n_out) if method == 'minmax' else lttb_indices(x, y, n_out)
+    return x[indices], y[indices]
@@ -0,0 +1,138 @@
+"""
+Per-endpoint latency and throughput breakdown
+Groups request samples by their dictionary-encoded k6 tags (name, method, status, ...)
+"""
+
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from nova_perf.k6_stream import NO_TAG
+from nova_perf.stages import PERCENTILES, grouped_percentiles
+
+DEFAULT_GROUP_BY = ('method', 'name')
+
+# Gateway routes (nova-backend-api-gateway/main.go) and the backend that serves them;
+# checked in order, first prefix wins
+BACKEND_ROUTES = (
+    ('/api/login', 'auth-svc'),
+    ('/api/', 'user-product-svc'),
+)
+
+
+def endpoint_path(name):
+    """Path part of a k6 `name` tag (which defaults to the full URL)"""
+    if not name:
+        return ''
+    return urlsplit(name).path or '/'
+
+
+def backend_for(name):
+    """Service behind the api-gateway that handles a request name/URL"""
+    path = endpoint_path(name)
+    for prefix, service in BACKEND_ROUTES:
+        if path.startswith(prefix):
+            return service
+    return 'frontend'
+
+
+def _combined_keys(tag_codes, points, by):
+    """Fold several tag code columns into one int64 key per row"""
+    keys = np.zeros(len(next(iter(tag_codes.values()))), dtype=np.int64)
+    for key in by:
+        # Shift codes up by one so that NO_TAG wraps around to 0
+        cardinality = len(points.tag_values[key]) + 1
+        keys = keys * cardinality + (tag_codes[key].astype(np.int64) + 1) % (NO_TAG + 1)
+    return keys
+
+
+def _decode_keys(unique_keys, points, by):
+    """Turn combined keys back into {tag: [values...]} columns"""
+    labels = {}
+    remaining = unique_keys.copy()
+    for key in reversed(by):
+        cardinality = len(points.tag_values[key]) + 1
+        # Code -1 (untagged) picks the trailing ''
+        codes = remaining % cardinality - 1
+        remaining //= cardinality
+        values = np.array(points.tag_values[key] + [''], dtype=object)
+        labels[key] = values[codes]
+    return {key: labels[key] for key in by}
+
+
+def endpoint_groups(points, by=DEFAULT_GROUP_BY):
+    """Group request samples by tags; returns (labels, times, durations, group_ids, failed_groups)"""
+    times, durations, tag_codes = points.tagged_series('http_req_duration', by)
+    fail_times, failed, fail_codes = points.tagged_series('http_req_failed', by)
+    if len(times) == 0:
+        return None
+
+    keys = _combined_keys(tag_codes, points, by)
+    unique_keys, group_ids = np.unique(keys, return_inverse=True)
+    labels = _decode_keys(unique_keys, points, by)
+
+    failed_groups = None
+    if len(fail_times):
+        fail_keys = _combined_keys(fail_codes, points, by)
+        position = np.clip(np.searchsorted(unique_keys, fail_keys), 0, len(unique_keys) - 1)
+        known = unique_keys[position] == fail_keys
+        failed_groups = (position[known], failed[known])
+
+    return labels, times, durations, group_ids, failed_groups
+
+
+def endpoint_table(points, by=DEFAULT_GROUP_BY):
+    """Requests, throughput, latency percentiles and error rate per endpoint"""
+    grouped = endpoint_groups(points, by)
+    if grouped is None:
+        return None
+    labels, times, durations, group_ids, failed_groups = grouped
+    n_groups = len(next(iter(labels.values())))
+
+    duration_s = (times.max() - times.min()) / 1e9 if len(times) > 1 else 0.0
+    counts = np.bincount(group_ids, minlength=n_groups)
+    pct = grouped_percentiles(group_ids, durations, n_groups)
+
+    table = dict(labels)
+    if 'name' in table:
+        table['path'] = np.array([endpoint_path(name) for name in table['name']], dtype=object)
+        table['backend'] = np.array([backend_for(name) for name in table['name']], dtype=object)
+    table['requests'] = counts
+    table['rps'] = counts / duration_s if duration_s > 0 else np.zeros(n_groups)
+    table['avg'] = np.bincount(group_ids, weights=durations, minlength=n_groups) / np.maximum(counts, 1)
+    for row, q in enumerate(PERCENTILES):
+        table[f'p{q}'] = pct[row]
+    if failed_groups is not None:
+        fail_ids, failed = failed_groups
+        fail_counts = np.bincount(fail_ids, minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table['error_rate'] = np.bincount(fail_ids, weights=failed, minlength=n_groups) / fail_counts
+    else:
+        table['error_rate'] = np.full(n_groups, np.nan)
+
+    order = np.argsort(-counts, kind='stable')
+    return {key: values[order] for key, values in table.items()}
+
+
+def endpoint_timeseries(points, window_s=30, by=DEFAULT_GROUP_BY, percentile=95):
+    """Per-endpoint throughput and latency percentile for each time window
+
+    Returns (window_start_ns, labels, rps[endpoint, window], latency[endpoint, window]).
+    """
+    grouped = endpoint_groups(points, by)
+    if grouped is None:
+        return None
+    labels, times, durations, group_ids, _ = grouped
+    n_groups = len(next(iter(labels.values())))
+
+    start = times.min()
+    window = ((times - start) // int(window_s * 1e9)).astype(np.int64)
+    n_windows = int(window.max()) + 1
+
+    cell = group_ids * n_windows + window
+    n_cells = n_groups * n_windows
+    counts = np.bincount(cell, minlength=n_cells).reshape(n_groups, n_windows)
+    latency = grouped_percentiles(cell, durations, n_cells, (percentile,))[0].reshape(n_groups, n_windows)
+
+    starts = start + np.arange(n_windows, dtype=np.int64) * int(window_s * 1e9)
+    return starts, labels, counts / window_s, latency
@@ -0,0 +1,271 @@
+"""
+Live analysis of a running test
+Tails the growing k6 NDJSON file and the monitor-scaling.sh CSVs; every tick only the
+lines appended since the previous tick are decoded and folded into the running state
+"""
+
+import asyncio
+import csv
+import os
+import time
+
+import numpy as np
+
+from nova_perf.correlate import format_time
+from nova_perf.k6_stream import K6Points, PointDecoder
+from nova_perf.knee import detect_knee
+from nova_perf.sketch import LatencySketch, windowed_sketches
+from nova_perf.slo import DEFAULT_SLO_WINDOW_S, SloTracker
+
+SECOND_NS = 1_000_000_000
+
+# Exit status of follow mode when it stops because the system is past saturation
+SATURATED_EXIT_CODE = 3
+
+
+class FileTail:
+    """Returns the complete lines appended to a file since the previous read"""
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self._partial = b''
+
+    def read_new(self):
+        if not self.path or not os.path.exists(self.path):
+            return []
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            # File was truncated or replaced - start over
+            self.offset, self._partial = 0, b''
+        if size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        return lines
+
+
+class LiveRunState:
+    """Rolling and cumulative aggregates maintained in O(new samples) per update"""
+
+    def __init__(self, window_s=60, vu_bin=50, min_requests=20, slos=None, slo_window_s=DEFAULT_SLO_WINDOW_S):
+        self.window_s = window_s
+        self.vu_bin = vu_bin
+        self.min_requests = min_requests
+
+        # Per-second slots for the rolling window: second -> [sketch, requests, failures, failed_samples]
+        self.seconds = {}
+        self.latest_ns = None
+
+        # Cumulative per-concurrency sketches for the running knee estimate
+        self.bin_sketches = {}
+        self.last_vus = (None, 0.0)
+        self.current_vus = 0.0
+        self.total_requests = 0
+
+        self.hpa = {}
+        self.resources = {}
+
+        # Sliding-window SLOs and burn rates; breaches already reported are remembered
+        self.slo = SloTracker(slos, slo_window_s) if slos else None
+        self.reported_breaches = 0
+
+    def add_points(self, points):
+        """Fold one tick's decoded points into the state"""
+        vus_times, vus_values = points.series('vus')
+        times, durations = points.series('http_req_duration')
+        fail_times, failed = points.series('http_req_failed')
+
+        # VU level of each request: as-of join against the previous tick's last value + new ones
+        if self.last_vus[0] is not None:
+            vus_times = np.concatenate(([self.last_vus[0]], vus_times))
+            vus_values = np.concatenate(([self.last_vus[1]], vus_values))
+        if len(vus_times):
+            self.last_vus = (vus_times[-1], vus_values[-1])
+            self.current_vus = float(vus_values[-1])
+
+        if len(times):
+            self.total_requests += len(times)
+            self.latest_ns = max(self.latest_ns or 0, int(times.max()))
+            self._add_rolling(times, durations)
+            self._add_concurrency(times, durations, vus_times, vus_values)
+        if len(fail_times):
+            seconds, counts = np.unique(fail_times // SECOND_NS, return_counts=True)
+            failures = np.bincount(np.searchsorted(seconds, fail_times // SECOND_NS), weights=failed)
+            for second, count, failure in zip(seconds, counts, failures):
+                slot = self._slot(int(second))
+                slot[2] += failure
+                slot[3] += count
+        if self.slo is not None:
+            self.slo.add(times, durations, fail_times, failed, vus_times, vus_values)
+        self._expire()
+
+    def _slot(self, second):
+        slot = self.seconds.get(second)
+        if slot is None:
+            slot = self.seconds[second] = [LatencySketch(), 0, 0.0, 0]
+        return slot
+
+    def _add_rolling(self, times, durations):
+        start = (times.min() // SECOND_NS) * SECOND_NS
+        starts, sketches = windowed_sketches(times, durations, 1, start_ns=start)
+        for window_start, sketch in zip(starts, sketches):
+            if sketch.count:
+                slot = self._slot(int(window_start // SECOND_NS))
+                slot[0].merge(sketch)
+                slot[1] += sketch.count
+
+    def _add_concurrency(self, times, durations, vus_times, vus_values):
+        if len(vus_times) == 0:
+            return
+        index = np.clip(np.searchsorted(vus_times, times, side='right') - 1, 0, len(vus_values) - 1)
+        bins = (vus_values[index] // self.vu_bin).astype(np.int64)
+        for level in np.unique(bins):
+            sketch = self.bin_sketches.setdefault(int(level), LatencySketch())
+            sketch.add(durations[bins == level])
+
+    def _expire(self):
+        if self.latest_ns is None:
+            return
+        oldest = self.latest_ns // SECOND_NS - self.window_s
+        for second in [s for s in self.seconds if s <= oldest]:
+            del self.seconds[second]
+
+    def add_hpa_rows(self, rows):
+        for row in rows:
+            self.hpa[row['service']] = row
+
+    def add_resource_rows(self, rows):
+        """Keep the per-service CPU/memory totals of the most recent sample"""
+        for row in rows:
+            stamp = row['timestamp']
+            entry = self.resources.get(row['service'])
+            if entry is None or entry['timestamp'] != stamp:
+                entry = self.resources[row['service']] = {'timestamp': stamp, 'cpu_cores': 0.0, 'memory_bytes': 0.0}
+            entry['cpu_cores'] += float(row['cpu_cores'] or 0)
+            entry['memory_bytes'] += float(row['memory_bytes'] or 0)
+
+    def rolling(self):
+        """Percentiles, throughput and error rate over the rolling window"""
+        merged = LatencySketch()
+        requests, failures, failure_samples = 0, 0.0, 0
+        for sketch, count, failed, samples in self.seconds.values():
+            merged.merge(sketch)
+            requests += count
+            failures += failed
+            failure_samples += samples
+        span = min(self.window_s, max(len(self.seconds), 1))
+        stats = merged.percentiles()
+        stats['rps'] = requests / span
+        stats['error_rate'] = failures / failure_samples if failure_samples else 0.0
+        return stats
+
+    def new_breaches(self):
+        """SLO breaches first seen since the previous call"""
+        if self.slo is None:
+            return []
+        breaches = list(self.slo.breaches.values())
+        fresh = breaches[self.reported_breaches:]
+        self.reported_breaches = len(breaches)
+        return fresh
+
+    def knee(self):
+        """Running knee estimate from the cumulative per-concurrency sketches"""
+        levels = sorted(level for level, sketch in self.bin_sketches.items()
+                        if sketch.count >= self.min_requests)
+        if len(levels) < 3:
+            return None
+        users = np.array(levels) * self.vu_bin + self.vu_bin / 2.0
+        p95 = np.array([self.bin_sketches[level].quantile(0.95) for level in levels])
+        return detect_knee(users, p95, curve='convex', n_boot=0)
+
+
+def _csv_rows(tail, header):
+    """Parse newly appended CSV lines, remembering the header on first sight"""
+    lines = [line.decode('utf-8', 'replace') for line in tail.read_new() if line.strip()]
+    if header is None and lines:
+        header, lines = next(csv.reader([lines[0]])), lines[1:]
+    if header is None:
+        return header, []
+    return header, [dict(zip(header, values)) for values in csv.reader(lines)]
+
+
+def format_status(state, knee):
+    """One-line status for the console"""
+    stats = state.rolling()
+    line = (f"👥 {state.current_vus:>5.0f} VUs | {stats['rps']:7.1f} RPS | "
+            f"p50 {stats['p50']:7.1f} p95 {stats['p95']:7.1f} p99 {stats['p99']:7.1f} ms | "
+            f"errors {stats['error_rate']:6.2%}")
+    if knee is not None:
+        line += f" | knee ~{knee['x']:.0f} VUs"
+    replicas = ', '.join(f"{row['service']} {row.get('current_replicas', '?')}/{row.get('desired_replicas', '?')}"
+                         for row in state.hpa.values())
+    if replicas:
+        line += f" | replicas {replicas}"
+    row = state.slo.latest_row() if state.slo is not None else None
+    if row is not None:
+        met = sum(1 for slo in state.slo.slos if not row[slo['name']] < slo['objective'])
+        line += f" | SLO {met}/{len(state.slo.slos)} met"
+    cpu = ', '.join(f"{service} {entry['cpu_cores']:.0f}m" for service, entry in state.resources.items() if service)
+    if cpu:
+        line += f" | cpu {cpu}"
+    return line, stats
+
+
+async def follow(k6_results, hpa_file=None, resource_file=None, interval=5.0, window_s=60,
+                 idle_timeout=120.0, p95_limit=5000.0, error_limit=0.1, stop_on_saturation=False,
+                 slos=None, slo_window_s=DEFAULT_SLO_WINDOW_S):
+    """Follow a running test until the k6 file goes idle (or saturation, if requested)"""
+    points_tail = FileTail(k6_results)
+    hpa_tail, resource_tail = FileTail(hpa_file), FileTail(resource_file)
+    hpa_header = resource_header = None
+    state = LiveRunState(window_s=window_s, slos=slos, slo_window_s=slo_window_s)
+    last_growth = time.monotonic()
+
+    print(f"👀 Following {k6_results} every {interval:g}s (rolling window {window_s}s)")
+    while True:
+        lines = await asyncio.to_thread(points_tail.read_new)
+        hpa_header, hpa_rows = await asyncio.to_thread(_csv_rows, hpa_tail, hpa_header)
+        resource_header, resource_rows = await asyncio.to_thread(_csv_rows, resource_tail, resource_header)
+
+        if lines:
+            last_growth = time.monotonic()
+            points = K6Points()
+            PointDecoder(points).feed(lines)
+            state.add_points(points)
+        state.add_hpa_rows(hpa_rows)
+        state.add_resource_rows(resource_rows)
+
+        if state.total_requests:
+            knee = state.knee()
+            status, stats = format_status(state, knee)
+            print(status, flush=True)
+            for breach in state.new_breaches():
+                print(f"🚨 SLO {breach['slo']} breached at {format_time(breach['time_ns'])} "
+                      f"with {breach['vus']:.0f} VUs ({breach['rule']})", flush=True)
+
+            saturated = (knee is not None and state.current_vus > knee['x']
+                         and (stats['p95'] > p95_limit or stats['error_rate'] > error_limit))
+            if saturated:
+                print(f"🛑 Past saturation: {state.current_vus:.0f} VUs is beyond the knee "
+                      f"({knee['x']:.0f} VUs) and the p95/error limits are exceeded")
+                if stop_on_saturation:
+                    return SATURATED_EXIT_CODE
+
+        if time.monotonic() - last_growth > idle_timeout:
+            print(f"⏹️  No new k6 output for {idle_timeout:.0f}s - stopping follow mode")
+            return 0
+        await asyncio.sleep(interval)
+
+
+def run_follow(k6_results, **options):
+    """Blocking entry point for the analyzer CLI"""
+    try:
+        return asyncio.run(follow(k6_results, **options))
+    except KeyboardInterrupt:
+        print("\n⏹️  Follow mode stopped")
+        return 0
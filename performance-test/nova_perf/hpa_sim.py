@@ -0,0 +1,489 @@
+"""
+HPA what-if simulator
+Replays a recorded run's per-second request load against HorizontalPodAutoscaler policies
+(k8s/hpa-autoscaling.yaml) and predicts replicas, CPU utilization and a queueing latency estimate
+per service. Policy variants are lanes of the same arrays, so a sweep of hundreds of them is one
+pass over the run: per-second pod capacity and backlog within each sync period, then one vectorized
+HPA decision (tolerance, stabilization windows, Percent/Pods rate policies, pod startup) per period.
+"""
+
+import glob
+import itertools
+import os
+
+import numpy as np
+
+from nova_perf.correlate import SERVICES, asof_index, monitor_times_ns, service_name
+from nova_perf.endpoints import backend_for
+from nova_perf.rollup import SECOND_NS
+from nova_perf.sampler import cpu_millicores, memory_mib
+from nova_perf.stages import vus_at
+from nova_perf.synthetic import CLUSTER, POD_READY_S
+
+# kube-controller-manager --horizontal-pod-autoscaler-sync-period
+SYNC_PERIOD_S = 15
+
+# Usage ratios within this distance of 1 leave the replicas alone
+TOLERANCE = 0.1
+
+# autoscaling/v2 behavior when the HPA leaves it out
+DEFAULT_BEHAVIOR = {
+    'scaleUp': {'stabilizationWindowSeconds': 0, 'selectPolicy': 'Max',
+                'policies': [{'type': 'Percent', 'value': 100, 'periodSeconds': 15},
+                             {'type': 'Pods', 'value': 4, 'periodSeconds': 15}]},
+    'scaleDown': {'stabilizationWindowSeconds': 300, 'selectPolicy': 'Max',
+                  'policies': [{'type': 'Percent', 'value': 100, 'periodSeconds': 15}]},
+}
+
+_SELECT = {'Max': 1, 'Min': -1, 'Disabled': 0}
+
+# Policy parameters a sweep can vary (per direction: stabilization window, Percent and Pods
+# policy values, one period for both, and the select policy as +1 Max / -1 Min / 0 Disabled)
+PARAMETERS = ('min', 'max', 'cpu_target', 'memory_target', 'up_window', 'up_percent', 'up_pods', 'up_period',
+              'up_select', 'down_window', 'down_percent', 'down_pods', 'down_period', 'down_select', 'ready_s')
+
+# CPU ceiling of a container without a limit
+UNLIMITED_CPU_MILLICORES = 1000
+
+# Per-pod idle CPU when the resource metrics cannot be fitted (as in the synthetic runs)
+DEFAULT_IDLE_MILLICORES = 5.0
+
+# Utilization past which the M/M/1 wait stops growing and the backlog accounts for the overload
+MAX_UTILIZATION = 0.98
+
+# The knee: the first time the request-weighted latency stays above KNEE_FACTOR x its no-queueing
+# value for KNEE_SUSTAIN_S seconds (the report's optimal zone ends at 1.5x)
+KNEE_FACTOR = 1.5
+KNEE_SUSTAIN_S = 30
+
+# Request classes (the backend_for() of a request) and the services they pass through
+PATHS = {
+    'frontend': ('frontend',),
+    'auth-svc': ('api-gateway', 'auth-svc'),
+    'user-product-svc': ('api-gateway', 'user-product-svc'),
+}
+
+
+def _yaml_documents(path):
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("Reading Kubernetes manifests needs PyYAML (pip install pyyaml)") from None
+    with open(path) as f:
+        return [document for document in yaml.safe_load_all(f) if isinstance(document, dict)]
+
+
+def _direction(behavior, direction):
+    """Scalar parameters of one scaleUp/scaleDown rule set"""
+    rules = dict(DEFAULT_BEHAVIOR[direction])
+    rules.update((behavior or {}).get(direction) or {})
+    prefix = 'up' if direction == 'scaleUp' else 'down'
+    params = {
+        f'{prefix}_window': float(rules.get('stabilizationWindowSeconds',
+                                            DEFAULT_BEHAVIOR[direction]['stabilizationWindowSeconds'])),
+        f'{prefix}_percent': np.nan,
+        f'{prefix}_pods': np.nan,
+        f'{prefix}_period': float(SYNC_PERIOD_S),
+        f'{prefix}_select': float(_SELECT.get(rules.get('selectPolicy', 'Max'), 1)),
+    }
+    periods = []
+    for policy in rules.get('policies') or ():
+        kind = 'percent' if policy.get('type') == 'Percent' else 'pods'
+        # Several policies of one type collapse into the most permissive one
+        current = params[f'{prefix}_{kind}']
+        params[f'{prefix}_{kind}'] = float(policy['value']) if np.isnan(current) else max(current, policy['value'])
+        periods.append(float(policy.get('periodSeconds', SYNC_PERIOD_S)))
+    if periods:
+        params[f'{prefix}_period'] = max(periods)
+    return params
+
+
+def load_hpa_policies(path):
+    """{service: policy parameters (see PARAMETERS)} from an autoscaling/v2 HPA manifest"""
+    policies = {}
+    for document in _yaml_documents(path):
+        if document.get('kind') != 'HorizontalPodAutoscaler':
+            continue
+        spec = document.get('spec', {})
+        service = service_name(spec.get('scaleTargetRef', {}).get('name') or document['metadata']['name'])
+        targets = {'cpu': 0.0, 'memory': 0.0}
+        for metric in spec.get('metrics') or ():
+            resource = metric.get('resource', {})
+            if metric.get('type') == 'Resource' and resource.get('name') in targets:
+                targets[resource['name']] = float(resource.get('target', {}).get('averageUtilization', 0))
+        policies[service] = {
+            'min': float(spec.get('minReplicas', 1)),
+            'max': float(spec['maxReplicas']),
+            'cpu_target': targets['cpu'],
+            'memory_target': targets['memory'],
+            **_direction(spec.get('behavior'), 'scaleUp'),
+            **_direction(spec.get('behavior'), 'scaleDown'),
+            'ready_s': float(POD_READY_S),
+        }
+    return policies
+
+
+def load_deployment_resources(k8s_dir):
+    """{service: {'request_mc', 'limit_mc', 'request_mib'}} of the first container of every Deployment"""
+    resources = {}
+    for path in sorted(glob.glob(os.path.join(k8s_dir, '*.yaml'))):
+        for document in _yaml_documents(path):
+            if document.get('kind') != 'Deployment':
+                continue
+            containers = document.get('spec', {}).get('template', {}).get('spec', {}).get('containers') or [{}]
+            limits = containers[0].get('resources', {}).get('limits', {})
+            requests = containers[0].get('resources', {}).get('requests', {})
+            request_mc = cpu_millicores(requests['cpu']) if 'cpu' in requests else None
+            limit_mc = cpu_millicores(limits['cpu']) if 'cpu' in limits else UNLIMITED_CPU_MILLICORES
+            resources[service_name(document['metadata']['name'])] = {
+                'request_mc': request_mc or limit_mc,
+                'limit_mc': limit_mc,
+                'request_mib': memory_mib(requests['memory']) if 'memory' in requests else np.nan,
+            }
+    return resources
+
+
+def load_profile(index):
+    """Per-second VUs and request rate per service and request class from a rollup index
+
+    Also the mean latency of every request class in the light-load window, the part of the
+    latency that does not come from queueing.
+    """
+    start_ns = index.start_ns // SECOND_NS * SECOND_NS
+    n = int(-(-(index.end_ns - start_ns) // SECOND_NS))
+    grid = start_ns + np.arange(n, dtype=np.int64) * SECOND_NS
+    names = index.labels.get('name', np.full(index.n_groups, '', dtype=object))
+    classes = np.array([backend_for(name) for name in names], dtype=object)
+
+    class_rps, base_latency = {}, {}
+    light_end = index.light_load_end()
+    for request_class in PATHS:
+        groups = np.nonzero(classes == request_class)[0]
+        counts = index.second_counts(start_ns, start_ns + n * SECOND_NS, groups) if len(groups) else np.zeros(n)
+        class_rps[request_class] = counts[:n]
+        light = index.query(index.start_ns, light_end, groups)['avg'] if len(groups) else np.nan
+        if not np.isfinite(light) and len(groups):
+            light = index.query(None, None, groups)['avg']
+        base_latency[request_class] = float(light) if np.isfinite(light) else 0.0
+
+    service_rps = {'frontend': class_rps['frontend'], 'auth-svc': class_rps['auth-svc'],
+                   'user-product-svc': class_rps['user-product-svc']}
+    service_rps['api-gateway'] = class_rps['auth-svc'] + class_rps['user-product-svc']
+    vus = vus_at(grid + SECOND_NS - 1, index.vus_times, index.vus_values) if len(index.vus_times) else np.zeros(n)
+    return {
+        'start_ns': start_ns,
+        'seconds': n,
+        'vus': np.asarray(vus, dtype=np.float64),
+        'service_rps': service_rps,
+        'class_rps': class_rps,
+        'base_latency_ms': base_latency,
+    }
+
+
+def scale_profile(profile, factor):
+    """Copy of a load profile with the VUs and every request rate multiplied by factor
+
+    Scale after fit_costs: the recorded CPU has to be regressed on the recorded request rate.
+    """
+    scaled = dict(profile)
+    scaled['vus'] = profile['vus'] * factor
+    for key in ('service_rps', 'class_rps'):
+        scaled[key] = {service: rps * factor for service, rps in profile[key].items()}
+    return scaled
+
+
+def default_costs():
+    """Per-service CPU/memory costs of the synthetic runs, for services without resource samples"""
+    return {service: {'idle_mc': DEFAULT_IDLE_MILLICORES, 'cpu_ms': cpu_ms, 'idle_mib': 0.55 * memory_request,
+                      'mib_per_vu': memory_per_vu, 'fitted': False}
+            for _, service, _, _, _, memory_request, cpu_ms, memory_per_vu in CLUSTER}
+
+
+def _nonnegative_fit(pods, x, y):
+    """(per-pod, per-unit-of-x) least squares of y ~ a pods + b x with a, b >= 0"""
+    design = np.column_stack([pods, x])
+    (a, b), *_ = np.linalg.lstsq(design, y, rcond=None)
+    if a < 0:
+        a, b = 0.0, float(x @ y / (x @ x)) if x @ x > 0 else 0.0
+    if b < 0:
+        a, b = float(pods @ y / (pods @ pods)), 0.0
+    return float(a), float(max(b, 0.0))
+
+
+def fit_costs(resource_df, profile, utc_offset_minutes=None, min_samples=5):
+    """Idle CPU/memory per pod, CPU ms per request and MiB per VU of every service
+
+    resource_df is the resource_metrics CSV (one row per pod and sample, millicores and MiB).
+    Each sample's service CPU is regressed on its pod count and the request rate of the
+    preceding sync period; services with too few samples keep default_costs().
+    """
+    costs = default_costs()
+    if resource_df is None or resource_df.empty:
+        return costs
+    window = SYNC_PERIOD_S
+    for service, rows in resource_df.groupby('service', sort=False):
+        if service not in profile['service_rps']:
+            continue
+        samples = rows.groupby('timestamp').agg(cpu=('cpu_cores', 'sum'), memory=('memory_bytes', 'sum'),
+                                                pods=('pod_name', 'count')).reset_index()
+        seconds = (monitor_times_ns(samples['timestamp'], utc_offset_minutes) - profile['start_ns']) // SECOND_NS
+        keep = (seconds >= window) & (seconds < profile['seconds'])
+        if keep.sum() < min_samples:
+            continue
+        seconds = seconds[keep]
+        cumulative = np.concatenate(([0.0], np.cumsum(profile['service_rps'][service])))
+        rps = (cumulative[seconds] - cumulative[seconds - window]) / window
+        pods = samples['pods'].to_numpy(dtype=np.float64)[keep]
+        idle_mc, cpu_ms = _nonnegative_fit(pods, rps, samples['cpu'].to_numpy(dtype=np.float64)[keep])
+        idle_mib, mib_per_vu = _nonnegative_fit(pods, profile['vus'][seconds],
+                                                samples['memory'].to_numpy(dtype=np.float64)[keep])
+        costs[service] = {'idle_mc': idle_mc, 'cpu_ms': cpu_ms, 'idle_mib': idle_mib, 'mib_per_vu': mib_per_vu,
+                          'fitted': True, 'samples': int(keep.sum())}
+    return costs
+
+
+def _parse_values(text):
+    """'50,60,70' or an inclusive range 'start:stop:step'"""
+    if ':' in text:
+        start, stop, step = (float(part) for part in text.split(':'))
+        return list(np.arange(start, stop + step / 2, step))
+    return [float(value) for value in text.split(',')]
+
+
+def expand_sweep(policies, specs):
+    """Variant lanes for a grid of policy changes; lane 0 is the policy as configured
+
+    specs are 'param=values' (every service) or 'service.param=values' strings; values are a
+    comma list or start:stop:step. Returns ({service: {param: array}}, [{setting: value}] per lane).
+    """
+    axes = []
+    for spec in specs:
+        key, _, values = spec.partition('=')
+        service, _, param = key.rpartition('.')
+        if param not in PARAMETERS:
+            raise ValueError(f"unknown policy parameter {param!r} (one of {', '.join(PARAMETERS)})")
+        if service and service not in policies:
+            raise ValueError(f"no HPA for service {service!r} (one of {', '.join(policies)})")
+        if not values:
+            raise ValueError(f"{spec!r} has no values")
+        axes.append((service or None, param, _parse_values(values)))
+
+    settings = [{}] + [dict(((service, param), value) for (service, param, _), value in zip(axes, combination))
+                       for combination in itertools.product(*(values for _, _, values in axes))] if axes else [{}]
+    lanes = {}
+    for service, policy in policies.items():
+        lanes[service] = {}
+        for param in PARAMETERS:
+            column = np.full(len(settings), policy[param], dtype=np.float64)
+            for lane, setting in enumerate(settings):
+                for (target, name), value in setting.items():
+                    if name == param and target in (None, service):
+                        column[lane] = value
+            lanes[service][param] = column
+    labels = [{(f'{target}.{name}' if target else name): value for (target, name), value in setting.items()}
+              for setting in settings]
+    return lanes, labels
+
+
+def _backlog(backlog, excess):
+    """Lindley recursion b_t = max(0, b_{t-1} + x_t) over the columns of excess, for every lane at once"""
+    sums = np.cumsum(excess, axis=1)
+    return sums - np.minimum(np.minimum.accumulate(sums, axis=1), -backlog[:, None])
+
+
+def _rate_limit(spec, cumulative, tick, period, percent, pods, select, up):
+    """Replica bound of the Percent/Pods policies over each lane's period (autoscaling/v2 semantics)"""
+    back = np.clip(tick - np.ceil(period / SYNC_PERIOD_S).astype(np.int64), 0, None)
+    changed = cumulative[:, tick] - np.take_along_axis(cumulative, back[:, None], axis=1)[:, 0]
+    if up:
+        start = spec - changed
+        proposals = np.stack([np.ceil(start * (1 + percent / 100)), start + pods])
+    else:
+        start = spec + changed
+        proposals = np.stack([np.trunc(start * (1 - percent / 100)), start - pods])
+    with np.errstate(all='ignore'):
+        widest = np.nanmax(proposals, axis=0) if up else np.nanmin(proposals, axis=0)
+        narrowest = np.nanmin(proposals, axis=0) if up else np.nanmax(proposals, axis=0)
+    limit = np.where(select > 0, widest, np.where(select < 0, narrowest, spec))
+    limit = np.where(np.isnan(limit), spec, limit)
+    return np.maximum(limit, spec) if up else np.minimum(limit, spec)
+
+
+def simulate_service(rps, vus, cost, resources, lanes):
+    """Replicas, CPU utilization and queueing delay of one service for every lane
+
+    Pods share the load evenly; each runs requests on its CPU limit as an M/M/1 queue, and load
+    beyond the ready pods' capacity accumulates as a backlog that is served first.
+    """
+    n = len(rps)
+    n_lanes = len(lanes['min'])
+    ticks = -(-n // SYNC_PERIOD_S)
+    minimum, maximum = lanes['min'], np.maximum(lanes['max'], lanes['min'])
+    ready_s = np.maximum(lanes['ready_s'], 0).astype(np.int64)
+
+    usable_mc = max(resources['limit_mc'] - cost['idle_mc'], 1e-6)
+    per_pod_rps = usable_mc / cost['cpu_ms'] if cost['cpu_ms'] > 0 else np.inf
+    service_ms = cost['cpu_ms'] * 1000 / resources['limit_mc']
+
+    spec = minimum.copy()
+    ready = minimum.copy()
+    backlog = np.zeros(n_lanes)
+    arrivals = np.zeros((n_lanes, n + int(ready_s.max()) + SYNC_PERIOD_S + 1))
+    recommendations = np.zeros((n_lanes, ticks))
+    added = np.zeros((n_lanes, ticks + 1))
+    removed = np.zeros((n_lanes, ticks + 1))
+    ready_out = np.empty((n_lanes, n), dtype=np.float32)
+    spec_out = np.empty((n_lanes, n), dtype=np.float32)
+    cpu_out = np.empty((n_lanes, n), dtype=np.float32)
+    wait_out = np.empty((n_lanes, n), dtype=np.float32)
+    backlog_out = np.empty((n_lanes, n), dtype=np.float32)
+    lanes_index = np.arange(n_lanes)
+
+    for tick in range(ticks):
+        first, last = tick * SYNC_PERIOD_S, min((tick + 1) * SYNC_PERIOD_S, n)
+        pods = ready[:, None] + np.cumsum(arrivals[:, first:last], axis=1)
+        pods = np.maximum(pods, 1.0)
+        ready = pods[:, -1]
+        offered = rps[None, first:last]
+        capacity = pods * per_pod_rps
+        queued = _backlog(backlog, offered - capacity)
+        previous = np.concatenate((backlog[:, None], queued[:, :-1]), axis=1)
+        served = offered + previous - queued
+        backlog = queued[:, -1]
+
+        cpu_mc = cost['idle_mc'] * pods + cost['cpu_ms'] * served
+        cpu_percent = cpu_mc / (pods * resources['request_mc']) * 100
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.minimum(np.where(capacity > 0, served / capacity, 0.0), MAX_UTILIZATION)
+            wait = service_ms * utilization / (1 - utilization) + np.where(capacity > 0, queued / capacity, 0.0) * 1000
+        ready_out[:, first:last], spec_out[:, first:last] = pods, spec[:, None]
+        cpu_out[:, first:last], wait_out[:, first:last], backlog_out[:, first:last] = cpu_percent, wait, queued
+
+        # Recommendation from the period's mean utilization, ignoring ratios within the tolerance
+        recommendation = np.zeros(n_lanes)
+        usage = {'cpu_target': cpu_percent.mean(axis=1)}
+        if np.isfinite(resources['request_mib']):
+            memory = cost['idle_mib'] * pods + cost['mib_per_vu'] * vus[None, first:last]
+            usage['memory_target'] = (memory / (pods * resources['request_mib']) * 100).mean(axis=1)
+        for target, value in usage.items():
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratio = value / lanes[target]
+            wanted = np.where(np.abs(ratio - 1) <= TOLERANCE, spec, np.ceil(ready * ratio))
+            recommendation = np.maximum(recommendation, np.where(lanes[target] > 0, wanted, 0))
+        recommendations[:, tick] = recommendation
+
+        # Stabilization: the lowest recommendation of the scale-up window, the highest of the scale-down one
+        age = (tick - np.arange(tick)) * SYNC_PERIOD_S
+        past = recommendations[:, :tick]
+        up = np.minimum(recommendation, np.where(age < lanes['up_window'][:, None], past, np.inf).min(axis=1, initial=np.inf))
+        down = np.maximum(recommendation, np.where(age < lanes['down_window'][:, None], past, -np.inf).max(axis=1, initial=-np.inf))
+        desired = np.clip(np.minimum(np.maximum(spec, up), down), minimum, maximum)
+
+        up_limit = _rate_limit(spec, added, tick, lanes['up_period'], lanes['up_percent'],
+                               lanes['up_pods'], lanes['up_select'], True)
+        down_limit = _rate_limit(spec, removed, tick, lanes['down_period'], lanes['down_percent'],
+                                 lanes['down_pods'], lanes['down_select'], False)
+        new = np.where(desired > spec, np.minimum(desired, up_limit), np.where(desired < spec, np.maximum(desired, down_limit), spec))
+        new = np.clip(new, minimum, maximum)
+
+        growth = np.maximum(new - spec, 0)
+        if growth.any():
+            np.add.at(arrivals, (lanes_index, last + ready_s), growth)
+        shrink = np.maximum(spec - new, 0)
+        if shrink.any():
+            # Pods still starting are cancelled before ready ones are removed
+            for lane in np.nonzero(shrink)[0]:
+                remaining = shrink[lane]
+                for second in range(arrivals.shape[1] - 1, last - 1, -1):
+                    if remaining <= 0:
+                        break
+                    cancelled = min(arrivals[lane, second], remaining)
+                    arrivals[lane, second] -= cancelled
+                    remaining -= cancelled
+                ready[lane] -= remaining
+        added[:, tick + 1] = added[:, tick] + growth
+        removed[:, tick + 1] = removed[:, tick] + shrink
+        spec = new
+
+    return {
+        'ready': ready_out,
+        'spec': spec_out,
+        'cpu_percent': cpu_out,
+        'wait_ms': wait_out,
+        'backlog': backlog_out,
+    }
+
+
+def _knee_seconds(latency, threshold, sustain=KNEE_SUSTAIN_S):
+    """First second of every lane from which latency stays above threshold for `sustain` seconds (-1 = never)"""
+    over = np.nan_to_num(latency > threshold).astype(np.int32)
+    sustain = min(sustain, over.shape[1])
+    counts = np.concatenate((np.zeros((over.shape[0], 1), dtype=np.int64), np.cumsum(over, axis=1)), axis=1)
+    runs = counts[:, sustain:] - counts[:, :-sustain] == sustain
+    return np.where(runs.any(axis=1), runs.argmax(axis=1), -1)
+
+
+def simulate(profile, costs, resources, lanes):
+    """Simulate every service for every lane; returns per-service arrays and a per-lane summary"""
+    services = {}
+    for service in SERVICES:
+        if service not in lanes or service not in resources:
+            continue
+        services[service] = simulate_service(profile['service_rps'][service], profile['vus'], costs[service],
+                                             resources[service], lanes[service])
+
+    n_lanes = len(next(iter(lanes.values()))['min'])
+    n = profile['seconds']
+    total_rps = np.zeros(n)
+    weighted = np.zeros((n_lanes, n))
+    base = np.zeros(n)
+    for request_class, path in PATHS.items():
+        rps = profile['class_rps'][request_class]
+        latency = profile['base_latency_ms'][request_class] + sum(
+            services[service]['wait_ms'] for service in path if service in services)
+        weighted += rps * latency
+        base += rps * profile['base_latency_ms'][request_class]
+        total_rps += rps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        latency = np.where(total_rps > 0, weighted / total_rps, np.nan)
+        base_latency = np.where(total_rps > 0, base / total_rps, np.nan)
+
+    knee = _knee_seconds(latency, KNEE_FACTOR * base_latency)
+    loaded = total_rps > 0
+    overloaded = np.zeros((n_lanes, n), dtype=bool)
+    for result in services.values():
+        overloaded |= result['backlog'] > 1
+    summary = {
+        'knee_s': np.where(knee >= 0, knee, np.nan),
+        'knee_vus': np.where(knee >= 0, profile['vus'][np.maximum(knee, 0)], np.nan),
+        'mean_latency_ms': (weighted[:, loaded].sum(axis=1) / total_rps[loaded].sum()) if loaded.any()
+                           else np.full(n_lanes, np.nan),
+        'p95_latency_ms': np.nanpercentile(latency[:, loaded], 95, axis=1) if loaded.any() else np.full(n_lanes, np.nan),
+        'overloaded_s': overloaded.sum(axis=1),
+        'pod_hours': sum(result['ready'].sum(axis=1, dtype=np.float64) for result in services.values()) / 3600,
+    }
+    for service, result in services.items():
+        summary[f'{service}_max_replicas'] = result['spec'].max(axis=1)
+        summary[f'{service}_peak_cpu'] = result['cpu_percent'].max(axis=1)
+    return {'services': services, 'latency_ms': latency, 'base_latency_ms': base_latency, 'summary': summary}
+
+
+def replica_error(result, hpa_df, profile, lane=0, utc_offset_minutes=None):
+    """{service: (mean absolute replica error, recorded max, simulated max)} of one lane vs the recorded HPA CSV"""
+    errors = {}
+    if hpa_df is None or hpa_df.empty:
+        return errors
+    grid = profile['start_ns'] + np.arange(profile['seconds'], dtype=np.int64) * SECOND_NS
+    for name, rows in hpa_df.sort_values('timestamp').groupby('service', sort=False):
+        service = service_name(name)
+        if service not in result['services']:
+            continue
+        times_ns = monitor_times_ns(rows['timestamp'], utc_offset_minutes)
+        index = asof_index(grid, times_ns)
+        keep = (index >= 0) & (times_ns < grid[-1] + SECOND_NS)
+        if not keep.any():
+            continue
+        recorded = rows['current_replicas'].to_numpy(dtype=np.float64)[keep]
+        simulated = result['services'][service]['ready'][lane, index[keep]]
+        errors[service] = (float(np.abs(simulated - recorded).mean()), float(recorded.max()), float(simulated.max()))
+    return errors
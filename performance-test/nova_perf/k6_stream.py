@@ -0,0 +1,627 @@
+"""
+Streaming reader for k6 results files
+Decodes `k6 run --out json` Point records chunk by chunk into columnar NumPy buffers;
+plain files are memory-mapped, gzip/zstd files are decompressed as a stream
+
+Each sample costs 8 bytes (int64 ns time) + 4 (float32 value) + 2 (uint16 metric id)
++ 2 per kept tag (uint16 code): 26 bytes with the six default tags (24 before `vu` was
+added for nova_perf.omission), so the ~100M samples of a full nova-load-test.js run fit
+in about 2.6 GB. VU counts are `vus` gauge samples kept in the shared float32 value
+column, which holds integers up to 2^24 exactly; a separate uint16 VU column would
+instead add 2 bytes to every sample of every metric.
+"""
+
+import io
+import json
+import mmap
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from nova_perf.compression import compression_of, open_results, prefetch, read_blocks
+
+# Metrics the analyzers actually use; every other metric line is skipped before JSON decoding
+DEFAULT_METRICS = (
+    'http_req_duration',
+    'http_reqs',
+    'http_req_failed',
+    'vus',
+    'vus_max',
+    'iteration_duration',
+)
+
+# Tags kept for request and iteration metrics, stored as integer codes into per-tag dictionaries;
+# `vu` is only present when the script lists it in options.systemTags (nova_perf.omission)
+DEFAULT_TAGS = ('name', 'method', 'status', 'scenario', 'group', 'vu')
+TAGGED_METRICS = ('http_req_duration', 'http_reqs', 'http_req_failed', 'iteration_duration')
+
+# Storage types of the sample columns
+TIME_DTYPE = np.int64
+VALUE_DTYPE = np.float32
+CODE_DTYPE = np.uint16
+
+# Code stored for rows that do not carry a tag (the largest uint16)
+NO_TAG = np.iinfo(CODE_DTYPE).max
+
+# Tag values beyond the uint16 code space all share this last code
+TAG_OVERFLOW = '(other)'
+
+CHUNK_BYTES = 8 * 1024 * 1024
+
+# Summary exports are small; anything bigger is treated as line-delimited
+SUMMARY_MAX_BYTES = 64 * 1024 * 1024
+
+# k6 writes Point data as {"time":"...","value":...,"tags":{...}}, so the two fields we
+# need can be pulled out without building the tag dictionary
+_POINT_RE = re.compile(rb'"time":"([^"]+)","value":([-+0-9.eE]+|null)')
+_TAG_PAIR_RE = re.compile(rb'"([A-Za-z_]+)":"((?:[^"\\]|\\.)*)"')
+_TAGS_KEY = b'"tags":{'
+_METRIC_KEY = b'"metric":"'
+_POINT_TYPE = b'"type":"Point"'
+
+
+def sample_nbytes(n_tags=len(DEFAULT_TAGS)):
+    """Bytes one stored sample takes with n_tags tag columns"""
+    return (np.dtype(TIME_DTYPE).itemsize + np.dtype(VALUE_DTYPE).itemsize
+            + np.dtype(CODE_DTYPE).itemsize * (1 + n_tags))
+
+
+class GrowableColumn:
+    """Append-only NumPy column that doubles its capacity when full"""
+
+    def __init__(self, dtype, capacity=4096):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    @classmethod
+    def from_array(cls, values):
+        """Wrap an existing array (e.g. a memory map) without copying it"""
+        column = cls.__new__(cls)
+        column._data = values
+        column._size = len(values)
+        return column
+
+    def __len__(self):
+        return self._size
+
+    def append(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = values
+        self._size = end
+
+    def view(self):
+        return self._data[:self._size]
+
+    def trim(self):
+        """Release the unused capacity left by doubling"""
+        if len(self._data) > self._size:
+            self._data = self._data[:self._size].copy()
+
+
+class K6Points:
+    """Decoded k6 samples held as parallel time/value/metric columns plus coded tag columns
+
+    Columns are stored compactly (see sample_nbytes); series() and tagged_series() hand
+    out float64 values so sums over whole runs stay exact.
+    """
+
+    def __init__(self, tag_keys=DEFAULT_TAGS):
+        self.metric_names = []
+        self._metric_codes = {}
+        self.time_ns = GrowableColumn(TIME_DTYPE)
+        self.value = GrowableColumn(VALUE_DTYPE)
+        self.metric_id = GrowableColumn(CODE_DTYPE)
+        self.tag_keys = tuple(tag_keys)
+        self.tag_codes = {key: GrowableColumn(CODE_DTYPE) for key in self.tag_keys}
+        self.tag_values = {key: [] for key in self.tag_keys}
+        self._tag_lookup = {key: {} for key in self.tag_keys}
+        self.time_sorted = False
+        self.lines_read = 0
+        self.parse_seconds = 0.0
+        # Per-generator summary of a run merged from several files (nova_perf.merge)
+        self.generators = None
+
+    @classmethod
+    def from_columns(cls, metric_names, time_ns, value, metric_id, tag_values=None, tag_codes=None,
+                     time_sorted=False):
+        """Build points around already-decoded columns (no copies are made)"""
+        tag_values = tag_values or {}
+        points = cls(tag_keys=tuple(tag_values))
+        points.time_sorted = time_sorted
+        for name in metric_names:
+            points.metric_code(name)
+        points.time_ns = GrowableColumn.from_array(time_ns)
+        points.value = GrowableColumn.from_array(value)
+        points.metric_id = GrowableColumn.from_array(metric_id)
+        for key, values in tag_values.items():
+            for text in values:
+                points.tag_code(key, text)
+            points.tag_codes[key] = GrowableColumn.from_array(tag_codes[key])
+        return points
+
+    def __len__(self):
+        return len(self.value)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the sample columns (excluding spare capacity)"""
+        return (self.time_ns.view().nbytes + self.value.view().nbytes + self.metric_id.view().nbytes
+                + sum(column.view().nbytes for column in self.tag_codes.values()))
+
+    @property
+    def bytes_per_sample(self):
+        return self.nbytes / len(self) if len(self) else float(sample_nbytes(len(self.tag_keys)))
+
+    @property
+    def lines_per_second(self):
+        return self.lines_read / self.parse_seconds if self.parse_seconds > 0 else 0.0
+
+    def metric_code(self, name):
+        """Return the integer code for a metric name, registering it if needed"""
+        code = self._metric_codes.get(name)
+        if code is None:
+            code = len(self.metric_names)
+            self._metric_codes[name] = code
+            self.metric_names.append(name)
+        return code
+
+    def tag_code(self, key, text):
+        """Return the integer code of a tag value, registering it if needed"""
+        lookup = self._tag_lookup[key]
+        code = lookup.get(text)
+        if code is None:
+            values = self.tag_values[key]
+            if len(values) >= NO_TAG - 1:
+                # Code space exhausted (e.g. URLs with ids in the name tag): lump the rest together
+                if len(values) == NO_TAG - 1:
+                    lookup[TAG_OVERFLOW] = len(values)
+                    values.append(TAG_OVERFLOW)
+                return lookup[TAG_OVERFLOW]
+            code = len(values)
+            lookup[text] = code
+            values.append(text)
+        return code
+
+    def append_chunk(self, times, values, metric_ids, tag_table=None):
+        """Append one decoded chunk; tag_table is (rows, len(tag_keys)) codes or None for untagged"""
+        self.time_ns.append(times)
+        self.value.append(values)
+        self.metric_id.append(metric_ids)
+        for column, key in enumerate(self.tag_keys):
+            self.tag_codes[key].append(np.full(len(times), NO_TAG, dtype=CODE_DTYPE) if tag_table is None
+                                       else tag_table[:, column])
+        self.time_sorted = False
+
+    def sort_by_time(self):
+        """Reorder every column by time once (stable), so later queries skip their sort
+
+        File order is already almost sorted, so this is cheap; it also drops the spare capacity.
+        """
+        times = self.time_ns.view()
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind='stable')
+            self.time_ns = GrowableColumn.from_array(times[order])
+            self.value = GrowableColumn.from_array(self.value.view()[order])
+            self.metric_id = GrowableColumn.from_array(self.metric_id.view()[order])
+            for key, column in self.tag_codes.items():
+                self.tag_codes[key] = GrowableColumn.from_array(column.view()[order])
+        else:
+            for column in (self.time_ns, self.value, self.metric_id, *self.tag_codes.values()):
+                column.trim()
+        self.time_sorted = True
+        return self
+
+    def time_slice(self, start_ns, end_ns):
+        """Samples with start_ns <= time < end_ns as views into these columns (requires sort_by_time)"""
+        if not self.time_sorted:
+            raise ValueError("time_slice needs time-sorted points; call sort_by_time() first")
+        times = self.time_ns.view()
+        low, high = np.searchsorted(times, [start_ns, end_ns])
+        return K6Points.from_columns(
+            self.metric_names, times[low:high], self.value.view()[low:high], self.metric_id.view()[low:high],
+            self.tag_values, {key: column.view()[low:high] for key, column in self.tag_codes.items()},
+            time_sorted=True,
+        )
+
+    def translate(self, other):
+        """Metric ids and tag codes of another K6Points expressed in our dictionaries"""
+        metric_map = np.array([self.metric_code(name) for name in other.metric_names] or [0], dtype=CODE_DTYPE)
+        metric_ids = metric_map[other.metric_id.view()]
+        tag_codes = {}
+        for key in self.tag_keys:
+            if key not in other.tag_codes:
+                tag_codes[key] = np.full(len(other), NO_TAG, dtype=CODE_DTYPE)
+                continue
+            # Map is padded up to NO_TAG so untagged rows index straight through it
+            tag_map = np.full(NO_TAG + 1, NO_TAG, dtype=CODE_DTYPE)
+            tag_map[:len(other.tag_values[key])] = [self.tag_code(key, text) for text in other.tag_values[key]]
+            tag_codes[key] = tag_map[other.tag_codes[key].view()]
+        return metric_ids, tag_codes
+
+    def extend(self, other):
+        """Append another K6Points, translating its metric and tag codes into ours"""
+        metric_ids, tag_codes = self.translate(other)
+        self.time_ns.append(other.time_ns.view())
+        self.value.append(other.value.view())
+        self.metric_id.append(metric_ids)
+        for key in self.tag_keys:
+            self.tag_codes[key].append(tag_codes[key])
+        self.time_sorted = False
+        self.lines_read += other.lines_read
+
+    def _select(self, name):
+        code = self._metric_codes.get(name)
+        if code is None:
+            return None
+        index = np.nonzero(self.metric_id.view() == code)[0]
+        if self.time_sorted:
+            return index
+        return index[np.argsort(self.time_ns.view()[index], kind='stable')]
+
+    def series(self, name):
+        """Return (time_ns, values) for one metric, sorted by time"""
+        index = self._select(name)
+        if index is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        return self.time_ns.view()[index], self.value.view()[index].astype(np.float64)
+
+    def tagged_series(self, name, tag_keys=None):
+        """Return (time_ns, values, {tag: codes}) for one metric, sorted by time"""
+        tag_keys = self.tag_keys if tag_keys is None else tag_keys
+        index = self._select(name)
+        if index is None:
+            index = np.empty(0, dtype=np.int64)
+        return (self.time_ns.view()[index], self.value.view()[index].astype(np.float64),
+                {key: self.tag_codes[key].view()[index] for key in tag_keys})
+
+
+def _parse_time_ns(text, cache):
+    """Convert a k6 RFC 3339 timestamp (bytes) to epoch nanoseconds"""
+    # e.g. 2025-07-25T14:34:45.239531499+02:00 or 2025-07-25T12:34:45.2395Z
+    if text.endswith(b'Z'):
+        body, zone = text[:-1], b'+00:00'
+    else:
+        body, zone = text[:-6], text[-6:]
+
+    minute_key = (body[:16], zone)
+    base = cache.get(minute_key)
+    if base is None:
+        stamp = datetime.fromisoformat((body[:16] + b':00' + zone).decode())
+        base = int(stamp.timestamp()) * 1_000_000_000
+        cache[minute_key] = base
+
+    nanos = int(body[17:19]) * 1_000_000_000
+    if len(body) > 20:
+        nanos += int(body[20:29].ljust(9, b'0'))
+    return base + nanos
+
+
+class PointDecoder:
+    """Incremental decoder that appends the wanted Point records of raw lines to a K6Points"""
+
+    def __init__(self, points, metrics=DEFAULT_METRICS, tagged_metrics=TAGGED_METRICS):
+        self.points = points
+        self._wanted = {name.encode(): points.metric_code(name) for name in metrics}
+        self._tagged = {points.metric_code(name) for name in tagged_metrics if name in metrics}
+        self._tag_keys = {key.encode(): key for key in points.tag_keys}
+        self._no_tags = (NO_TAG,) * len(points.tag_keys)
+        self._tag_cache = {}
+        self._time_cache = {}
+
+    def _tag_codes(self, line):
+        """Codes for the tags of one request line (NO_TAG when absent)"""
+        start = line.find(_TAGS_KEY)
+        if start < 0:
+            return self._no_tags
+        # The same tag object repeats for every request to an endpoint, so decode each once
+        raw = line[start:line.find(b'}', start)]
+        codes = self._tag_cache.get(raw)
+        if codes is None:
+            found = dict.fromkeys(self.points.tag_keys, NO_TAG)
+            for raw_key, raw_value in _TAG_PAIR_RE.findall(raw, len(_TAGS_KEY)):
+                key = self._tag_keys.get(raw_key)
+                if key is not None:
+                    found[key] = self.points.tag_code(key, raw_value.decode('utf-8', 'replace'))
+            codes = self._tag_cache[raw] = tuple(found.values())
+        return codes
+
+    def feed(self, lines):
+        """Decode the wanted Point records from a batch of raw lines"""
+        points = self.points
+        times = []
+        values = []
+        codes = []
+        tags = []
+        for line in lines:
+            start = line.find(_METRIC_KEY)
+            if start < 0:
+                continue
+            start += len(_METRIC_KEY)
+            code = self._wanted.get(line[start:line.find(b'"', start)])
+            if code is None or _POINT_TYPE not in line:
+                continue
+
+            match = _POINT_RE.search(line)
+            if match is not None:
+                stamp, raw_value = match.group(1), match.group(2)
+                if raw_value == b'null':
+                    continue
+                value = float(raw_value)
+            else:
+                # Unusual field order - fall back to a full decode
+                try:
+                    data = json.loads(line)['data']
+                except (ValueError, KeyError):
+                    continue
+                if data.get('value') is None:
+                    continue
+                stamp, value = data['time'].encode(), float(data['value'])
+
+            times.append(_parse_time_ns(stamp, self._time_cache))
+            values.append(value)
+            codes.append(code)
+            tags.append(self._tag_codes(line) if code in self._tagged else self._no_tags)
+
+        tag_table = np.array(tags, dtype=CODE_DTYPE).reshape(len(tags), len(points.tag_keys))
+        points.append_chunk(times, values, codes, tag_table)
+        points.lines_read += len(lines)
+
+
+def is_point_stream(results_file):
+    """Return True if the file is a k6 `--out json` NDJSON point stream (plain or compressed)"""
+    with open_results(results_file) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return False
+            return isinstance(record, dict) and record.get('type') in ('Metric', 'Point')
+    return False
+
+
+def _read_range(results_file, start, end, metrics, chunk_bytes, tag_keys=DEFAULT_TAGS):
+    """Decode the lines of one newline-aligned byte range into a fresh K6Points
+
+    The file is memory-mapped and cut into newline-aligned chunks, so every chunk is split
+    into lines straight from the page cache without an intermediate read buffer.
+    """
+    points = K6Points(tag_keys)
+    decoder = PointDecoder(points, metrics)
+    if end <= start:
+        return points
+
+    with open(results_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        for chunk in _mapped_chunks(mapped, start, end, chunk_bytes):
+            decoder.feed(_split_lines(chunk))
+
+    return points
+
+
+def _split_lines(chunk):
+    lines = chunk.split(b'\n')
+    if not lines[-1].strip():
+        lines.pop()
+    return lines
+
+
+def _mapped_chunks(mapped, start, end, chunk_bytes):
+    """Newline-aligned chunks of mapped[start:end]"""
+    position = start
+    while position < end:
+        stop = min(position + chunk_bytes, end)
+        if stop < end:
+            newline = mapped.rfind(b'\n', position, stop)
+            if newline < 0:
+                # A single line longer than the chunk
+                newline = mapped.find(b'\n', stop, end)
+            stop = end if newline < 0 else newline + 1
+        yield mapped[position:stop]
+        position = stop
+
+
+def _line_chunks(blocks):
+    """Regroup arbitrary byte blocks into chunks that end on a line boundary"""
+    tail = b''
+    for block in blocks:
+        cut = block.rfind(b'\n')
+        if cut < 0:
+            tail += block
+            continue
+        yield tail + block[:cut + 1]
+        tail = block[cut + 1:]
+    if tail.strip():
+        yield tail
+
+
+def iter_line_batches(results_file, chunk_bytes=CHUNK_BYTES):
+    """Raw lines of a plain or compressed results file, one newline-aligned chunk at a time"""
+    if compression_of(results_file) is not None:
+        with open_results(results_file) as stream:
+            for chunk in prefetch(_line_chunks(read_blocks(stream, chunk_bytes))):
+                yield _split_lines(chunk)
+        return
+    if os.path.getsize(results_file) == 0:
+        return
+    with open(results_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        for chunk in _mapped_chunks(mapped, 0, len(mapped), chunk_bytes):
+            yield _split_lines(chunk)
+
+
+def _read_stream(results_file, metrics, chunk_bytes, tag_keys=DEFAULT_TAGS):
+    """Decode a compressed file, inflating the next chunk in the background meanwhile"""
+    points = K6Points(tag_keys)
+    decoder = PointDecoder(points, metrics)
+    for lines in iter_line_batches(results_file, chunk_bytes):
+        decoder.feed(lines)
+    return points
+
+
+def _compact(points):
+    """Copy of the points with the spare column capacity dropped, cheap to send between processes"""
+    return K6Points.from_columns(
+        points.metric_names, points.time_ns.view().copy(), points.value.view().copy(),
+        points.metric_id.view().copy(), points.tag_values,
+        {key: column.view().copy() for key, column in points.tag_codes.items()},
+    ), points.lines_read
+
+
+def _read_range_points(args):
+    """Process-pool entry point: decode one byte range and return compact columns"""
+    return _compact(_read_range(*args))
+
+
+def _decode_chunk_points(args):
+    """Process-pool entry point: decode one chunk of already decompressed lines"""
+    chunk, metrics, tag_keys = args
+    points = K6Points(tag_keys)
+    PointDecoder(points, metrics).feed(_split_lines(chunk))
+    return _compact(points)
+
+
+def split_ranges(results_file, parts):
+    """Split a file into `parts` byte ranges whose boundaries fall just after a newline"""
+    size = os.path.getsize(results_file)
+    bounds = [0]
+    with open(results_file, 'rb') as f:
+        for i in range(1, parts):
+            target = max(size * i // parts, bounds[-1])
+            f.seek(target)
+            f.readline()  # advance to the start of the next line
+            bounds.append(min(f.tell(), size))
+    bounds.append(size)
+    return [(low, high) for low, high in zip(bounds, bounds[1:]) if high > low]
+
+
+def read_k6_points(results_file, metrics=DEFAULT_METRICS, chunk_bytes=CHUNK_BYTES, workers=1,
+                   tag_keys=DEFAULT_TAGS):
+    """Stream a k6 NDJSON point file into columnar buffers in a single pass
+
+    With workers > 1 the file is cut into newline-aligned byte ranges that are decoded
+    in a process pool; the columns are concatenated in file order, so the result is
+    identical to the single-process read (tag codes are remapped to a single dictionary).
+    """
+    started = time.perf_counter()
+    compressed = compression_of(results_file) is not None
+    if workers <= 1:
+        if compressed:
+            points = _read_stream(results_file, metrics, chunk_bytes, tag_keys)
+        else:
+            points = _read_range(results_file, 0, os.path.getsize(results_file), metrics, chunk_bytes, tag_keys)
+        points.sort_by_time()
+        points.parse_seconds = time.perf_counter() - started
+        return points
+
+    points = K6Points(tag_keys)
+    for name in metrics:
+        points.metric_code(name)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if compressed:
+            parts = _decode_stream_parallel(pool, results_file, metrics, chunk_bytes, tag_keys, workers)
+        else:
+            # A few ranges per worker keeps the pool busy when some ranges are denser than others
+            ranges = split_ranges(results_file, workers * 4)
+            jobs = [(results_file, low, high, metrics, chunk_bytes, tag_keys) for low, high in ranges]
+            parts = pool.map(_read_range_points, jobs)
+        for part, lines_read in parts:
+            part.lines_read = lines_read
+            points.extend(part)
+    points.sort_by_time()
+    points.parse_seconds = time.perf_counter() - started
+
+    return points
+
+
+def _decode_stream_parallel(pool, results_file, metrics, chunk_bytes, tag_keys, workers):
+    """Decompress in this process and decode the line chunks in the pool, in file order
+
+    A compressed stream cannot be cut into byte ranges, so only the decoding is spread out;
+    at most two chunks per worker are in flight to bound memory.
+    """
+    pending = deque()
+    with open_results(results_file) as stream:
+        for chunk in prefetch(_line_chunks(read_blocks(stream, chunk_bytes))):
+            pending.append(pool.submit(_decode_chunk_points, (chunk, metrics, tag_keys)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def read_k6_summary(results_file):
+    """Load a k6 end-of-test summary (summary-export JSON or a trailing summary line)"""
+    head = b''
+    if compression_of(results_file) is not None or os.path.getsize(results_file) <= SUMMARY_MAX_BYTES:
+        with open_results(results_file) as f:
+            head = f.read(SUMMARY_MAX_BYTES + 1)
+    if head and len(head) <= SUMMARY_MAX_BYTES:
+        try:
+            data = json.loads(head)
+            if isinstance(data, dict) and 'metrics' in data:
+                return data
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            pass
+
+    # Line-delimited (or compressed) file: keep only the last summary-looking line while streaming forward
+    data = None
+    with io.TextIOWrapper(open_results(results_file), encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if line and line.startswith('{') and 'metrics' in line:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+    if data is None:
+        raise ValueError("Could not find valid k6 summary data in results file")
+    return data
+
+
+def summarize_points(points):
+    """Reduce decoded points to the headline numbers of a k6 end-of-test summary"""
+    _, durations = points.series('http_req_duration')
+    _, req_counts = points.series('http_reqs')
+    _, failed = points.series('http_req_failed')
+    _, vus = points.series('vus')
+    _, vus_max = points.series('vus_max')
+
+    all_times = points.time_ns.view()
+    duration_s = (all_times.max() - all_times.min()) / 1e9 if len(all_times) else 0.0
+    total_requests = int(req_counts.sum()) if len(req_counts) else len(durations)
+
+    if len(durations):
+        p50, p90, p95, p99 = np.percentile(durations, [50, 90, 95, 99])
+        avg, peak = durations.mean(), durations.max()
+    else:
+        p50 = p90 = p95 = p99 = avg = peak = 0.0
+
+    return {
+        'p50': float(p50),
+        'p90': float(p90),
+        'p95': float(p95),
+        'p99': float(p99),
+        'avg': float(avg),
+        'max': float(peak),
+        'total_requests': total_requests,
+        'rps': total_requests / duration_s if duration_s > 0 else 0.0,
+        'max_vus': int(vus.max()) if len(vus) else 0,
+        'vus_max': int(vus_max.max()) if len(vus_max) else 0,
+        'error_rate': float(failed.mean()) if len(failed) else 0.0,
+        'duration_s': float(duration_s),
+    }
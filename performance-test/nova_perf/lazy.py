@@ -0,0 +1,24 @@
+"""
+Deferred imports of the heavy analysis dependencies
+pandas, matplotlib and seaborn are only loaded by the code paths that actually need them,
+so --help, headless runs and follow mode start without paying for them
+"""
+
+import functools
+
+
+@functools.lru_cache(maxsize=None)
+def pandas():
+    import pandas
+    return pandas
+
+
+@functools.lru_cache(maxsize=None)
+def pyplot():
+    """matplotlib.pyplot with the report style applied on first use"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.style.use('seaborn-v0_8')
+    sns.set_palette("husl")
+    return plt
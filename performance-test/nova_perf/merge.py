@@ -0,0 +1,294 @@
+"""
+Merging the results of several k6 load generators into one run
+Every generator's file is decoded chunk by chunk and the chunks are merged in time order up
+to a watermark (the earliest "latest sample" among the files), so only about one chunk per
+file is held besides the merged columns. Clock skew between hosts is estimated from the VU
+ramps, which all generators run in lockstep, and VUs are summed across generators.
+"""
+
+import os
+import re
+import time
+
+import numpy as np
+
+from nova_perf.compression import SUFFIXES
+from nova_perf.k6_stream import (
+    CHUNK_BYTES, CODE_DTYPE, DEFAULT_METRICS, DEFAULT_TAGS, NO_TAG, K6Points, PointDecoder, iter_line_batches,
+    read_k6_points,
+)
+from nova_perf.stages import group_stats
+
+SECOND_NS = 1_000_000_000
+
+# Tag column that records which generator a request came from
+GENERATOR_TAG = 'generator'
+
+# Gauges that are per generator in every file and summed in the merged run
+SUMMED_GAUGES = ('vus', 'vus_max')
+
+# Clock skews are searched within +-MAX_SKEW_S on a SKEW_STEP_S grid
+MAX_SKEW_S = 120
+SKEW_STEP_S = 0.1
+
+# Estimated skews below this are within the estimate's noise and are not corrected
+SKEW_TOLERANCE_S = 0.25
+
+# A generator is reported as the bottleneck when its p95 exceeds its peers' by this factor,
+# or its requests per VU-second fall below theirs by this factor
+GENERATOR_P95_FACTOR = 1.5
+GENERATOR_RATE_FACTOR = 0.8
+
+_RESULTS_SUFFIX_RE = re.compile(r'(_results)?\.json$')
+
+
+def generator_names(paths):
+    """Short unique names for the generators behind a list of results files"""
+    names = []
+    for path in paths:
+        name = os.path.basename(path)
+        for suffix in SUFFIXES.values():
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        names.append(_RESULTS_SUFFIX_RE.sub('', name) or name)
+    if len(set(names)) < len(names):
+        names = [f'{name}#{i + 1}' for i, name in enumerate(names)]
+    return names
+
+
+def _vu_curve(times_ns, values, grid_ns):
+    """VU series interpolated on a grid and scaled to its peak (generators may run unequal shares)"""
+    curve = np.interp(grid_ns, times_ns, values, left=0.0, right=float(values[-1]))
+    peak = curve.max()
+    return curve / peak if peak > 0 else curve
+
+
+def estimate_skews(vu_series, max_skew_s=MAX_SKEW_S, step_s=SKEW_STEP_S):
+    """Clock offset of every generator relative to the first one, in seconds (NaN when unknown)
+
+    The offset is the lag that best aligns the derivative of a generator's normalized VU
+    curve with the reference's (FFT cross-correlation, refined with a parabola through the
+    peak). This assumes the generators were started together, e.g. with execution segments;
+    a late start is indistinguishable from a clock running behind.
+    """
+    skews = np.full(len(vu_series), np.nan)
+    if not vu_series or len(vu_series[0][0]) < 2:
+        return skews
+    skews[0] = 0.0
+    step_ns = int(step_s * SECOND_NS)
+    low = min(times[0] for times, _ in vu_series if len(times)) - max_skew_s * SECOND_NS
+    high = max(times[-1] for times, _ in vu_series if len(times)) + max_skew_s * SECOND_NS
+    grid = np.arange(low, high, step_ns, dtype=np.int64)
+    reference = np.diff(_vu_curve(*vu_series[0], grid))
+    size = 1 << int(2 * len(reference) - 1).bit_length()
+    reference_fft = np.fft.rfft(reference, size)
+    max_lag = int(max_skew_s / step_s)
+
+    for i, (times, values) in enumerate(vu_series[1:], start=1):
+        if len(times) < 2:
+            continue
+        slope = np.diff(_vu_curve(times, values, grid))
+        if not slope.any() or not reference.any():
+            continue
+        # correlation[lag] = sum(reference[t] * slope[t + lag]), negative lags wrap around
+        correlation = np.fft.irfft(np.conj(reference_fft) * np.fft.rfft(slope, size), size)
+        lags = np.arange(-max_lag, max_lag + 1)
+        scores = correlation[lags % size]
+        best = int(np.argmax(scores))
+        shift = float(lags[best])
+        if 0 < best < len(scores) - 1:
+            left, centre, right = scores[best - 1:best + 2]
+            curvature = left - 2 * centre + right
+            if curvature < 0:
+                shift += 0.5 * (left - right) / curvature
+        skews[i] = shift * step_s
+    return skews
+
+
+def summed_gauge(series):
+    """As-of sum of one gauge across generators: (times, totals) at every sample of any of them"""
+    times = np.concatenate([times for times, _ in series])
+    values = np.concatenate([values for _, values in series])
+    source = np.concatenate([np.full(len(times), i) for i, (times, _) in enumerate(series)])
+    order = np.argsort(times, kind='stable')
+    times, values, source = times[order], values[order], source[order]
+
+    # Each sample replaces its generator's previous value, so the total moves by the difference
+    previous = np.zeros(len(values))
+    for i in range(len(series)):
+        rows = np.nonzero(source == i)[0]
+        previous[rows[1:]] = values[rows[:-1]]
+    return times, np.cumsum(values - previous)
+
+
+def _decoded_chunks(path, output, metrics, tag_keys, generator, shift_ns, chunk_bytes):
+    """Time-sorted chunks of one generator's file, with codes translated into `output`"""
+    for lines in iter_line_batches(path, chunk_bytes):
+        part = K6Points(tag_keys)
+        PointDecoder(part, metrics).feed(lines)
+        output.lines_read += len(lines)
+        if not len(part):
+            continue
+        metric_ids, tag_codes = output.translate(part)
+        tag_codes[GENERATOR_TAG] = np.full(len(part), generator, dtype=CODE_DTYPE)
+        times = part.time_ns.view() - shift_ns
+        order = np.argsort(times, kind='stable')
+        yield [times[order], part.value.view()[order], metric_ids[order],
+               {key: codes[order] for key, codes in tag_codes.items()}]
+
+
+def _gauge_chunk(output, name, times, values):
+    tags = {key: np.full(len(times), NO_TAG, dtype=CODE_DTYPE) for key in output.tag_keys}
+    return [times, values, np.full(len(times), output.metric_code(name), dtype=CODE_DTYPE), tags]
+
+
+def _take(chunk, count):
+    """Split the first `count` rows off a chunk"""
+    head = [chunk[0][:count], chunk[1][:count], chunk[2][:count], {k: v[:count] for k, v in chunk[3].items()}]
+    chunk[:] = [chunk[0][count:], chunk[1][count:], chunk[2][count:], {k: v[count:] for k, v in chunk[3].items()}]
+    return head
+
+
+def _append_merged(output, heads):
+    """Append the rows taken from every source in time order"""
+    heads = [head for head in heads if len(head[0])]
+    if not heads:
+        return
+    times = np.concatenate([head[0] for head in heads])
+    # The heads are sorted runs, which the stable sort merges rather than re-sorts
+    order = np.argsort(times, kind='stable')
+    output.time_ns.append(times[order])
+    output.value.append(np.concatenate([head[1] for head in heads])[order])
+    output.metric_id.append(np.concatenate([head[2] for head in heads])[order])
+    for key in output.tag_keys:
+        output.tag_codes[key].append(np.concatenate([head[3][key] for head in heads])[order])
+
+
+def kway_merge(output, sources):
+    """Merge time-sorted chunk iterators into `output`, holding about one chunk per source
+
+    Everything up to the smallest last-timestamp among the buffered chunks is final; the
+    source that set that watermark is drained and refilled next. Samples a file writes out
+    of order across chunk boundaries are put right by the caller's sort_by_time().
+    """
+    buffers = [None] * len(sources)
+    active = set(range(len(sources)))
+
+    def refill(i):
+        for chunk in sources[i]:
+            if len(chunk[0]):
+                buffers[i] = chunk
+                return
+        buffers[i] = None
+        active.discard(i)
+
+    for i in range(len(sources)):
+        refill(i)
+    while active:
+        watermark = min(buffers[i][0][-1] for i in active)
+        heads = [_take(chunk, int(np.searchsorted(chunk[0], watermark, side='right')))
+                 for chunk in buffers if chunk is not None]
+        _append_merged(output, heads)
+        for i in list(active):
+            if not len(buffers[i][0]):
+                refill(i)
+    _append_merged(output, [chunk for chunk in buffers if chunk is not None])
+
+
+def merge_k6_points(paths, metrics=DEFAULT_METRICS, chunk_bytes=CHUNK_BYTES, tag_keys=DEFAULT_TAGS,
+                    correct_skew=True):
+    """Merge the point streams of several generators into one time-sorted K6Points
+
+    A first pass reads only the VU gauges to estimate clock skews and the summed VU series; the
+    second pass streams the request samples through the k-way merge with each file's skew
+    removed. The result carries a `generator` tag column and a `generators` summary dict.
+    """
+    started = time.perf_counter()
+    names = generator_names(paths)
+    gauges = [name for name in SUMMED_GAUGES if name in metrics]
+    gauge_points = [read_k6_points(path, metrics=gauges, chunk_bytes=chunk_bytes, tag_keys=()) for path in paths]
+    vu_series = [points.series('vus') for points in gauge_points]
+
+    skews = estimate_skews(vu_series)
+    applied = np.where(correct_skew & np.isfinite(skews) & (np.abs(skews) >= SKEW_TOLERANCE_S), skews, 0.0)
+    shifts = (applied * SECOND_NS).astype(np.int64)
+
+    output = K6Points(tuple(tag_keys) + (GENERATOR_TAG,))
+    for name in metrics:
+        output.metric_code(name)
+    for name in names:
+        output.tag_code(GENERATOR_TAG, name)
+    request_metrics = [name for name in metrics if name not in gauges]
+    sources = [_decoded_chunks(path, output, request_metrics, tag_keys, i, shift, chunk_bytes)
+               for i, (path, shift) in enumerate(zip(paths, shifts))]
+
+    max_vus, vu_seconds = [], []
+    for gauge in gauges:
+        series = [(times - shift, values) for (times, values), shift
+                  in zip((points.series(gauge) for points in gauge_points), shifts) if len(times)]
+        if gauge == 'vus':
+            max_vus = [float(values.max()) if len(values) else 0.0 for _, values in vu_series]
+            vu_seconds = [float(np.sum(values[:-1] * np.diff(times)) / SECOND_NS) if len(values) > 1 else 0.0
+                          for times, values in vu_series]
+        if series:
+            sources.append(iter([_gauge_chunk(output, gauge, *summed_gauge(series))]))
+
+    kway_merge(output, sources)
+    output.sort_by_time()
+    output.parse_seconds = time.perf_counter() - started
+    output.generators = {
+        'names': names,
+        'skew_s': [float(skew) for skew in skews],
+        'corrected': [bool(shift) for shift in shifts],
+        'max_vus': max_vus or [0.0] * len(names),
+        'vu_seconds': vu_seconds or [0.0] * len(names),
+    }
+    return output
+
+
+def generator_table(points):
+    """Throughput, percentiles and error rate per generator, with the likely bottleneck flagged
+
+    A generator that is itself saturated (CPU, sockets) shows up as higher latency and fewer
+    requests per VU than its peers, which hit the same backend at the same time.
+    """
+    info = getattr(points, 'generators', None)
+    if not info or GENERATOR_TAG not in points.tag_keys:
+        return None
+    n = len(info['names'])
+    times, durations, tags = points.tagged_series('http_req_duration', (GENERATOR_TAG,))
+    generator = tags[GENERATOR_TAG].astype(np.int64)
+    known = generator < n
+    times, durations, generator = times[known], durations[known], generator[known]
+
+    seconds = np.zeros(n)
+    for i in range(n):
+        mine = times[generator == i]
+        seconds[i] = (mine[-1] - mine[0]) / 1e9 if len(mine) > 1 else 0.0
+    stats = group_stats(generator, durations, None, n, seconds)
+
+    _, failed, fail_tags = points.tagged_series('http_req_failed', (GENERATOR_TAG,))
+    fail_generator = fail_tags[GENERATOR_TAG].astype(np.int64)
+    known = fail_generator < n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats['error_rate'] = (np.bincount(fail_generator[known], weights=failed[known], minlength=n)
+                               / np.bincount(fail_generator[known], minlength=n))
+        vu_seconds = np.array(info['vu_seconds'])
+        stats['requests_per_vu_s'] = np.where(vu_seconds > 0, stats['requests'] / vu_seconds, np.nan)
+
+    stats['generator'] = np.array(info['names'])
+    stats['skew_s'] = np.array(info['skew_s'])
+    stats['corrected'] = np.array(info['corrected'])
+    stats['max_vus'] = np.array(info['max_vus'])
+    stats['bottleneck'] = np.full(n, '', dtype=object)
+    for i in range(n if n > 1 else 0):
+        peers = np.arange(n) != i
+        p95 = np.nanmedian(stats['p95'][peers])
+        rate = np.nanmedian(stats['requests_per_vu_s'][peers])
+        reasons = []
+        if stats['p95'][i] > GENERATOR_P95_FACTOR * p95:
+            reasons.append(f"p95 {stats['p95'][i] / p95:.1f}x its peers")
+        if stats['requests_per_vu_s'][i] < GENERATOR_RATE_FACTOR * rate:
+            reasons.append(f"{stats['requests_per_vu_s'][i] / rate:.0%} of its peers' requests per VU")
+        stats['bottleneck'][i] = ', '.join(reasons)
+    return stats
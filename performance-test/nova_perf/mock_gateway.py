@@ -0,0 +1,399 @@
+"""
+Local stand-in for the Nova API gateway
+An asyncio HTTP/1.1 server with the routes nova-load-test.js calls, answering after a sampled
+service time; routes that reach the database hold one connection of a bounded pool for their
+service time, so past the pool's throughput requests queue and then fail with 503 the way the
+db-f1-micro instance runs out of connections. The model can be fitted to a recorded run.
+"""
+
+import asyncio
+import json
+import math
+import random
+import signal
+import time
+import uuid
+from collections import deque
+
+from nova_perf.endpoints import endpoint_path
+from nova_perf.synthetic import ENDPOINTS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+
+# Cloud SQL db-f1-micro accepts 25 connections
+DEFAULT_POOL_SIZE = 25
+
+# Longest a request waits for a database connection before the gateway answers 503
+DEFAULT_POOL_TIMEOUT_S = 5.0
+
+# Spread (log-space standard deviation) of the service times, as in the synthetic runs
+DEFAULT_SIGMA = 0.35
+
+STATUS_INTERVAL_S = 10.0
+
+# Gateway routes the load script uses (nova-backend-api-gateway/main.go): route key, method,
+# path (a trailing '/' matches any id below it) and whether the handler reaches the database
+ROUTES = (
+    ('GET /', 'GET', '', False),
+    ('GET /favicon.ico', 'GET', '/favicon.ico', False),
+    ('GET /api/country-codes', 'GET', '/api/country-codes', True),
+    ('POST /api/login', 'POST', '/api/login', True),
+    ('POST /api/logout', 'POST', '/api/logout', False),
+    ('POST /api/users', 'POST', '/api/users', True),
+    ('GET /api/users/{user_id}', 'GET', '/api/users/', True),
+)
+
+# Fitting: fewest requests a route estimate is read from
+MIN_FIT_REQUESTS = 20
+
+# Window of the throughput series the saturation throughput is read from
+SATURATION_WINDOW_S = 10
+
+# A run queued on the pool when some window's database p50 exceeded this multiple of the light-load p50
+SATURATION_FACTOR = 2.0
+
+# An unsaturated run only bounds the pool from below; the fitted pool gets this much headroom
+UNSATURATED_HEADROOM = 2.0
+
+# z-score of the 90th percentile of a normal distribution
+_Z90 = 1.2815515655446004
+
+_REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 409: 'Conflict', 503: 'Service Unavailable'}
+
+_COUNTRY_CODES = json.dumps([
+    {'id': 'eaa26500-4572-4ca8-8f32-03b0daaf02ce', 'code': '+1', 'country': 'United States'},
+    {'id': '3c0b7ab4-5f6e-4a43-9b1e-1f4a3a6c2d10', 'code': '+44', 'country': 'United Kingdom'},
+    {'id': '8f1d2c3b-4a5e-4f60-8a7b-9c0d1e2f3a4b', 'code': '+57', 'country': 'Colombia'},
+]).encode()
+
+
+def route_for(method, path):
+    """Route key of a request, None for paths the gateway does not serve"""
+    path = path.rstrip('/') if path != '/' else ''
+    for key, route_method, route_path, _ in ROUTES:
+        if route_path.endswith('/'):
+            matched = path.startswith(route_path) and '/' not in path[len(route_path):]
+        else:
+            matched = path == route_path
+        if matched and method.upper() == route_method:
+            return key
+    return None
+
+
+def default_model():
+    """Service-time model from the synthetic endpoint medians and a db-f1-micro sized pool"""
+    medians = {route_for(method, path or '/'): median for method, path, _, _, median, _ in ENDPOINTS}
+    return {
+        'routes': {key: {'median_ms': medians.get(key, 10.0), 'sigma': DEFAULT_SIGMA, 'db': db}
+                   for key, _, _, db in ROUTES},
+        'pool_size': DEFAULT_POOL_SIZE,
+        'pool_timeout_s': DEFAULT_POOL_TIMEOUT_S,
+        'source': 'defaults',
+    }
+
+
+def load_model(path):
+    """Model saved with save_model(); routes missing from the file keep their defaults"""
+    model = default_model()
+    with open(path) as f:
+        saved = json.load(f)
+    routes = model['routes']
+    routes.update({key: {**routes.get(key, {'sigma': DEFAULT_SIGMA, 'db': False}), **route}
+                   for key, route in saved.pop('routes', {}).items()})
+    model.update(saved)
+    return model
+
+
+def save_model(model, path):
+    with open(path, 'w') as f:
+        json.dump(model, f, indent=2)
+    return path
+
+
+def _route_groups(index):
+    """Rollup group ids of every route key, split into answered (< 500) and failed requests"""
+    answered, failed = {}, {}
+    for group in range(index.n_groups):
+        method = index.labels['method'][group] if 'method' in index.labels else ''
+        name = index.labels['name'][group] if 'name' in index.labels else ''
+        status = index.labels['status'][group] if 'status' in index.labels else ''
+        key = route_for(method, endpoint_path(name))
+        if key is None:
+            continue
+        target = failed if status.isdigit() and int(status) >= 500 else answered
+        target.setdefault(key, []).append(group)
+    return answered, failed
+
+
+def fit_model(index):
+    """Model fitted to a recorded run's rollup index (nova_perf.rollup)
+
+    Route medians and spreads come from the light-load window; the pool is sized so that it
+    saturates at the highest database throughput the run sustained (Little's law,
+    connections = throughput x mean hold time) and the pool timeout is the median latency
+    of the failed database requests when they failed slowly.
+    """
+    model = default_model()
+    answered, failed = _route_groups(index)
+    light_end = index.light_load_end()
+    for key, groups in answered.items():
+        route = model['routes'][key]
+        light = index.query(index.start_ns, light_end, groups)
+        if light['requests'] < MIN_FIT_REQUESTS:
+            light = index.query(None, None, groups)
+        if light['requests'] < MIN_FIT_REQUESTS:
+            continue
+        p50, p90 = light['sketch'].quantiles([0.5, 0.9])
+        route['median_ms'] = round(float(max(p50, 0.1)), 2)
+        spread = math.log(p90 / p50) / _Z90 if p50 > 0 and p90 > p50 else DEFAULT_SIGMA
+        route['sigma'] = round(min(max(spread, 0.05), 1.5), 3)
+        route['requests'] = light['requests']
+
+    db_keys = [key for key, _, _, db in ROUTES if db]
+    db_groups = sorted(group for key in db_keys for group in answered.get(key, []) + failed.get(key, []))
+    model['source'] = ', '.join(entry[0] for entry in index.meta.get('source', [])) or 'rollup index'
+    if not db_groups:
+        return model
+
+    # Mean hold time of a connection, weighted by how often each route was called
+    calls = {key: index.query(None, None, answered[key])['requests'] for key in db_keys if key in answered}
+    total_calls = sum(calls.values())
+    if not total_calls:
+        return model
+    hold_s = sum(count * model['routes'][key]['median_ms'] * math.exp(model['routes'][key]['sigma'] ** 2 / 2)
+                 for key, count in calls.items()) / total_calls / 1000
+
+    windows = index.window_series(SATURATION_WINDOW_S, db_groups)
+    busy = windows['requests'] >= MIN_FIT_REQUESTS
+    if not busy.any():
+        return model
+    peak_rps = float(windows['rps'][busy].max())
+    light_p50 = index.query(index.start_ns, light_end, db_groups)['sketch'].quantile(0.5)
+    saturated = bool(light_p50 > 0 and (windows['p50'][busy] > SATURATION_FACTOR * light_p50).any())
+    connections = peak_rps * hold_s * (1.0 if saturated else UNSATURATED_HEADROOM)
+    model['pool_size'] = max(1, int(math.ceil(connections)))
+    model['saturated'] = saturated
+    model['peak_db_rps'] = round(peak_rps, 1)
+
+    failed_groups = sorted(group for key in db_keys for group in failed.get(key, []))
+    if failed_groups:
+        failures = index.query(None, None, failed_groups)
+        failed_p50 = failures['sketch'].quantile(0.5)
+        served_p50 = index.query(None, None, sorted(set(db_groups) - set(failed_groups)))['sketch'].quantile(0.5)
+        # Failures no slower than the served requests were not waiting for a connection
+        if failures['requests'] >= MIN_FIT_REQUESTS and failed_p50 > SATURATION_FACTOR * served_p50:
+            model['pool_timeout_s'] = round(float(failed_p50) / 1000, 3)
+    return model
+
+
+class ConnectionPool:
+    """Bounded pool of database connections with FIFO waiters and an acquire timeout"""
+
+    def __init__(self, size, timeout_s):
+        self.size = size
+        self.timeout_s = timeout_s
+        self.in_use = 0
+        self.waiters = deque()
+        self.peak_in_use = 0
+        self.peak_waiting = 0
+        self.timeouts = 0
+
+    async def acquire(self):
+        """True once a connection is held, False when the wait timed out"""
+        if self.in_use < self.size and not self.waiters:
+            self._take()
+            return True
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self.waiters.append(waiter)
+        self.peak_waiting = max(self.peak_waiting, len(self.waiters))
+        timer = loop.call_later(self.timeout_s, self._expire, waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # Cancelled after the connection was handed over: give it back
+            if waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+
+    def _take(self):
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _expire(self, waiter):
+        if not waiter.done():
+            self.waiters.remove(waiter)
+            self.timeouts += 1
+            waiter.set_result(False)
+
+    def release(self):
+        self.in_use -= 1
+        # Hand the connection straight to the oldest waiter still waiting
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                self._take()
+                waiter.set_result(True)
+                return
+
+
+class MockGateway:
+    """Routes, service-time sampling and counters of one mock gateway process"""
+
+    def __init__(self, model, latency_scale=1.0, seed=None):
+        self.model = model
+        self.latency_scale = latency_scale
+        self.random = random.Random(seed)
+        self.pool = ConnectionPool(model['pool_size'], model['pool_timeout_s'])
+        self.users = set()
+        self.requests = {}
+        self.rejected = 0
+        self.connections = 0
+        self.started = time.monotonic()
+
+    def service_time(self, key):
+        route = self.model['routes'][key]
+        return route['median_ms'] / 1000 * self.latency_scale * self.random.lognormvariate(0.0, route['sigma'])
+
+    def _respond(self, key, body):
+        """(status, extra headers, payload) of a served route"""
+        if key == 'GET /':
+            return 200, (), b'OK'
+        if key == 'GET /favicon.ico':
+            return 204, (), b''
+        if key == 'GET /api/country-codes':
+            return 200, (), _COUNTRY_CODES
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            return 400, (), b'{"error":"invalid JSON body"}'
+        email = payload.get('email') if isinstance(payload, dict) else None
+        if key == 'POST /api/login':
+            if email not in self.users:
+                return 404, (), b'{"error":"user not found"}'
+            cookie = f'Set-Cookie: accessToken={uuid.uuid4().hex}; Path=/; HttpOnly'
+            return 200, (cookie,), b'{"message":"login successful"}'
+        if key == 'POST /api/logout':
+            return 200, ('Set-Cookie: accessToken=; Path=/; Max-Age=0',), b'{"message":"logged out"}'
+        if key == 'POST /api/users':
+            if not email:
+                return 400, (), b'{"error":"email is required"}'
+            if email in self.users:
+                return 409, (), b'{"error":"user already exists"}'
+            self.users.add(email)
+            return 201, (), json.dumps({'id': str(uuid.uuid5(uuid.NAMESPACE_URL, email)), 'email': email}).encode()
+        return 200, (), json.dumps({'id': 'test-user-id', 'first_name': 'Test', 'last_name': 'User'}).encode()
+
+    async def handle(self, method, path, body):
+        """Serve one request after its service time (and database connection wait)"""
+        key = route_for(method, path)
+        if key is None:
+            allowed = any(route_for(other, path) for other in ('GET', 'POST'))
+            return (405 if allowed else 404), (), b'{"error":"not found"}'
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if not self.model['routes'][key]['db']:
+            await asyncio.sleep(self.service_time(key))
+            return self._respond(key, body)
+        if not await self.pool.acquire():
+            self.rejected += 1
+            return 503, (), b'{"error":"database connection pool exhausted"}'
+        try:
+            await asyncio.sleep(self.service_time(key))
+            return self._respond(key, body)
+        finally:
+            self.pool.release()
+
+    async def serve_connection(self, reader, writer):
+        """HTTP/1.1 keep-alive loop of one client connection"""
+        self.connections += 1
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if 'chunked' in headers.get('transfer-encoding', ''):
+                    status, extra, payload = 400, (), b'{"error":"chunked bodies are not supported"}'
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+                    status, extra, payload = await self.handle(method, target.split('?', 1)[0], body)
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+                head = [f'HTTP/1.1 {status} {_REASONS.get(status, "Unknown")}',
+                        'Content-Type: application/json' if payload[:1] in (b'{', b'[') else 'Content-Type: text/plain',
+                        f'Content-Length: {len(payload)}',
+                        'Connection: keep-alive' if keep_alive else 'Connection: close', *extra]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def status_line(self):
+        served = sum(self.requests.values())
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return (f"📡 {served:,} requests ({served / elapsed:.0f}/s), {self.connections} connections, "
+                f"pool {self.pool.in_use}/{self.pool.size} busy, {len(self.pool.waiters)} waiting, "
+                f"{self.rejected:,} rejected")
+
+
+async def serve(model, host=DEFAULT_HOST, port=DEFAULT_PORT, latency_scale=1.0, seed=None,
+                duration=None, status_interval=STATUS_INTERVAL_S):
+    """Serve until SIGINT/SIGTERM (or `duration` seconds); returns the gateway counters"""
+    gateway = MockGateway(model, latency_scale, seed)
+    server = await asyncio.start_server(gateway.serve_connection, host, port, backlog=4096)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    bound = ', '.join(f'{address[0]}:{address[1]}' for address in (sock.getsockname() for sock in server.sockets))
+    print(f"🚀 Mock Nova gateway listening on {bound}", flush=True)
+    deadline = None if duration is None else loop.time() + duration
+    async with server:
+        while not stop.is_set():
+            timeout = status_interval or None
+            if deadline is not None:
+                timeout = min(timeout or math.inf, max(deadline - loop.time(), 0))
+            try:
+                await asyncio.wait_for(stop.wait(), timeout)
+            except asyncio.TimeoutError:
+                if deadline is not None and loop.time() >= deadline:
+                    break
+                print(gateway.status_line(), flush=True)
+
+    return {
+        'requests': dict(gateway.requests),
+        'rejected': gateway.rejected,
+        'peak_in_use': gateway.pool.peak_in_use,
+        'peak_waiting': gateway.pool.peak_waiting,
+        'users': len(gateway.users),
+        'seconds': time.monotonic() - gateway.started,
+    }
+
+
+def run_gateway(model, **options):
+    """Blocking entry point for the mock gateway CLI"""
+    try:
+        return asyncio.run(serve(model, **options))
+    except KeyboardInterrupt:
+        return None
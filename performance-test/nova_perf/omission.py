@@ -0,0 +1,191 @@
+"""
+Coordinated-omission correction of a closed-model run
+nova-load-test.js runs ramping VUs that sleep between requests, so a VU stuck on a slow response
+stops sending and the requests it was due to send are never measured. The light-load iteration
+time gives the pacing every VU intended; with `vu` tags each VU's request sequence is replayed
+against that schedule wrk2-style (a late request goes out as soon as the previous one returns and
+its latency counts from when it was due), without them every slow response is back-filled with
+the requests it held up (HdrHistogram's expected-interval correction). Offered vs achieved request
+rate per stage shows how much of the intended load the run failed to apply.
+"""
+
+import numpy as np
+
+from nova_perf.k6_stream import NO_TAG
+from nova_perf.merge import GENERATOR_TAG
+from nova_perf.stages import grouped_percentiles, stage_ids, vus_at
+
+SECOND_NS = 1_000_000_000
+
+PERCENTILES = (50, 95, 99)
+
+# Share of the request samples that must carry a `vu` tag for the per-VU replay
+MIN_TAGGED_SHARE = 0.9
+
+# Light-load samples an endpoint needs for its own no-queueing latency
+MIN_BASELINE_REQUESTS = 20
+
+
+def intended_pacing(points, light_end_ns):
+    """Intended iteration time, requests per iteration and per-VU request interval, from the light-load window
+
+    Both iteration figures come from iteration_duration samples (one per iteration) and are None
+    without them; the per-VU request interval is all the correction needs.
+    """
+    times, durations = points.series('http_req_duration')
+    light = times < light_end_ns
+    iteration_times, iteration_ms = points.series('iteration_duration')
+    iterations = iteration_ms[iteration_times < light_end_ns]
+    if len(iterations):
+        iteration_s = float(np.median(iterations)) / 1000
+        # Over the whole run, so the iterations cut off at the window edges do not skew the ratio
+        per_iteration = float(len(times) / len(iteration_times))
+        interval_s = iteration_s / per_iteration
+        source = f"median iteration_duration of {len(iterations):,} light-load iterations"
+    else:
+        # No iteration samples: nothing queues at light load, so the rate the VUs achieved there is the intended one
+        vus_times, vus_values = points.series('vus')
+        grid = np.arange(times[0], light_end_ns, SECOND_NS) + SECOND_NS / 2
+        vu_seconds = vus_at(grid, vus_times, vus_values).sum()
+        per_iteration = iteration_s = None
+        interval_s = vu_seconds / max(light.sum(), 1)
+        source = f"{light.sum():,} light-load requests over {vu_seconds:,.0f} VU-seconds (no iteration_duration samples)"
+    return {
+        'iteration_s': iteration_s,
+        'requests_per_iteration': per_iteration,
+        'interval_s': interval_s,
+        'source': source,
+    }
+
+
+def _baseline_ms(tag_codes, durations, light):
+    """Light-load median latency of every request's endpoint (the run's light-load median for rare ones)"""
+    keys = (tag_codes['method'].astype(np.int64) << 16) | tag_codes['name'].astype(np.int64)
+    _, group_ids = np.unique(keys, return_inverse=True)
+    n_groups = int(group_ids.max()) + 1
+    overall = float(np.median(durations[light])) if light.any() else float(np.median(durations))
+    counts = np.bincount(group_ids[light], minlength=n_groups)
+    medians = np.full(n_groups, overall)
+    if light.any():
+        medians = grouped_percentiles(group_ids[light], durations[light], n_groups, (50,))[0]
+        medians = np.where(counts >= MIN_BASELINE_REQUESTS, medians, overall)
+    return medians[group_ids]
+
+
+def replay_waits(times, durations, vu_keys, baseline_ms):
+    """How long every request would have waited past its due time had its VU kept the intended schedule
+
+    k6 stamps a request's samples when the response completes. Per VU, request i+1 was due
+    baseline_i + think_i after request i went out, so it starts late by
+    wait_{i+1} = max(0, wait_i + latency_i - baseline_i - think_i), a Lindley recursion restarted
+    on every VU and solved as running sum minus running minimum.
+    """
+    starts = times - durations * 1e6
+    order = np.lexsort((starts, vu_keys))
+    keys, starts, durations, baseline_ms = vu_keys[order], starts[order], durations[order], baseline_ms[order]
+
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    steps = np.zeros(len(keys))
+    # Think time: from the previous response to this request (long gaps are idle VUs and reset the lag)
+    think_ms = np.maximum(starts[1:] - (starts[:-1] + durations[:-1] * 1e6), 0) / 1e6
+    steps[1:] = durations[:-1] - baseline_ms[:-1] - think_ms
+    steps[first] = 0
+
+    segment = np.cumsum(first) - 1
+    total = np.cumsum(steps)
+    total -= total[first][segment]
+    # Shift every VU below all earlier ones so one running minimum never crosses VUs
+    span = total.max() - total.min() + 1
+    shifted = total - segment * span
+    waits = total - (np.minimum.accumulate(shifted) + segment * span)
+
+    result = np.empty(len(waits))
+    result[order] = np.maximum(waits, 0)
+    return result
+
+
+def backfill(durations, groups, interval_ms):
+    """Requests each slow response held up: latency - interval, latency - 2 interval, ... down to one interval"""
+    extra = np.maximum(np.floor(durations / interval_ms).astype(np.int64) - 1, 0)
+    total = int(extra.sum())
+    if not total:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(extra) - extra
+    step = np.arange(total) - np.repeat(offsets, extra) + 1
+    return np.repeat(durations, extra) - step * interval_ms, np.repeat(groups, extra)
+
+
+def _percentile_columns(prefix, stage, values, n_stages, table):
+    pct = grouped_percentiles(stage, values, n_stages, PERCENTILES)
+    for row, q in enumerate(PERCENTILES):
+        table[f'{prefix}_p{q}'] = pct[row]
+
+
+def _overall(values):
+    return {f'p{q}': float(p) for q, p in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def coordinated_omission(points, boundaries, light_end_ns):
+    """Raw vs corrected latency percentiles and offered vs achieved request rate per stage
+
+    `boundaries` are the stage starts plus the end of the last stage, in ns.
+    """
+    tag_keys = ('method', 'name') + tuple(key for key in ('vu', GENERATOR_TAG) if key in points.tag_keys)
+    times, durations, tag_codes = points.tagged_series('http_req_duration', tag_keys)
+    if len(times) == 0:
+        return None
+    boundaries = np.asarray(boundaries, dtype=np.float64)
+    n_stages = len(boundaries) - 1
+    stage = stage_ids(boundaries, times)
+    pacing = intended_pacing(points, light_end_ns)
+
+    tagged = tag_codes['vu'] != NO_TAG if 'vu' in tag_codes else np.zeros(len(times), dtype=bool)
+    tagged_share = float(tagged.mean())
+    if tagged_share >= MIN_TAGGED_SHARE:
+        method = 'per-VU replay'
+        vu_keys = tag_codes['vu'][tagged].astype(np.int64)
+        if GENERATOR_TAG in tag_codes:
+            # VU numbers restart on every load generator of a merged run
+            vu_keys |= tag_codes[GENERATOR_TAG][tagged].astype(np.int64) << 16
+        baseline = _baseline_ms({key: codes[tagged] for key, codes in tag_codes.items()},
+                                durations[tagged], times[tagged] < light_end_ns)
+        corrected = durations[tagged] + replay_waits(times[tagged], durations[tagged], vu_keys, baseline)
+        corrected_stage = stage[tagged]
+    else:
+        method = 'expected interval'
+        extra, extra_stage = backfill(durations, stage, pacing['interval_s'] * 1000)
+        corrected = np.concatenate((durations, extra))
+        corrected_stage = np.concatenate((stage, extra_stage))
+
+    seconds = np.diff(boundaries) / SECOND_NS
+    table = {
+        'stage': np.arange(1, n_stages + 1),
+        'start_ns': boundaries[:-1].astype(np.int64),
+        'seconds': seconds,
+    }
+    # Offered load follows the VU series at the intended pacing, one value per second of the stage
+    vus_times, vus_values = points.series('vus')
+    grid = np.arange(boundaries[0], boundaries[-1], SECOND_NS) + SECOND_NS / 2
+    grid_stage = stage_ids(boundaries, grid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['mean_vus'] = (np.bincount(grid_stage, weights=vus_at(grid, vus_times, vus_values), minlength=n_stages)
+                             / np.bincount(grid_stage, minlength=n_stages))
+        if not len(vus_times):
+            table['mean_vus'][:] = np.nan
+        table['offered_rps'] = table['mean_vus'] / pacing['interval_s']
+        table['achieved_rps'] = np.bincount(stage, minlength=n_stages) / seconds
+        table['shortfall'] = np.maximum(1 - table['achieved_rps'] / table['offered_rps'], 0)
+    table['omitted'] = np.nan_to_num((table['offered_rps'] - table['achieved_rps']).clip(0) * seconds).round()
+    _percentile_columns('raw', stage, durations, n_stages, table)
+    _percentile_columns('corrected', corrected_stage, corrected, n_stages, table)
+
+    return {
+        'method': method,
+        'tagged_share': tagged_share,
+        'pacing': pacing,
+        'raw': _overall(durations),
+        'corrected': _overall(corrected),
+        'corrected_samples': len(corrected),
+        'stages': table,
+    }
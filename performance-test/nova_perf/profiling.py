@@ -0,0 +1,167 @@
+"""
+Per-stage profiling of the analysis pipeline
+Code wrapped in `stage(name)` records wall time, CPU time, peak RSS and rows processed while a
+profiler is enabled (--profile); with no profiler enabled a stage is a no-op
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+
+_active = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far
+
+    Linux reports VmHWM, which starts over at exec; ru_maxrss would include the parent's peak.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1024
+
+
+class StageProfiler:
+    """Collects one record per stage; optionally a cProfile of every top-level stage"""
+
+    def __init__(self, cprofile=False):
+        self.cprofile = cprofile
+        self.records = []
+        self._profiles = {}
+        self._depth = 0
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block; callers may set record['rows'] to the rows it processed"""
+        record = {'stage': name, 'depth': self._depth, 'rows': None}
+        # cProfile cannot nest, so only top-level stages are profiled
+        profile = cProfile.Profile() if self.cprofile and self._depth == 0 else None
+        rss_before = peak_rss_mb()
+        self._depth += 1
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield record
+        finally:
+            if profile is not None:
+                profile.disable()
+            self._depth -= 1
+            record.update({
+                'start_s': wall_started - self._origin,
+                'wall_s': time.perf_counter() - wall_started,
+                'cpu_s': time.process_time() - cpu_started,
+                'peak_rss_mb': peak_rss_mb(),
+                'rss_growth_mb': peak_rss_mb() - rss_before,
+            })
+            if profile is not None:
+                self._profiles[id(record)] = profile
+            self.records.append(record)
+
+    def stages(self):
+        """Records in start order"""
+        return sorted(self.records, key=lambda record: record['start_s'])
+
+    def total_seconds(self):
+        return sum(record['wall_s'] for record in self.records if record['depth'] == 0)
+
+    def slowest(self):
+        """Top-level stage with the longest wall time (None before any stage ran)"""
+        top = [record for record in self.records if record['depth'] == 0]
+        return max(top, key=lambda record: record['wall_s']) if top else None
+
+    def dump_slowest(self, path):
+        """Write the cProfile stats of the slowest stage (pstats/snakeviz format)"""
+        slowest = self.slowest()
+        profile = self._profiles.get(id(slowest)) if slowest else None
+        if profile is None:
+            return None
+        profile.dump_stats(path)
+        return path
+
+    def write_trace(self, path, dump_path=None):
+        """Write the records as a Chrome trace (chrome://tracing, Perfetto) plus a flat stage list"""
+        pid = os.getpid()
+        events = [{
+            'name': record['stage'],
+            'ph': 'X',
+            'ts': record['start_s'] * 1e6,
+            'dur': record['wall_s'] * 1e6,
+            'pid': pid,
+            'tid': 0,
+            'args': {key: record[key] for key in ('cpu_s', 'peak_rss_mb', 'rss_growth_mb', 'rows')},
+        } for record in self.stages()]
+        slowest = self.slowest()
+        trace = {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'stages': self.stages(),
+            'total_s': self.total_seconds(),
+            'peak_rss_mb': peak_rss_mb(),
+            'slowest_stage': slowest['stage'] if slowest else None,
+            'cprofile': dump_path,
+        }
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(trace, f, indent=2)
+        return path
+
+    def format_table(self):
+        """Console table of the stages, nested stages indented"""
+        lines = [f"   {'stage':<26} {'wall':>8} {'cpu':>8} {'peak RSS':>10} {'rows':>14}"]
+        for record in self.stages():
+            name = '  ' * record['depth'] + record['stage']
+            rows = f"{record['rows']:,}" if record['rows'] is not None else '-'
+            lines.append(f"   {name:<26} {record['wall_s']:7.2f}s {record['cpu_s']:7.2f}s "
+                         f"{record['peak_rss_mb']:8.0f} MB {rows:>14}")
+        return '\n'.join(lines)
+
+
+def enable(cprofile=False):
+    """Start collecting stage records for the rest of the process"""
+    global _active
+    _active = StageProfiler(cprofile)
+    return _active
+
+
+def active():
+    """The enabled profiler, or None"""
+    return _active
+
+
+@contextmanager
+def stage(name):
+    """Record the enclosed block as a pipeline stage when profiling is enabled"""
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name) as record:
+        yield record
+
+
+def finish(trace_path, dump=False):
+    """Print the stage table, write the trace and (with dump) the slowest stage's cProfile"""
+    if _active is None:
+        return None
+    dump_path = None
+    if dump:
+        dump_path = _active.dump_slowest(os.path.splitext(trace_path)[0] + '_slowest.prof')
+    _active.write_trace(trace_path, dump_path)
+    slowest = _active.slowest()
+    print(f"\n⏱️  Stage profile ({_active.total_seconds():.2f}s total, peak RSS {peak_rss_mb():,.0f} MB)")
+    print(_active.format_table())
+    print(f"💾 Profile trace saved to {trace_path}")
+    if dump_path:
+        print(f"🔬 cProfile of the slowest stage ({slowest['stage']}) saved to {dump_path}")
+    return trace_path
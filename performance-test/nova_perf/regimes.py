@@ -0,0 +1,237 @@
+"""
+Change-point detection of the load regimes of a run
+The per-second VU series is split into piecewise-linear segments (ramps and plateaus) with
+PELT, so the per-stage table follows what the run actually did rather than a stage list; runs
+without `vus` samples are segmented on shifts of throughput and mean log latency instead.
+Segment costs come from prefix sums, so every PELT step is one vectorized pass over the
+surviving candidates.
+"""
+
+import numpy as np
+
+from nova_perf.stages import group_stats, request_samples, stage_ids, vus_at
+
+SECOND_NS = 1_000_000_000
+
+# Shortest regime considered, in seconds
+MIN_REGIME_S = 20
+
+# Penalty per change point, in units of noise variance x log(n)
+PENALTY_SCALE = 3.0
+
+# A segment whose fitted VUs change by less than this share of the peak is a plateau
+STEADY_TOLERANCE = 0.02
+
+# Noise floor of the VU series (integer counts sampled once a second)
+MIN_VUS_NOISE = 1.0
+
+
+def _prefix(values):
+    return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+
+class LinearCost:
+    """Residual sum of squares of a least-squares line through y[s:t], for many s at once"""
+
+    def __init__(self, y):
+        x = np.arange(len(y), dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self._sums = [_prefix(values) for values in (np.ones(len(y)), x, x * x, y, y * y, x * y)]
+
+    def __call__(self, starts, end):
+        n, sx, sxx, sy, syy, sxy = (prefix[end] - prefix[starts] for prefix in self._sums)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var_x = sxx - sx * sx / n
+            cov = sxy - sx * sy / n
+            explained = np.where(var_x > 0, cov * cov / var_x, 0.0)
+        return np.maximum(syy - sy * sy / n - explained, 0.0)
+
+
+class MeanShiftCost:
+    """Summed squared deviation from the segment means of several standardized series"""
+
+    def __init__(self, series):
+        columns = np.atleast_2d(np.asarray(series, dtype=np.float64))
+        self._sums = [(_prefix(column), _prefix(column * column)) for column in columns]
+
+    def __call__(self, starts, end):
+        n = end - starts
+        total = np.zeros(len(starts))
+        for first, second in self._sums:
+            s = first[end] - first[starts]
+            total += second[end] - second[starts] - s * s / n
+        return np.maximum(total, 0.0)
+
+
+def pelt(cost, n, penalty, min_size=1):
+    """Optimal change points of a length-n series (Killick et al. 2012); returns segment ends"""
+    best = np.full(n + 1, np.inf)
+    best[0] = -penalty
+    last = np.zeros(n + 1, dtype=np.int64)
+    candidates = np.array([0], dtype=np.int64)
+    for end in range(min_size, n + 1):
+        admissible = candidates[end - candidates >= min_size]
+        if len(admissible):
+            segment = best[admissible] + cost(admissible, end)
+            i = int(np.argmin(segment))
+            best[end], last[end] = segment[i] + penalty, admissible[i]
+            # Prune starts that can never be optimal again; starts still too close are kept
+            keep = (end - candidates < min_size) | (best[candidates] + cost(candidates, end) <= best[end])
+            candidates = candidates[keep]
+        candidates = np.append(candidates, end)
+
+    ends, end = [], n
+    while end > 0:
+        ends.append(end)
+        end = last[end]
+    return ends[::-1]
+
+
+def _noise_variance(y):
+    """Robust noise variance of a piecewise-smooth series from its second differences"""
+    if len(y) < 3:
+        return 1.0
+    second = np.diff(y, 2)
+    sigma = np.median(np.abs(second - np.median(second))) / 0.6745 / np.sqrt(6)
+    return float(sigma * sigma)
+
+
+def per_second_series(points):
+    """Second offsets, VUs, requests and mean log latency for every second of the run"""
+    times, durations, _ = request_samples(points)
+    vus_times, vus_values = points.series('vus')
+    all_times = points.time_ns.view()
+    if len(all_times) == 0:
+        return None
+    start = int(all_times.min()) // SECOND_NS * SECOND_NS
+    n = int((int(all_times.max()) - start) // SECOND_NS) + 1
+    grid = start + np.arange(n, dtype=np.int64) * SECOND_NS
+
+    seconds = (times - start) // SECOND_NS
+    requests = np.bincount(seconds, minlength=n).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_latency = np.bincount(seconds, weights=np.log1p(durations), minlength=n) / requests
+    return {
+        'start_ns': start,
+        'time_ns': grid,
+        'vus': vus_at(grid + SECOND_NS - 1, vus_times, vus_values) if len(vus_times) else None,
+        'requests': requests,
+        'log_latency': log_latency,
+    }
+
+
+def _standardized(values):
+    values = np.where(np.isfinite(values), values, np.nanmedian(values) if np.isfinite(values).any() else 0.0)
+    spread = np.std(values)
+    return (values - values.mean()) / spread if spread > 0 else values - values.mean()
+
+
+def detect_regimes(points, min_seconds=MIN_REGIME_S, penalty_scale=PENALTY_SCALE):
+    """Split a run into load regimes; None when there are no samples
+
+    Returns {'signal', 'start_ns', 'end_ns', 'start_vus', 'end_vus', 'kind'} with one entry per
+    regime; 'kind' is 'ramp up', 'ramp down' or 'steady' (VU signal) or 'regime' otherwise.
+    """
+    series = per_second_series(points)
+    if series is None:
+        return None
+    n = len(series['time_ns'])
+    min_size = max(2, min(int(min_seconds), n))
+
+    vus = series['vus']
+    if vus is not None and vus.max() > 0:
+        signal = 'vus'
+        cost = LinearCost(vus)
+        noise = max(_noise_variance(vus), MIN_VUS_NOISE)
+        # Slope and intercept per segment
+        penalty = penalty_scale * 2 * noise * np.log(n)
+    else:
+        signal = 'throughput/latency'
+        channels = [_standardized(values) for values in (series['requests'], series['log_latency'])]
+        cost = MeanShiftCost(channels)
+        noise = max(float(np.mean([_noise_variance(channel) for channel in channels])), 1e-3)
+        # One mean per channel and segment
+        penalty = penalty_scale * len(channels) * noise * np.log(n)
+
+    ends = np.array(pelt(cost, n, penalty, min_size))
+    starts = np.concatenate(([0], ends[:-1]))
+    regimes = {
+        'signal': signal,
+        'start_ns': series['time_ns'][starts],
+        'end_ns': series['start_ns'] + ends * SECOND_NS,
+    }
+    if signal == 'vus':
+        first, last = _fitted_ends(vus, starts, ends)
+        change = last - first
+        tolerance = STEADY_TOLERANCE * max(vus.max(), 1)
+        regimes['start_vus'], regimes['end_vus'] = first, last
+        regimes['kind'] = np.where(change > tolerance, 'ramp up', np.where(change < -tolerance, 'ramp down', 'steady'))
+    else:
+        regimes['start_vus'] = regimes['end_vus'] = np.full(len(ends), np.nan)
+        regimes['kind'] = np.full(len(ends), 'regime')
+    return regimes
+
+
+def _fitted_ends(y, starts, ends):
+    """Least-squares line of every segment evaluated at its first and last second"""
+    first, last = np.empty(len(starts)), np.empty(len(starts))
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        x = np.arange(end - start, dtype=np.float64)
+        if len(x) > 1:
+            slope, intercept = np.polyfit(x, y[start:end], 1)
+        else:
+            slope, intercept = 0.0, float(y[start])
+        first[i], last[i] = intercept, intercept + slope * x[-1]
+    return np.maximum(first.round(), 0), np.maximum(last.round(), 0)
+
+
+def aggregate_by_regime(points, regimes, rollup=None):
+    """Throughput, percentiles and error rate per detected regime (same columns as aggregate_by_stage)
+
+    With a rollup index (nova_perf.rollup) the request statistics are read from its buckets.
+    """
+    if regimes is None:
+        return None
+    boundaries = np.concatenate((regimes['start_ns'], regimes['end_ns'][-1:])).astype(np.float64)
+    n_regimes = len(regimes['start_ns'])
+    seconds = (regimes['end_ns'] - regimes['start_ns']) / 1e9
+    if rollup is not None:
+        stats = rollup.span_stats(regimes['start_ns'], regimes['end_ns'])
+        if not stats['requests'].sum():
+            return None
+    else:
+        times, durations, failed = request_samples(points)
+        if len(times) == 0:
+            return None
+        stats = group_stats(stage_ids(boundaries, times), durations, failed, n_regimes, seconds)
+    stats['stage'] = np.arange(1, n_regimes + 1)
+    stats['start_vus'] = regimes['start_vus']
+    stats['target_vus'] = regimes['end_vus']
+    stats['kind'] = regimes['kind']
+    stats['start_ns'] = regimes['start_ns']
+
+    vus_times, vus_values = points.series('vus')
+    if len(vus_values):
+        vu_groups = stage_ids(boundaries, vus_times)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['mean_vus'] = (np.bincount(vu_groups, weights=vus_values, minlength=n_regimes)
+                                 / np.bincount(vu_groups, minlength=n_regimes))
+    else:
+        stats['mean_vus'] = np.full(n_regimes, np.nan)
+    return stats
+
+
+def profile_mismatch(regimes, stages, tolerance=0.1):
+    """Why the detected regimes disagree with a declared stage profile, or None when they agree"""
+    if regimes is None or not stages:
+        return None
+    detected = (regimes['end_ns'] - regimes['start_ns']) / 1e9
+    declared = np.array([duration for duration, _ in stages])
+    if len(detected) != len(declared):
+        return f"{len(detected)} regimes detected, the load script declares {len(declared)} stages"
+    off = np.abs(detected - declared) > np.maximum(tolerance * declared, MIN_REGIME_S / 2)
+    if off.any():
+        stage = int(np.argmax(off)) + 1
+        return (f"stage {stage} lasted {detected[stage - 1]:.0f}s, "
+                f"the load script declares {declared[stage - 1]:.0f}s")
+    return None
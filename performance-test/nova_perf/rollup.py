@@ -0,0 +1,449 @@
+"""
+Multi-resolution rollup index of a run
+Request samples are pre-aggregated into 1s, 10s and 60s buckets per endpoint and status:
+counts, latency sums, failures and a latency sketch stored as sparse (bucket index, count)
+entries. The index is written once next to the results; a time-range query covers the range
+with the coarsest aligned buckets (60s in the middle, 10s/1s at the edges), so it costs a
+binary search plus a handful of buckets instead of a scan of the raw samples.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from nova_perf.compression import SUFFIXES
+from nova_perf.endpoints import _combined_keys, _decode_keys, endpoint_path
+from nova_perf.sketch import DEFAULT_ACCURACY, MIN_TRACKED_MS, LatencySketch, bucket_index
+from nova_perf.stages import PERCENTILES, default_bin_width, vus_at
+
+SECOND_NS = 1_000_000_000
+
+ROLLUP_VERSION = 1
+
+# Bucket widths in seconds, finest first; buckets are aligned to the epoch
+RESOLUTIONS = (1, 10, 60)
+
+# Tags every bucket is split by
+GROUP_TAGS = ('method', 'name', 'status')
+
+# Sketch entry of the zero bucket (durations at or below MIN_TRACKED_MS)
+ZERO_BIN = np.iinfo(np.int32).min
+
+# Raw samples are counted in blocks of this many, keeping the temporary sort arrays small
+BLOCK_SAMPLES = 1 << 22
+
+# Light-load window: until the VUs first exceed this share of the peak, and at least this long
+LIGHT_LOAD_SHARE = 0.1
+MIN_LIGHT_LOAD_S = 60
+
+_LEVEL_COLUMNS = ('bucket_s', 'group', 'count', 'sum_ms', 'errors', 'fail_samples', 'ptr', 'bin', 'bin_count')
+
+
+def rollup_path(results_file, output_dir=None):
+    """<run>_rollup.npz next to a results file
+
+    A merged run has no results file of its own: with an output directory its index is
+    <dir>/<dir name>_rollup.npz there, otherwise <first run>+N_rollup.npz next to the first file.
+    """
+    paths = [results_file] if isinstance(results_file, str) else list(results_file)
+    if len(paths) > 1 and output_dir is not None:
+        output_dir = os.path.abspath(output_dir)
+        return os.path.join(output_dir, f'{os.path.basename(output_dir)}_rollup.npz')
+    name = os.path.basename(paths[0])
+    for suffix in SUFFIXES.values():
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    for suffix in ('_results.json', '.json'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    if len(paths) > 1:
+        name += f'+{len(paths) - 1}'
+    return os.path.join(os.path.dirname(os.path.abspath(paths[0])), f'{name}_rollup.npz')
+
+
+def _count_keys(keys, weights=None, block=BLOCK_SAMPLES):
+    """Unique keys and their (weighted) counts, sorting one block at a time"""
+    parts_keys, parts_counts = [], []
+    for start in range(0, len(keys), block):
+        chunk = keys[start:start + block]
+        unique, inverse = np.unique(chunk, return_inverse=True)
+        parts_keys.append(unique)
+        parts_counts.append(np.bincount(inverse, weights=None if weights is None else weights[start:start + block],
+                                        minlength=len(unique)))
+    if not parts_keys:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    if len(parts_keys) == 1:
+        return parts_keys[0], parts_counts[0]
+    unique, inverse = np.unique(np.concatenate(parts_keys), return_inverse=True)
+    return unique, np.bincount(inverse, weights=np.concatenate(parts_counts), minlength=len(unique))
+
+
+def _weighted_bincount(ids, weights, size):
+    return np.bincount(ids, minlength=size) if weights is None else np.bincount(ids, weights=weights, minlength=size)
+
+
+def _aggregate(resolution, n_groups, requests, failures, entries):
+    """One level of buckets from (second, group, ...) rows of samples or of a finer level
+
+    requests: (seconds, groups, counts or None, latency sums); failures: (seconds, groups,
+    failures, samples or None); entries: (seconds, groups, bins, counts or None).
+    """
+    all_seconds = [part[0] for part in (requests, failures, entries) if len(part[0])]
+    if not all_seconds:
+        return {name: np.empty(0, dtype=np.int64) for name in _LEVEL_COLUMNS} | {'ptr': np.zeros(1, dtype=np.int64)}
+    first = min(int(seconds.min()) for seconds in all_seconds) // resolution
+    last = max(int(seconds.max()) for seconds in all_seconds) // resolution
+    size = (last - first + 1) * n_groups
+
+    def rows(seconds, groups):
+        return (seconds // resolution - first) * n_groups + groups
+
+    request_rows = rows(requests[0], requests[1])
+    fail_rows = rows(failures[0], failures[1])
+    count = _weighted_bincount(request_rows, requests[2], size)
+    sum_ms = np.bincount(request_rows, weights=requests[3], minlength=size)
+    errors = np.bincount(fail_rows, weights=failures[2], minlength=size)
+    fail_samples = _weighted_bincount(fail_rows, failures[3], size)
+    kept = np.nonzero((count > 0) | (fail_samples > 0))[0]
+
+    bins = entries[2].astype(np.int64)
+    tracked = bins != ZERO_BIN
+    low = int(bins[tracked].min()) - 1 if tracked.any() else 0
+    width = int(bins[tracked].max()) - low + 1 if tracked.any() else 1
+    # Slot 0 of every row holds the zero bucket
+    slots = np.where(tracked, bins - low, 0)
+    keys, counts = _count_keys(rows(entries[0], entries[1]) * width + slots, entries[3])
+    entry_rows, entry_slots = keys // width, keys % width
+
+    return {
+        'bucket_s': (kept // n_groups + first) * resolution,
+        'group': (kept % n_groups).astype(np.int32),
+        'count': count[kept].astype(np.int64),
+        'sum_ms': sum_ms[kept],
+        'errors': errors[kept],
+        'fail_samples': fail_samples[kept].astype(np.int64),
+        'ptr': np.searchsorted(entry_rows, np.append(kept, size)).astype(np.int64),
+        'bin': np.where(entry_slots == 0, ZERO_BIN, entry_slots + low).astype(np.int32),
+        'bin_count': counts.astype(np.int64),
+    }
+
+
+def _level_rows(level):
+    """Bucket second and group of every sketch entry of a level"""
+    sizes = np.diff(level['ptr'])
+    return np.repeat(level['bucket_s'], sizes), np.repeat(level['group'], sizes)
+
+
+def build_rollup(points, resolutions=RESOLUTIONS, relative_accuracy=DEFAULT_ACCURACY):
+    """Aggregate decoded points into a RollupIndex; None when the run has no request samples"""
+    by = tuple(key for key in GROUP_TAGS if key in points.tag_keys)
+    times, durations, codes = points.tagged_series('http_req_duration', by)
+    fail_times, failed, fail_codes = points.tagged_series('http_req_failed', by)
+    if len(times) == 0:
+        return None
+
+    # Only the tag combinations that occur become groups
+    space = int(np.prod([len(points.tag_values[key]) + 1 for key in by]))
+    keys = _combined_keys(codes, points, by) if by else np.zeros(len(times), dtype=np.int64)
+    fail_keys = _combined_keys(fail_codes, points, by) if by else np.zeros(len(fail_times), dtype=np.int64)
+    present = np.zeros(space, dtype=bool)
+    present[keys] = True
+    present[fail_keys] = True
+    group_keys = np.nonzero(present)[0]
+    remap = np.cumsum(present) - 1
+    groups, fail_groups = remap[keys], remap[fail_keys]
+    labels = _decode_keys(group_keys, points, by) if by else {}
+
+    tracked = durations > MIN_TRACKED_MS
+    bins = np.full(len(durations), ZERO_BIN, dtype=np.int64)
+    bins[tracked] = bucket_index(durations[tracked], relative_accuracy)
+    seconds = times // SECOND_NS
+    fail_seconds = fail_times // SECOND_NS
+
+    resolutions = sorted(resolutions)
+    levels = {resolutions[0]: _aggregate(resolutions[0], len(group_keys), (seconds, groups, None, durations),
+                                         (fail_seconds, fail_groups, failed, None), (seconds, groups, bins, None))}
+    finest = levels[resolutions[0]]
+    for resolution in resolutions[1:]:
+        # Coarser levels are folded from the finest one rather than from the raw samples
+        entry_seconds, entry_groups = _level_rows(finest)
+        levels[resolution] = _aggregate(
+            resolution, len(group_keys),
+            (finest['bucket_s'], finest['group'], finest['count'], finest['sum_ms']),
+            (finest['bucket_s'], finest['group'], finest['errors'], finest['fail_samples']),
+            (entry_seconds, entry_groups, finest['bin'], finest['bin_count']),
+        )
+
+    vus_times, vus_values = points.series('vus')
+    all_times = points.time_ns.view()
+    meta = {
+        'version': ROLLUP_VERSION,
+        'relative_accuracy': relative_accuracy,
+        'resolutions': resolutions,
+        'start_ns': int(all_times.min()),
+        'end_ns': int(all_times.max()) + 1,
+        'labels': {key: [str(value) for value in values] for key, values in labels.items()},
+        'n_groups': len(group_keys),
+    }
+    return RollupIndex(meta, levels, vus_times, vus_values)
+
+
+class RollupIndex:
+    """Bucketed request aggregates of one run at several resolutions"""
+
+    def __init__(self, meta, levels, vus_times, vus_values):
+        self.meta = meta
+        self.levels = levels
+        self.vus_times = np.asarray(vus_times, dtype=np.int64)
+        self.vus_values = np.asarray(vus_values, dtype=np.float64)
+        self.relative_accuracy = meta['relative_accuracy']
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self.resolutions = sorted(levels)
+        self.start_ns, self.end_ns = meta['start_ns'], meta['end_ns']
+        self.labels = {key: np.array(values, dtype=object) for key, values in meta['labels'].items()}
+        self.n_groups = meta['n_groups']
+
+    @property
+    def nbytes(self):
+        return sum(values.nbytes for level in self.levels.values() for values in level.values())
+
+    def save(self, path):
+        """Write the index as one .npz file (through a temporary file, then renamed)"""
+        arrays = {f'r{resolution}_{name}': values for resolution, level in self.levels.items()
+                  for name, values in level.items()}
+        arrays['vus_times'], arrays['vus_values'] = self.vus_times, self.vus_values
+        arrays['meta'] = np.frombuffer(json.dumps(self.meta).encode(), dtype=np.uint8)
+        staging = path + '.partial'
+        with open(staging, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(staging, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes())
+            if meta.get('version') != ROLLUP_VERSION:
+                raise ValueError(f"{path} is a version {meta.get('version')} rollup index, expected {ROLLUP_VERSION}")
+            levels = {resolution: {name: data[f'r{resolution}_{name}'] for name in _LEVEL_COLUMNS}
+                      for resolution in meta['resolutions']}
+            return cls(meta, levels, data['vus_times'], data['vus_values'])
+
+    def select(self, method=None, path=None, status=None):
+        """Group ids matching an HTTP method, endpoint path (prefix) and status code; None = all"""
+        if method is None and path is None and status is None:
+            return None
+        keep = np.ones(self.n_groups, dtype=bool)
+        if method is not None and 'method' in self.labels:
+            keep &= np.array([value.upper() == method.upper() for value in self.labels['method']], dtype=bool)
+        if path is not None and 'name' in self.labels:
+            keep &= np.array([endpoint_path(value).startswith(path) for value in self.labels['name']], dtype=bool)
+        if status is not None and 'status' in self.labels:
+            keep &= np.array([value == str(status) for value in self.labels['status']], dtype=bool)
+        return np.nonzero(keep)[0]
+
+    def cover(self, start_s, end_s):
+        """(resolution, first second, end second) pieces covering [start_s, end_s) with the fewest buckets"""
+        def split(low, high, resolutions):
+            if low >= high:
+                return []
+            resolution, finer = resolutions[0], resolutions[1:]
+            if not finer:
+                # Finest level: widen to whole buckets
+                return [(resolution, low // resolution * resolution, -(-high // resolution) * resolution)]
+            first, last = -(-low // resolution) * resolution, high // resolution * resolution
+            if first >= last:
+                return split(low, high, finer)
+            return split(low, first, finer) + [(resolution, first, last)] + split(last, high, finer)
+
+        return split(int(start_s), int(end_s), self.resolutions[::-1])
+
+    def _rows(self, resolution, start_s, end_s):
+        level = self.levels[resolution]
+        low, high = np.searchsorted(level['bucket_s'], [start_s, end_s])
+        return level, int(low), int(high)
+
+    def sketch_from_entries(self, bins, counts, sum_ms=0.0):
+        """LatencySketch from sparse (bucket index, count) entries"""
+        sketch = LatencySketch(self.relative_accuracy)
+        zero = bins == ZERO_BIN
+        sketch.zero_count = int(counts[zero].sum())
+        tracked_bins, tracked_counts = bins[~zero].astype(np.int64), counts[~zero]
+        if len(tracked_bins):
+            low, high = int(tracked_bins.min()), int(tracked_bins.max())
+            sketch.add_bucket_counts(low, np.bincount(tracked_bins - low, weights=tracked_counts).astype(np.int64))
+            # Buckets span (gamma^(i-1), gamma^i]; their edges bound the samples
+            sketch.min = 0.0 if sketch.zero_count else float(self.gamma ** (low - 1))
+            sketch.max = float(self.gamma ** high)
+        elif sketch.zero_count:
+            sketch.min = sketch.max = 0.0
+        sketch.sum = float(sum_ms)
+        return sketch
+
+    def query(self, start_ns=None, end_ns=None, groups=None):
+        """Requests, throughput, latency sketch and failures between two times (whole seconds)
+
+        groups restricts the query to some group ids (see select()).
+        """
+        start_ns = self.start_ns if start_ns is None else start_ns
+        end_ns = self.end_ns if end_ns is None else end_ns
+        start_s, end_s = int(start_ns) // SECOND_NS, -(-int(end_ns) // SECOND_NS)
+        totals = {'count': 0, 'sum_ms': 0.0, 'errors': 0.0, 'fail_samples': 0}
+        bins, counts = [], []
+        buckets = 0
+        for resolution, low_s, high_s in self.cover(start_s, end_s):
+            level, low, high = self._rows(resolution, low_s, high_s)
+            ptr = level['ptr'][low:high + 1]
+            entry_bins, entry_counts = level['bin'][ptr[0]:ptr[-1]], level['bin_count'][ptr[0]:ptr[-1]]
+            if groups is not None:
+                rows = np.isin(level['group'][low:high], groups)
+                entries = np.repeat(rows, np.diff(ptr))
+                entry_bins, entry_counts = entry_bins[entries], entry_counts[entries]
+                low_rows = np.nonzero(rows)[0] + low
+            else:
+                low_rows = slice(low, high)
+            for name in totals:
+                totals[name] += level[name][low_rows].sum()
+            bins.append(entry_bins)
+            counts.append(entry_counts)
+            buckets += high - low
+
+        seconds = max(end_s - start_s, 0)
+        bins = np.concatenate(bins) if bins else np.empty(0, dtype=np.int32)
+        counts = np.concatenate(counts) if counts else np.empty(0, dtype=np.int64)
+        return {
+            'start_s': start_s,
+            'seconds': seconds,
+            'requests': int(totals['count']),
+            'rps': totals['count'] / seconds if seconds else 0.0,
+            'avg': totals['sum_ms'] / totals['count'] if totals['count'] else np.nan,
+            'failures': float(totals['errors']),
+            'failure_samples': int(totals['fail_samples']),
+            'error_rate': totals['errors'] / totals['fail_samples'] if totals['fail_samples'] else np.nan,
+            'sketch': self.sketch_from_entries(bins, counts, totals['sum_ms']),
+            'buckets': buckets,
+        }
+
+    def span_stats(self, start_ns, end_ns, groups=None):
+        """Per-span columns in the layout of stages.group_stats (requests, rps, avg, pXX, error_rate)"""
+        results = [self.query(start, end, groups) for start, end in zip(start_ns, end_ns)]
+        stats = {
+            'requests': np.array([result['requests'] for result in results]),
+            'seconds': (np.asarray(end_ns, dtype=np.float64) - np.asarray(start_ns, dtype=np.float64)) / 1e9,
+            'avg': np.array([result['avg'] for result in results]),
+            'error_rate': np.array([result['error_rate'] for result in results]),
+        }
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['rps'] = np.where(stats['seconds'] > 0, stats['requests'] / stats['seconds'], 0.0)
+        stats['rpm'] = stats['rps'] * 60
+        table = np.array([result['sketch'].quantiles(np.asarray(PERCENTILES) / 100.0) for result in results])
+        for column, q in enumerate(PERCENTILES):
+            stats[f'p{q}'] = table[:, column] if len(results) else np.empty(0)
+        return stats
+
+    def window_series(self, window_s, groups=None):
+        """Per-window requests, RPS and latency percentiles from the run start (whole seconds)"""
+        window_ns = int(window_s * SECOND_NS)
+        first = self.start_ns // SECOND_NS * SECOND_NS
+        starts = np.arange(first, self.end_ns, window_ns, dtype=np.int64)
+        stats = self.span_stats(starts, starts + window_ns, groups)
+        stats['window_start_ns'] = starts
+        return stats
+
+    def second_counts(self, start_ns=None, end_ns=None, groups=None, column='count'):
+        """Requests (or another bucket column such as errors) in every second of a range, zeros included"""
+        start_s = int(self.start_ns if start_ns is None else start_ns) // SECOND_NS
+        end_s = -(-int(self.end_ns if end_ns is None else end_ns) // SECOND_NS)
+        level, low, high = self._rows(self.resolutions[0], start_s, end_s)
+        rows = slice(low, high) if groups is None else np.nonzero(np.isin(level['group'][low:high], groups))[0] + low
+        resolution = self.resolutions[0]
+        offsets = (level['bucket_s'][rows] - start_s) // resolution
+        return np.bincount(offsets, weights=level[column][rows],
+                           minlength=max(1, -(-(end_s - start_s) // resolution))).astype(np.float64)
+
+    def light_load_end(self, share=LIGHT_LOAD_SHARE, min_seconds=MIN_LIGHT_LOAD_S):
+        """End of the run's light-load window (VUs below `share` of the peak; the first tenth without VUs)"""
+        minimum = self.start_ns + int(min_seconds * SECOND_NS)
+        if len(self.vus_values) == 0 or self.vus_values.max() <= 0:
+            return min(max(self.start_ns + (self.end_ns - self.start_ns) // 10, minimum), self.end_ns)
+        above = self.vus_values > share * self.vus_values.max()
+        end = int(self.vus_times[above.argmax()]) if above.any() else self.end_ns
+        return min(max(end, minimum), self.end_ns)
+
+    def concurrency_curve(self, bin_width=None, min_requests=20):
+        """Per-VU-level table like stages.aggregate_by_concurrency, from the finest buckets"""
+        if len(self.vus_times) == 0:
+            return None
+        if bin_width is None:
+            bin_width = default_bin_width(self.vus_values.max())
+        resolution = self.resolutions[0]
+        level = self.levels[resolution]
+        # Active VUs at the middle of every bucket
+        middle = level['bucket_s'] * SECOND_NS + resolution * SECOND_NS // 2
+        vu_bins = (vus_at(middle, self.vus_times, self.vus_values) // bin_width).astype(np.int64)
+        n_bins = int(max(vu_bins.max(initial=0), (self.vus_values // bin_width).max()) + 1)
+
+        spans = np.diff(self.vus_times, append=self.end_ns) / 1e9
+        span_bins = np.minimum((self.vus_values // bin_width).astype(np.int64), n_bins - 1)
+        seconds = np.bincount(span_bins, weights=np.maximum(spans, 0), minlength=n_bins)
+
+        requests = np.bincount(vu_bins, weights=level['count'], minlength=n_bins)
+        sums = np.bincount(vu_bins, weights=level['sum_ms'], minlength=n_bins)
+        errors = np.bincount(vu_bins, weights=level['errors'], minlength=n_bins)
+        fail_samples = np.bincount(vu_bins, weights=level['fail_samples'], minlength=n_bins)
+        entry_bins = np.repeat(vu_bins, np.diff(level['ptr']))
+        quantiles = np.full((n_bins, len(PERCENTILES)), np.nan)
+        for vu_bin in np.nonzero(requests)[0]:
+            mine = entry_bins == vu_bin
+            sketch = self.sketch_from_entries(level['bin'][mine], level['bin_count'][mine])
+            quantiles[vu_bin] = sketch.quantiles(np.asarray(PERCENTILES) / 100.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rps = np.where(seconds > 0, requests / seconds, 0.0)
+            stats = {
+                'requests': requests.astype(np.int64),
+                'seconds': seconds,
+                'rps': rps,
+                'rpm': rps * 60,
+                'avg': sums / requests,
+                'error_rate': errors / fail_samples,
+            }
+        for column, q in enumerate(PERCENTILES):
+            stats[f'p{q}'] = quantiles[:, column]
+        stats['vus'] = np.arange(n_bins) * bin_width + bin_width / 2.0
+        keep = stats['requests'] >= min_requests
+        return {key: values[keep] for key, values in stats.items()}
+
+
+def load_rollup(results_file, load_points, rebuild=False, output_dir=None):
+    """(RollupIndex, loaded) for a run, building and saving it from load_points() when missing or stale
+
+    The index records the fingerprints of the results file(s) it was built from; see rollup_path
+    for where it is kept.
+    """
+    from nova_perf.run_cache import fingerprint
+
+    paths = [results_file] if isinstance(results_file, str) else list(results_file)
+    source = [[os.path.basename(path), *fingerprint(path)] for path in paths]
+    path = rollup_path(results_file, output_dir)
+    if not rebuild and os.path.exists(path):
+        try:
+            index = RollupIndex.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Ignoring unreadable rollup index {path}: {e}")
+        else:
+            if index.meta.get('source') == source:
+                return index, True
+
+    index = build_rollup(load_points())
+    if index is None:
+        return None, False
+    index.meta['source'] = source
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        index.save(path)
+    except OSError as e:
+        print(f"⚠️  Could not write rollup index {path}: {e}")
+    return index, False
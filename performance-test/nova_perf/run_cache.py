@@ -0,0 +1,223 @@
+"""
+On-disk columnar cache for parsed runs
+Decoded k6 points and monitoring CSVs are stored as one .npy file per column next to the
+results and loaded back with memory mapping; entries are keyed by a fingerprint of the input
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from nova_perf.k6_stream import K6Points
+
+CACHE_DIRNAME = '.nova_cache'
+CACHE_VERSION = 4
+
+# Content hash samples this many evenly spaced blocks instead of reading multi-GB files
+HASH_BLOCKS = 64
+HASH_BLOCK_BYTES = 64 * 1024
+
+
+def fingerprint(path):
+    """Return (size, mtime_ns, content_hash) identifying the current contents of a file"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(stat.st_size).encode())
+    with open(path, 'rb') as f:
+        if stat.st_size <= HASH_BLOCKS * HASH_BLOCK_BYTES:
+            digest.update(f.read())
+        else:
+            step = (stat.st_size - HASH_BLOCK_BYTES) // (HASH_BLOCKS - 1)
+            for i in range(HASH_BLOCKS):
+                f.seek(i * step)
+                digest.update(f.read(HASH_BLOCK_BYTES))
+    return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def _entry_dir(path, key):
+    cache_root = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    tag = hashlib.blake2b(repr((CACHE_VERSION, key)).encode(), digest_size=8).hexdigest()
+    return cache_root, os.path.join(cache_root, f'{os.path.basename(path)}.{tag}')
+
+
+def _drop_stale_entries(cache_root, path, keep):
+    """Remove cache entries for `path` that belong to older versions of the file"""
+    prefix = os.path.basename(path) + '.'
+    if not os.path.isdir(cache_root):
+        return
+    for name in os.listdir(cache_root):
+        entry = os.path.join(cache_root, name)
+        if name.startswith(prefix) and len(name) == len(prefix) + 16 and entry != keep:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def _entry_bytes(entry):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(entry) for name in names)
+
+
+def drop_entries(path):
+    """Remove every cache entry built from `path`, merged runs including it too; returns the bytes freed
+
+    For when the file itself goes away, e.g. once compress-results.py has replaced it.
+    """
+    cache_root, _ = _entry_dir(path, None)
+    if not os.path.isdir(cache_root):
+        return 0
+    source = os.path.abspath(path)
+    freed = 0
+    for name in os.listdir(cache_root):
+        entry = os.path.join(cache_root, name)
+        if name.startswith('.') or not os.path.isdir(entry):
+            continue
+        try:
+            with open(os.path.join(entry, 'meta.json'), 'r') as f:
+                sources = json.load(f).get('source')
+        except (OSError, ValueError):
+            continue
+        if source in ([sources] if isinstance(sources, str) else sources or ()):
+            freed += _entry_bytes(entry)
+            shutil.rmtree(entry, ignore_errors=True)
+    return freed
+
+
+def _read_entry(entry):
+    meta_path = os.path.join(entry, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None, None
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r')
+               for name in meta['columns']}
+    return meta, columns
+
+
+def _write_entry(cache_root, entry, meta, columns):
+    """Write columns + meta to a temp dir, then rename it into place"""
+    try:
+        os.makedirs(cache_root, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=cache_root, prefix='.staging-')
+        os.chmod(staging, 0o755)
+    except OSError as e:
+        print(f"⚠️  Could not write analysis cache in {cache_root}: {e}")
+        return
+    try:
+        for name, values in columns.items():
+            np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(values))
+        meta['columns'] = list(columns)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _entry_name(paths):
+    """Path a cache entry is named after: the file itself, or the first of several merged files"""
+    if isinstance(paths, str):
+        return paths
+    return paths[0] if len(paths) == 1 else f'{paths[0]}+{len(paths) - 1}'
+
+
+def _lookup(paths, variant=None):
+    if isinstance(paths, str) or len(paths) == 1:
+        path = paths if isinstance(paths, str) else paths[0]
+        key = fingerprint(path)
+    else:
+        key = tuple(part for path in paths for part in (os.path.basename(path), *fingerprint(path)))
+    if variant is not None:
+        key += (variant,)
+    cache_root, entry = _entry_dir(_entry_name(paths), key)
+    meta, columns = _read_entry(entry)
+    if meta is not None and tuple(meta.get('key', ())) != tuple(key):
+        meta, columns = None, None
+    return key, cache_root, entry, meta, columns
+
+
+def load_points(results_file, read, variant=None):
+    """Return cached K6Points for `results_file`, calling `read(results_file)` on a miss
+
+    `results_file` may also be a list of generator files merged by `read`; `variant` names
+    any read option that changes the result.
+    """
+    key, cache_root, entry, meta, columns = _lookup(results_file, variant)
+    if meta is not None:
+        tag_values = meta.get('tag_values', {})
+        points = K6Points.from_columns(meta['metric_names'], columns['time_ns'],
+                                       columns['value'], columns['metric_id'], tag_values,
+                                       {key: columns[f'tag_{key}'] for key in tag_values},
+                                       time_sorted=meta.get('time_sorted', False))
+        points.lines_read = meta['lines_read']
+        points.generators = meta.get('generators')
+        return points, True
+
+    points = read(results_file)
+    _drop_stale_entries(cache_root, _entry_name(results_file), entry)
+    sources = [results_file] if isinstance(results_file, str) else results_file
+    _write_entry(cache_root, entry, {
+        'kind': 'k6_points',
+        'source': os.path.abspath(sources[0]) if len(sources) == 1 else [os.path.abspath(path) for path in sources],
+        'key': list(key),
+        'metric_names': points.metric_names,
+        'lines_read': points.lines_read,
+        'tag_values': points.tag_values,
+        'time_sorted': points.time_sorted,
+        'generators': points.generators,
+    }, {
+        'time_ns': points.time_ns.view(),
+        'value': points.value.view(),
+        'metric_id': points.metric_id.view(),
+        **{f'tag_{key}': column.view() for key, column in points.tag_codes.items()},
+    })
+    return points, False
+
+
+def load_frame(csv_file, read):
+    """Return a cached DataFrame for `csv_file`, calling `read(csv_file)` on a miss"""
+    import pandas as pd
+
+    key, cache_root, entry, meta, columns = _lookup(csv_file)
+    if meta is not None:
+        data = {}
+        for name in meta['order']:
+            kind = meta['kinds'][name]
+            if kind == 'datetime':
+                data[name] = np.asarray(columns[name]).view('datetime64[ns]')
+            elif kind == 'category':
+                # Missing values were factorized to -1, which picks the trailing None
+                labels = np.array(meta['categories'][name] + [None], dtype=object)
+                data[name] = labels[np.asarray(columns[name])]
+            else:
+                data[name] = columns[name]
+        return pd.DataFrame(data), True
+
+    df = read(csv_file)
+    kinds, categories, arrays = {}, {}, {}
+    for name in df.columns:
+        series = df[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            kinds[name] = 'datetime'
+            arrays[name] = series.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        elif pd.api.types.is_numeric_dtype(series):
+            kinds[name] = 'numeric'
+            arrays[name] = series.to_numpy()
+        else:
+            kinds[name] = 'category'
+            codes, labels = pd.factorize(series)
+            arrays[name] = codes.astype(np.int32)
+            categories[name] = [str(label) for label in labels]
+
+    _drop_stale_entries(cache_root, csv_file, entry)
+    _write_entry(cache_root, entry, {
+        'kind': 'frame',
+        'source': os.path.abspath(csv_file),
+        'key': list(key),
+        'order': list(df.columns),
+        'kinds': kinds,
+        'categories': categories,
+    }, arrays)
+    return df, False
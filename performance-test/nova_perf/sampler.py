@@ -0,0 +1,332 @@
+"""
+HPA and pod resource sampler for the monitor-scaling CSVs
+Every tick issues one JSON kubectl call per resource (HPAs and the metrics API's pod usage, run
+concurrently), parses them natively and appends the rows with a single buffered write per file;
+ticks are scheduled against a fixed origin so the cadence does not drift
+"""
+
+import asyncio
+import json
+import os
+import signal
+import time
+from datetime import datetime
+
+NAMESPACE = 'nova'
+DEFAULT_INTERVAL_S = 5.0
+STATUS_INTERVAL_S = 60.0
+KUBECTL_TIMEOUT_S = 10.0
+
+# Buffered rows reach the disk at least this often, so follow mode sees them
+FLUSH_INTERVAL_S = 5.0
+
+HPA_HEADER = ('timestamp,service,current_replicas,desired_replicas,min_replicas,max_replicas,'
+              'cpu_percent,memory_percent,targets')
+RESOURCE_HEADER = 'timestamp,pod_name,cpu_cores,memory_bytes,service'
+
+POD_METRICS_PATH = '/apis/metrics.k8s.io/v1beta1/namespaces/{namespace}/pods'
+
+# Pod name fragment -> service column (same matching as the original shell monitor)
+POD_SERVICES = (
+    ('api-gateway', 'api-gateway'),
+    ('frontend', 'frontend'),
+    ('auth-svc', 'auth-svc'),
+    ('user-product', 'user-product-svc'),
+)
+
+_CPU_UNITS = {'n': 1e-6, 'u': 1e-3, 'm': 1.0}
+_MEMORY_UNITS = {'Ki': 2 ** 10, 'Mi': 2 ** 20, 'Gi': 2 ** 30, 'Ti': 2 ** 40,
+                 'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12}
+
+
+def cpu_millicores(quantity):
+    """Kubernetes CPU quantity ('250m', '1', '123456789n') in millicores"""
+    quantity = str(quantity)
+    unit = _CPU_UNITS.get(quantity[-1:])
+    if unit is not None:
+        return float(quantity[:-1]) * unit
+    return float(quantity) * 1000
+
+
+def memory_mib(quantity):
+    """Kubernetes memory quantity ('128Mi', '1Gi', '134217728') in MiB"""
+    quantity = str(quantity)
+    for suffix in ('Ki', 'Mi', 'Gi', 'Ti', 'k', 'M', 'G', 'T'):
+        if quantity.endswith(suffix):
+            return float(quantity[:-len(suffix)]) * _MEMORY_UNITS[suffix] / 2 ** 20
+    return float(quantity) / 2 ** 20
+
+
+def service_for_pod(pod_name):
+    for fragment, service in POD_SERVICES:
+        if fragment in pod_name:
+            return service
+    return ''
+
+
+def time_format(interval):
+    """Timestamp format of the CSVs: whole seconds, or milliseconds for sub-second cadences"""
+    return '%Y-%m-%d %H:%M:%S' if float(interval).is_integer() else '%Y-%m-%d %H:%M:%S.%f'
+
+
+def format_stamp(moment, fmt):
+    stamp = moment.strftime(fmt)
+    return stamp[:-3] if fmt.endswith('%f') else stamp
+
+
+def _utilization(metrics, resource):
+    """averageUtilization of one resource metric from an HPA status/spec metric list"""
+    for metric in metrics or ():
+        if metric.get('type') != 'Resource' or metric.get('resource', {}).get('name') != resource:
+            continue
+        values = metric['resource'].get('current') or metric['resource'].get('target') or {}
+        return values.get('averageUtilization')
+    return None
+
+
+def _go_format(value):
+    """A JSON value the way kubectl's custom-columns prints it (Go's %v of the unstructured object)"""
+    if isinstance(value, dict):
+        return 'map[' + ' '.join(f"{key}:{_go_format(value[key])}" for key in sorted(value)) + ']'
+    if isinstance(value, list):
+        return '[' + ' '.join(_go_format(item) for item in value) + ']'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if value is None:
+        return '<nil>'
+    return str(value)
+
+
+def targets_column(current_metrics):
+    """targets column of the HPA CSV: the .status.currentMetrics dump monitor-scaling.sh wrote, spaces as underscores"""
+    if not current_metrics:
+        return '<none>'
+    return _go_format(current_metrics).replace(' ', '_')
+
+
+def hpa_rows(document, stamp):
+    """CSV rows of a `kubectl get hpa -o json` document"""
+    rows = []
+    for item in document.get('items', ()):
+        spec, status = item.get('spec', {}), item.get('status', {})
+        current_metrics = status.get('currentMetrics')
+        cpu = _utilization(current_metrics, 'cpu') or 0
+        memory = _utilization(current_metrics, 'memory') or 0
+        rows.append(f"{stamp},{item['metadata']['name']},{status.get('currentReplicas', 0)},"
+                    f"{status.get('desiredReplicas', 0)},{spec.get('minReplicas', 1)},{spec.get('maxReplicas', 0)},"
+                    f"{cpu},{memory},{targets_column(current_metrics)}")
+    return rows
+
+
+def resource_rows(document, stamp):
+    """CSV rows (millicores, MiB) of a metrics.k8s.io PodMetricsList document"""
+    rows = []
+    for item in document.get('items', ()):
+        name = item['metadata']['name']
+        containers = item.get('containers', ())
+        cpu = sum(cpu_millicores(container['usage']['cpu']) for container in containers)
+        memory = sum(memory_mib(container['usage']['memory']) for container in containers)
+        rows.append(f"{stamp},{name},{round(cpu)},{round(memory)},{service_for_pod(name)}")
+    return rows
+
+
+def resource_key(args):
+    """Recording/replay name of a kubectl invocation: hpa, pods, events or pod-metrics"""
+    if '--raw' in args:
+        return 'pod-metrics'
+    return args[args.index('get') + 1] if 'get' in args else 'other'
+
+
+class Kubectl:
+    """Runs kubectl with JSON output; optionally records every response for later replay"""
+
+    def __init__(self, kubectl='kubectl', namespace=NAMESPACE, timeout=KUBECTL_TIMEOUT_S, record_dir=None):
+        self.kubectl = kubectl
+        self.namespace = namespace
+        self.timeout = timeout
+        self.record_dir = record_dir
+        self.calls = 0
+        self.failures = {}
+        self._recorded = {}
+
+    async def get_json(self, *args):
+        """Parsed output of `kubectl <args>`, or None (with one warning per resource) on failure"""
+        key = resource_key(args)
+        self.calls += 1
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.kubectl, *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise RuntimeError(f"timed out after {self.timeout:g}s")
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode('utf-8', 'replace').strip() or f"exit status {process.returncode}")
+            document = json.loads(stdout)
+        except (OSError, RuntimeError, ValueError) as e:
+            if key not in self.failures:
+                print(f"⚠️  kubectl {' '.join(args)} failed: {e}", flush=True)
+            self.failures[key] = self.failures.get(key, 0) + 1
+            return None
+        if self.record_dir:
+            self._record(key, stdout)
+        return document
+
+    def _record(self, key, raw):
+        directory = os.path.join(self.record_dir, key)
+        os.makedirs(directory, exist_ok=True)
+        sequence = self._recorded[key] = self._recorded.get(key, 0) + 1
+        with open(os.path.join(directory, f'{sequence:06d}.json'), 'wb') as f:
+            f.write(raw)
+
+    def hpa(self):
+        return self.get_json('get', 'hpa', '-n', self.namespace, '-o', 'json')
+
+    def pod_metrics(self):
+        return self.get_json('get', '--raw', POD_METRICS_PATH.format(namespace=self.namespace))
+
+    def pods(self):
+        return self.get_json('get', 'pods', '-n', self.namespace, '-o', 'json')
+
+    def events(self):
+        return self.get_json('get', 'events', '-n', self.namespace, '-o', 'json')
+
+
+class CsvSink:
+    """CSV file kept open with a large buffer; rows of a tick go out in one write"""
+
+    def __init__(self, path, header, flush_interval=FLUSH_INTERVAL_S):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.rows = 0
+        self.flush_interval = flush_interval
+        self._file = open(path, 'w', buffering=1024 * 1024)
+        self._file.write(header + '\n')
+        self._file.flush()
+        self._flushed = time.monotonic()
+
+    def write(self, rows):
+        if rows:
+            self._file.write('\n'.join(rows) + '\n')
+            self.rows += len(rows)
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self._file.flush()
+            self._flushed = time.monotonic()
+
+    def close(self):
+        self._file.close()
+
+
+def format_status(hpa_doc, metrics_doc, pods_doc, events_doc, sinks):
+    """Periodic console summary built from the documents already fetched"""
+    lines = [f"🔍 Nova HPA Scaling Monitor - {datetime.now():%Y-%m-%d %H:%M:%S}", "=" * 40, "", "📊 Current HPA Status:"]
+    if hpa_doc is None:
+        lines.append("❌ Could not fetch HPA status")
+    for item in (hpa_doc or {}).get('items', ()):
+        spec, status = item.get('spec', {}), item.get('status', {})
+        lines.append(f"   {item['metadata']['name']:<22} {status.get('currentReplicas', 0)}/{status.get('desiredReplicas', 0)} "
+                     f"replicas ({spec.get('minReplicas', 1)}-{spec.get('maxReplicas', 0)}), "
+                     f"cpu {_utilization(status.get('currentMetrics'), 'cpu') or 0}%, "
+                     f"memory {_utilization(status.get('currentMetrics'), 'memory') or 0}%")
+
+    pods = (pods_doc or {}).get('items', [])
+    lines += ["", "🏃 Current Pods:", f"Total pods: {len(pods)}"]
+    for pod in pods[:10]:
+        lines.append(f"{pod['metadata']['name']} - {pod.get('status', {}).get('phase', '?')} - "
+                     f"{pod.get('spec', {}).get('nodeName', '<none>')}")
+    if len(pods) > 10:
+        lines.append(f"... and {len(pods) - 10} more pods")
+
+    lines += ["", "💾 Resource Usage:"]
+    usage = resource_rows(metrics_doc, '') if metrics_doc is not None else []
+    if not usage:
+        lines.append("❌ Metrics not available")
+    for row in usage[:10]:
+        _, name, cpu, memory, _ = row.split(',')
+        lines.append(f"   {name:<50} {cpu:>6}m {memory:>6}Mi")
+
+    rescales = [event for event in (events_doc or {}).get('items', ())
+                if event.get('reason') == 'SuccessfulRescale']
+    rescales.sort(key=lambda event: event.get('lastTimestamp') or event.get('eventTime') or '')
+    lines += ["", "📈 Scaling Events (last 5):"]
+    lines += [f"   {event.get('lastTimestamp') or event.get('eventTime')} {event.get('involvedObject', {}).get('name')}: "
+              f"{event.get('message')}" for event in rescales[-5:]] or ["No scaling events yet"]
+
+    lines += ["", "💡 Monitoring files:"]
+    lines += [f"   {label}: {sink.path} ({sink.rows} records)" for label, sink in sinks.items()]
+    lines += ["", "⏹️  Press Ctrl+C to stop monitoring"]
+    return '\n'.join(lines)
+
+
+async def sample(hpa_path, resource_path, kubectl='kubectl', namespace=NAMESPACE, interval=DEFAULT_INTERVAL_S,
+                 status_interval=STATUS_INTERVAL_S, duration=None, record_dir=None):
+    """Sample until SIGINT/SIGTERM (or `duration` seconds); returns the run statistics"""
+    client = Kubectl(kubectl, namespace, record_dir=record_dir)
+    sinks = {'HPA': CsvSink(hpa_path, HPA_HEADER), 'Metrics': CsvSink(resource_path, RESOURCE_HEADER)}
+    fmt = time_format(interval)
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    origin = loop.time()
+    tick = ticks = skipped = 0
+    late = []
+    next_status = origin
+    try:
+        while not stop.is_set():
+            # Tick n is due at origin + n * interval however long the previous ticks took
+            due = origin + tick * interval
+            if duration is not None and due - origin >= duration:
+                break
+            try:
+                await asyncio.wait_for(stop.wait(), max(due - loop.time(), 0))
+                break
+            except asyncio.TimeoutError:
+                pass
+            late.append(loop.time() - due)
+
+            stamp = format_stamp(datetime.now(), fmt)
+            hpa_doc, metrics_doc = await asyncio.gather(client.hpa(), client.pod_metrics())
+            sinks['HPA'].write(hpa_rows(hpa_doc, stamp) if hpa_doc is not None else [])
+            sinks['Metrics'].write(resource_rows(metrics_doc, stamp) if metrics_doc is not None else [])
+            ticks += 1
+
+            if status_interval and loop.time() >= next_status:
+                pods_doc, events_doc = await asyncio.gather(client.pods(), client.events())
+                print(format_status(hpa_doc, metrics_doc, pods_doc, events_doc, sinks), flush=True)
+                next_status += status_interval * (1 + (loop.time() - next_status) // status_interval)
+
+            # A tick that overran the next slot(s) skips them rather than bunching up
+            tick += 1
+            behind = int((loop.time() - (origin + tick * interval)) // interval) + 1
+            if behind > 0:
+                tick += behind
+                skipped += behind
+    finally:
+        for sink in sinks.values():
+            sink.close()
+
+    return {
+        'ticks': ticks,
+        'skipped_ticks': skipped,
+        'max_late_s': max(late, default=0.0),
+        'mean_late_s': sum(late) / len(late) if late else 0.0,
+        'kubectl_calls': client.calls,
+        'kubectl_failures': dict(client.failures),
+        'rows': {label: sink.rows for label, sink in sinks.items()},
+    }
+
+
+def run_sampler(hpa_path, resource_path, **options):
+    """Blocking entry point for the monitor CLI"""
+    try:
+        return asyncio.run(sample(hpa_path, resource_path, **options))
+    except KeyboardInterrupt:
+        return None
@@ -0,0 +1,203 @@
+"""
+Mergeable latency sketch with bounded relative error
+Log-spaced buckets (DDSketch style): every quantile is within `relative_accuracy` of the true value
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+DEFAULT_ACCURACY = 0.01
+
+# Durations at or below this (ms) are counted in a dedicated zero bucket
+MIN_TRACKED_MS = 1e-3
+
+_HEADER = struct.Struct('<4sdqqdddq')
+_MAGIC = b'NLS1'
+
+
+def _log_gamma(relative_accuracy):
+    gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+    return gamma, np.log(gamma)
+
+
+def bucket_index(values, relative_accuracy=DEFAULT_ACCURACY):
+    """Map positive values to their log bucket index (vectorized)"""
+    _, log_gamma = _log_gamma(relative_accuracy)
+    return np.ceil(np.log(values) / log_gamma).astype(np.int64)
+
+
+class LatencySketch:
+    """Quantile sketch over latencies in milliseconds; a few KB for any run length"""
+
+    def __init__(self, relative_accuracy=DEFAULT_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma, self.log_gamma = _log_gamma(relative_accuracy)
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zero_count = 0
+        self.sum = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + _HEADER.size
+
+    def _ensure_range(self, low, high):
+        """Grow the dense bucket array so that indices low..high fit"""
+        if len(self.counts) == 0:
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        current_high = self.offset + len(self.counts) - 1
+        new_low, new_high = min(low, self.offset), max(high, current_high)
+        if new_low == self.offset and new_high == current_high:
+            return
+        grown = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        start = self.offset - new_low
+        grown[start:start + len(self.counts)] = self.counts
+        self.offset = new_low
+        self.counts = grown
+
+    def add(self, values):
+        """Add an array of latency samples"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return self
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        tracked = values[values > MIN_TRACKED_MS]
+        self.zero_count += len(values) - len(tracked)
+        if len(tracked):
+            index = np.ceil(np.log(tracked) / self.log_gamma).astype(np.int64)
+            self.add_bucket_counts(index.min(), np.bincount(index - index.min()))
+        return self
+
+    def add_bucket_counts(self, offset, counts):
+        """Add pre-binned counts for consecutive buckets starting at `offset`"""
+        if len(counts) == 0:
+            return
+        self._ensure_range(offset, offset + len(counts) - 1)
+        start = offset - self.offset
+        self.counts[start:start + len(counts)] += counts
+
+    def merge(self, other):
+        """Fold another sketch (same accuracy) into this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.add_bucket_counts(other.offset, other.counts)
+        self.zero_count += other.zero_count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, qs):
+        """Estimate quantiles (0-1) of everything added so far"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        total = self.count
+        if total == 0:
+            return np.full(len(qs), np.nan)
+
+        ranks = qs * (total - 1)
+        cumulative = np.cumsum(self.counts) + self.zero_count
+        bucket = np.searchsorted(cumulative, ranks, side='right')
+        bucket = np.minimum(bucket, len(self.counts) - 1)
+        estimates = 2 * self.gamma ** (bucket + self.offset) / (self.gamma + 1)
+        estimates = np.where(ranks < self.zero_count, 0.0, estimates)
+        return np.clip(estimates, self.min, self.max)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def percentiles(self, percentiles=(50, 90, 95, 99)):
+        """Return {'p50': ..., ...} for the requested percentiles"""
+        values = self.quantiles(np.asarray(percentiles) / 100.0)
+        return {f'p{p}': float(v) for p, v in zip(percentiles, values)}
+
+    def mean(self):
+        total = self.count
+        return self.sum / total if total else float('nan')
+
+    def to_bytes(self):
+        """Serialize to a compact byte string"""
+        header = _HEADER.pack(_MAGIC, self.relative_accuracy, self.offset, self.zero_count,
+                              self.sum, self.min, self.max, len(self.counts))
+        return header + zlib.compress(self.counts.tobytes(), 6)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        """Rebuild a sketch produced by to_bytes()"""
+        magic, accuracy, offset, zero_count, total, low, high, size = _HEADER.unpack_from(payload)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialized LatencySketch")
+        sketch = cls(accuracy)
+        sketch.offset = offset
+        sketch.zero_count = zero_count
+        sketch.sum, sketch.min, sketch.max = total, low, high
+        counts = np.frombuffer(zlib.decompress(payload[_HEADER.size:]), dtype=np.int64)
+        if len(counts) != size:
+            raise ValueError("Corrupt LatencySketch payload")
+        sketch.counts = counts.copy()
+        return sketch
+
+
+def windowed_sketches(times_ns, values, window_s, relative_accuracy=DEFAULT_ACCURACY, start_ns=None):
+    """Split samples into fixed time windows and sketch each window
+
+    Returns (window_start_ns, sketches). All windows are binned with a single 2-D bincount.
+    """
+    times_ns = np.asarray(times_ns)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64), []
+
+    start_ns = times_ns.min() if start_ns is None else start_ns
+    window_ns = int(window_s * 1e9)
+    window = ((times_ns - start_ns) // window_ns).astype(np.int64)
+    n_windows = int(window.max()) + 1
+
+    tracked = values > MIN_TRACKED_MS
+    index = np.zeros(len(values), dtype=np.int64)
+    index[tracked] = bucket_index(values[tracked], relative_accuracy)
+    low = int(index[tracked].min()) if tracked.any() else 0
+    width = (int(index[tracked].max()) - low + 1) if tracked.any() else 1
+
+    grid = np.bincount(window[tracked] * width + (index[tracked] - low),
+                       minlength=n_windows * width).reshape(n_windows, width)
+    zeros = np.bincount(window[~tracked], minlength=n_windows)
+    sums = np.bincount(window, weights=values, minlength=n_windows)
+    counts = np.bincount(window, minlength=n_windows)
+    mins = np.full(n_windows, np.inf)
+    maxs = np.full(n_windows, -np.inf)
+    np.minimum.at(mins, window, values)
+    np.maximum.at(maxs, window, values)
+
+    sketches = []
+    for w in range(n_windows):
+        sketch = LatencySketch(relative_accuracy)
+        if counts[w]:
+            nonzero = np.nonzero(grid[w])[0]
+            if len(nonzero):
+                sketch.add_bucket_counts(low + nonzero[0], grid[w, nonzero[0]:nonzero[-1] + 1])
+            sketch.zero_count = int(zeros[w])
+            sketch.sum, sketch.min, sketch.max = float(sums[w]), float(mins[w]), float(maxs[w])
+        sketches.append(sketch)
+
+    starts = start_ns + np.arange(n_windows, dtype=np.int64) * window_ns
+    return starts, sketches
+
+
+def percentile_series(sketches, percentiles=(50, 90, 95, 99)):
+    """Stack per-window percentile estimates into a {'p95': array, ...} dict"""
+    qs = np.asarray(percentiles) / 100.0
+    table = np.array([sketch.quantiles(qs) for sketch in sketches]) if sketches else np.empty((0, len(qs)))
+    return {f'p{p}': table[:, i] for i, p in enumerate(percentiles)}
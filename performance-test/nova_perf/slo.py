@@ -0,0 +1,251 @@
+"""
+Sliding-window SLO, Apdex and error-budget burn rates over the request stream
+Requests are counted into per-second buckets of a ring buffer; every window keeps running sums
+that are updated as seconds enter and leave it, so each sample costs O(1) in batch and follow mode
+"""
+
+import re
+
+import numpy as np
+
+SECOND_NS = 1_000_000_000
+
+# Window the SLO compliance (and Apdex) is evaluated over
+DEFAULT_SLO_WINDOW_S = 60
+
+# Apdex: satisfied <= T, tolerating <= 4T
+DEFAULT_APDEX_T_MS = 500
+DEFAULT_APDEX_OBJECTIVE = 0.85
+
+# Multi-window burn-rate alerts, scaled down to a ~50 minute test:
+# (name, long window s, short window s, burn rate both windows must exceed)
+BURN_ALERTS = (
+    ('fast', 300, 60, 14.4),
+    ('slow', 1800, 300, 6.0),
+)
+
+# A window with fewer requests than this is not evaluated
+MIN_WINDOW_REQUESTS = 20
+
+# Seconds are closed (evaluated) once a sample this much later has been seen
+CLOSE_LAG_S = 2
+
+_THRESHOLDS_RE = re.compile(r'(http_req_duration|http_req_failed)\s*:\s*\[([^\]]*)\]')
+_PERCENTILE_RE = re.compile(r'p\((\d+(?:\.\d+)?)\)\s*<\s*(\d+(?:\.\d+)?)')
+_RATE_RE = re.compile(r'rate\s*<\s*(\d*\.?\d+)')
+
+# Fixed counter columns of a bucket; latency threshold counts follow
+_REQUESTS, _FAILURES, _FAILURE_SAMPLES = 0, 1, 2
+_FIXED = 3
+
+
+def latency_slo(threshold_ms, objective):
+    return {'name': f'{objective:.0%} < {threshold_ms:g}ms', 'kind': 'latency',
+            'threshold_ms': float(threshold_ms), 'objective': float(objective)}
+
+
+def error_slo(max_rate):
+    return {'name': f'errors < {max_rate:.0%}', 'kind': 'errors', 'objective': 1 - float(max_rate)}
+
+
+def apdex_slo(t_ms=DEFAULT_APDEX_T_MS, objective=DEFAULT_APDEX_OBJECTIVE):
+    return {'name': f'Apdex({t_ms:g}ms) >= {objective:g}', 'kind': 'apdex',
+            'threshold_ms': float(t_ms), 'objective': float(objective)}
+
+
+def slos_from_script(script_path, apdex_t_ms=DEFAULT_APDEX_T_MS, apdex_objective=DEFAULT_APDEX_OBJECTIVE):
+    """SLOs equivalent to the k6 `thresholds` of a load script, plus an Apdex objective
+
+    p(95)<5000 on http_req_duration becomes "95% of requests under 5000ms" and rate<0.1 on
+    http_req_failed becomes "errors under 10%".
+    """
+    with open(script_path, 'r') as f:
+        source = f.read()
+    slos = []
+    for metric, body in _THRESHOLDS_RE.findall(source):
+        if metric == 'http_req_duration':
+            slos += [latency_slo(float(threshold), float(q) / 100) for q, threshold in _PERCENTILE_RE.findall(body)]
+        else:
+            slos += [error_slo(float(rate)) for rate in _RATE_RE.findall(body)]
+    if apdex_t_ms:
+        slos.append(apdex_slo(apdex_t_ms, apdex_objective))
+    return slos
+
+
+class SloTracker:
+    """Ring buffer of per-second request counters with running sums per window"""
+
+    def __init__(self, slos, slo_window_s=DEFAULT_SLO_WINDOW_S, burn_alerts=BURN_ALERTS,
+                 min_requests=MIN_WINDOW_REQUESTS, close_lag_s=CLOSE_LAG_S):
+        self.slos = list(slos)
+        self.slo_window_s = slo_window_s
+        self.burn_alerts = burn_alerts
+        self.min_requests = min_requests
+        self.close_lag_s = close_lag_s
+
+        # Every latency threshold (Apdex uses T and 4T) gets a "requests at or under" column
+        limits = set()
+        for slo in self.slos:
+            if slo['kind'] == 'latency':
+                limits.add(slo['threshold_ms'])
+            elif slo['kind'] == 'apdex':
+                limits.update((slo['threshold_ms'], 4 * slo['threshold_ms']))
+        self.limits = np.array(sorted(limits))
+        self._column = {limit: _FIXED + i for i, limit in enumerate(self.limits)}
+        width = _FIXED + len(self.limits)
+
+        self.windows = sorted({slo_window_s} | {w for _, long_s, short_s, _ in burn_alerts for w in (long_s, short_s)})
+        self.ring_seconds = max(self.windows)
+        self.ring = np.zeros((self.ring_seconds, width))
+        self.sums = {w: np.zeros(width) for w in self.windows}
+
+        self.pending = {}
+        self.pending_vus = {}
+        self.closed = None
+        self.latest = None
+        self.vus = 0.0
+
+        self.breaches = {}
+        self.rows = []
+
+    def _bucket_counts(self, seconds, durations=None, failed=None):
+        """Per-second counter rows for a batch of samples: (unique seconds, counts)"""
+        unique, inverse = np.unique(seconds, return_inverse=True)
+        counts = np.zeros((len(unique), self.ring.shape[1]))
+        if durations is not None:
+            counts[:, _REQUESTS] = np.bincount(inverse, minlength=len(unique))
+            for i, limit in enumerate(self.limits):
+                counts[:, _FIXED + i] = np.bincount(inverse, weights=durations <= limit, minlength=len(unique))
+        if failed is not None:
+            counts[:, _FAILURES] = np.bincount(inverse, weights=failed, minlength=len(unique))
+            counts[:, _FAILURE_SAMPLES] = np.bincount(inverse, minlength=len(unique))
+        return unique, counts
+
+    def add(self, times=None, durations=None, fail_times=None, failed=None, vus_times=None, vus_values=None):
+        """Count a batch of samples (any of the series may be omitted) and close finished seconds"""
+        batches = []
+        if times is not None and len(times):
+            batches.append(self._bucket_counts(times // SECOND_NS, durations=durations))
+        if fail_times is not None and len(fail_times):
+            batches.append(self._bucket_counts(fail_times // SECOND_NS, failed=failed))
+        for unique, counts in batches:
+            for second, row in zip(unique.tolist(), counts):
+                self._add_second(second, row)
+            self.latest = max(self.latest if self.latest is not None else unique[-1], int(unique[-1]))
+
+        if vus_times is not None and len(vus_times):
+            seconds = vus_times // SECOND_NS
+            # Last VU value of each second
+            last = np.r_[seconds[1:] != seconds[:-1], True]
+            for second, value in zip(seconds[last].tolist(), vus_values[last].tolist()):
+                if self.closed is None or second > self.closed:
+                    self.pending_vus[second] = value
+
+        if self.latest is not None:
+            self._close_until(self.latest - self.close_lag_s)
+
+    def _add_second(self, second, row):
+        if self.closed is None or second > self.closed:
+            pending = self.pending.get(second)
+            if pending is None:
+                self.pending[second] = row.copy()
+            else:
+                pending += row
+            return
+        # Late sample for a second that was already closed: fold it into the windows still covering it
+        if second <= self.closed - self.ring_seconds:
+            return
+        self.ring[second % self.ring_seconds] += row
+        for w in self.windows:
+            if second > self.closed - w:
+                self.sums[w] += row
+
+    def _close_until(self, last_second):
+        if self.closed is None:
+            if not self.pending:
+                return
+            self.closed = min(min(self.pending), min(self.pending_vus, default=np.inf)) - 1
+        empty = np.zeros(self.ring.shape[1])
+        for second in range(self.closed + 1, last_second + 1):
+            # Drop the buckets that leave each window (read before the ring slot is overwritten)
+            for w in self.windows:
+                self.sums[w] -= self.ring[(second - w) % self.ring_seconds]
+            row = self.pending.pop(second, empty)
+            self.ring[second % self.ring_seconds] = row
+            for w in self.windows:
+                self.sums[w] += row
+            if second in self.pending_vus:
+                self.vus = self.pending_vus.pop(second)
+            self.closed = second
+            self._evaluate(second)
+
+    def flush(self):
+        """Close every pending second (end of a batch or of the followed run)"""
+        if self.pending:
+            self._close_until(max(self.pending))
+
+    def _compliance(self, slo, sums):
+        requests = sums[_REQUESTS]
+        if slo['kind'] == 'errors':
+            samples = sums[_FAILURE_SAMPLES]
+            return 1 - sums[_FAILURES] / samples if samples else np.nan
+        if not requests:
+            return np.nan
+        if slo['kind'] == 'latency':
+            return sums[self._column[slo['threshold_ms']]] / requests
+        satisfied = sums[self._column[slo['threshold_ms']]]
+        tolerating = sums[self._column[4 * slo['threshold_ms']]] - satisfied
+        return (satisfied + tolerating / 2) / requests
+
+    def _evaluate(self, second):
+        end_ns = (second + 1) * SECOND_NS
+        window = self.sums[self.slo_window_s]
+        row = {'time_ns': end_ns, 'vus': self.vus, 'requests': window[_REQUESTS]}
+        for slo in self.slos:
+            name = slo['name']
+            compliance = self._compliance(slo, window)
+            row[name] = compliance
+            enough = window[_REQUESTS] >= self.min_requests
+            if enough and compliance < slo['objective']:
+                self._breach(slo, 'window', f'{self.slo_window_s}s window', end_ns, compliance)
+
+            budget = 1 - slo['objective']
+            for alert, long_s, short_s, factor in self.burn_alerts:
+                burns = []
+                for w in (long_s, short_s):
+                    compliance_w = self._compliance(slo, self.sums[w])
+                    burns.append((1 - compliance_w) / budget if budget > 0 else np.nan)
+                row[f'{name} burn {long_s}s'] = burns[0]
+                if enough and burns[0] > factor and burns[1] > factor:
+                    self._breach(slo, 'burn', f'{alert} burn ({long_s}s/{short_s}s > {factor:g}x)', end_ns, burns[0])
+        self.rows.append(row)
+
+    def _breach(self, slo, kind, rule, time_ns, value):
+        key = (slo['name'], rule)
+        if key not in self.breaches:
+            self.breaches[key] = {'slo': slo['name'], 'type': kind, 'rule': rule, 'objective': slo['objective'],
+                                  'time_ns': time_ns, 'vus': self.vus, 'value': float(value)}
+
+    def first_breaches(self):
+        """First breach of every SLO window and burn-rate rule, in time order"""
+        return sorted(self.breaches.values(), key=lambda breach: breach['time_ns'])
+
+    def series(self):
+        """Per-second window values as columns"""
+        if not self.rows:
+            return {}
+        return {key: np.array([row[key] for row in self.rows]) for key in self.rows[0]}
+
+    def latest_row(self):
+        return self.rows[-1] if self.rows else None
+
+
+def evaluate_slos(points, slos, slo_window_s=DEFAULT_SLO_WINDOW_S, burn_alerts=BURN_ALERTS):
+    """Run the tracker over a whole run of decoded points"""
+    tracker = SloTracker(slos, slo_window_s, burn_alerts)
+    times, durations = points.series('http_req_duration')
+    fail_times, failed = points.series('http_req_failed')
+    vus_times, vus_values = points.series('vus')
+    tracker.add(times, durations, fail_times, failed, vus_times, vus_values)
+    tracker.flush()
+    return tracker
@@ -0,0 +1,169 @@
+"""
+Per-concurrency and per-stage aggregation of k6 samples
+Bins every http_req_duration sample by the active VU count at its timestamp
+"""
+
+import re
+
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+# Concurrency levels the VU range is binned into by default (50-VU bins up to the script's 2000 VUs)
+CONCURRENCY_LEVELS = 40
+
+_STAGE_RE = re.compile(r"\{\s*duration:\s*'(\d+(?:\.\d+)?)(ms|s|m|h)'\s*,\s*target:\s*(\d+)\s*\}")
+_UNIT_SECONDS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_stage_profile(script_path):
+    """Read `options.stages` from a k6 script as a list of (duration_s, target_vus)"""
+    with open(script_path, 'r') as f:
+        source = f.read()
+    return [(float(amount) * _UNIT_SECONDS[unit], int(target))
+            for amount, unit, target in _STAGE_RE.findall(source)]
+
+
+def vus_at(times, vus_times, vus_values):
+    """As-of lookup of the active VU count for each timestamp"""
+    if len(vus_times) == 0:
+        return np.zeros(len(times))
+    index = np.searchsorted(vus_times, times, side='right') - 1
+    return vus_values[np.clip(index, 0, len(vus_values) - 1)]
+
+
+def grouped_percentiles(group_ids, values, n_groups, percentiles=PERCENTILES):
+    """Percentiles of `values` within each integer group, computed with one sort"""
+    order = np.lexsort((values, group_ids))
+    sorted_values = values[order]
+    counts = np.bincount(group_ids, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    result = np.full((len(percentiles), n_groups), np.nan)
+    present = counts > 0
+    for row, q in enumerate(percentiles):
+        # Linear interpolation between closest ranks, same as np.percentile's default
+        rank = (counts[present] - 1) * (q / 100.0)
+        low = np.floor(rank).astype(np.int64)
+        high = np.minimum(low + 1, counts[present] - 1)
+        frac = rank - low
+        base = starts[present]
+        result[row, present] = (sorted_values[base + low] * (1 - frac)
+                                + sorted_values[base + high] * frac)
+    return result
+
+
+def group_stats(group_ids, durations, failed, n_groups, seconds):
+    """Count, percentiles, throughput and error rate per group"""
+    counts = np.bincount(group_ids, minlength=n_groups)
+    pct = grouped_percentiles(group_ids, durations, n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rps = np.where(seconds > 0, counts / seconds, 0.0)
+        mean = np.bincount(group_ids, weights=durations, minlength=n_groups) / counts
+    stats = {
+        'requests': counts,
+        'seconds': seconds,
+        'rps': rps,
+        'rpm': rps * 60,
+        'avg': mean,
+    }
+    for row, q in enumerate(PERCENTILES):
+        stats[f'p{q}'] = pct[row]
+    if failed is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['error_rate'] = np.bincount(group_ids, weights=failed, minlength=n_groups) / counts
+    else:
+        stats['error_rate'] = np.zeros(n_groups)
+    return stats
+
+
+def request_samples(points):
+    """Return (times, durations, failed) for HTTP requests, failed aligned when available"""
+    times, durations = points.series('http_req_duration')
+    fail_times, failed = points.series('http_req_failed')
+    if len(failed) != len(durations) or not np.array_equal(fail_times, times):
+        # k6 emits one http_req_failed point per request; if they do not line up, fall back
+        # to an as-of lookup so each request still gets a failure flag
+        failed = vus_at(times, fail_times, failed) if len(failed) else None
+    return times, durations, failed
+
+
+def default_bin_width(peak_vus):
+    """VU bin width that splits 0..peak_vus into about CONCURRENCY_LEVELS levels"""
+    return max(1, int(round(peak_vus / CONCURRENCY_LEVELS)))
+
+
+def aggregate_by_concurrency(points, bin_width=None, min_requests=20):
+    """Latency percentiles and throughput for each concurrency level (VU bin)"""
+    times, durations, failed = request_samples(points)
+    vus_times, vus_values = points.series('vus')
+    if len(times) == 0 or len(vus_times) == 0:
+        return None
+    if bin_width is None:
+        bin_width = default_bin_width(vus_values.max())
+
+    sample_vus = vus_at(times, vus_times, vus_values)
+    group_ids = (sample_vus // bin_width).astype(np.int64)
+    n_groups = int(group_ids.max()) + 1
+
+    # Time spent at each level: every vus sample holds until the next one
+    spans = np.diff(vus_times, append=times.max()) / 1e9
+    span_groups = np.minimum((vus_values // bin_width).astype(np.int64), n_groups - 1)
+    seconds = np.bincount(span_groups, weights=np.maximum(spans, 0), minlength=n_groups)
+
+    stats = group_stats(group_ids, durations, failed, n_groups, seconds)
+    stats['vus'] = np.arange(n_groups) * bin_width + bin_width / 2.0
+
+    keep = stats['requests'] >= min_requests
+    return {key: values[keep] for key, values in stats.items()}
+
+
+def stage_boundaries(points, stages):
+    """Start of every stage plus the end of the last one, in ns, from the first sample of the run"""
+    test_start = points.time_ns.view().min()
+    stage_seconds = np.array([duration for duration, _ in stages])
+    return test_start + np.concatenate(([0], np.cumsum(stage_seconds))) * 1e9
+
+
+def stage_ids(boundaries, times):
+    """Stage index of each timestamp; samples outside the profile go to the first/last stage"""
+    return np.clip(np.searchsorted(boundaries, times, side='right') - 1, 0, len(boundaries) - 2)
+
+
+def aggregate_by_stage(points, stages, rollup=None):
+    """Latency percentiles and throughput for each `options.stages` entry
+
+    With a rollup index (nova_perf.rollup) the request statistics are read from its buckets.
+    """
+    if not stages:
+        return None
+    stage_seconds = np.array([duration for duration, _ in stages])
+    boundaries = stage_boundaries(points, stages)
+    n_stages = len(stages)
+
+    if rollup is not None:
+        stats = rollup.span_stats(boundaries[:-1], boundaries[1:])
+        if not stats['requests'].sum():
+            return None
+    else:
+        times, durations, failed = request_samples(points)
+        if len(times) == 0:
+            return None
+        stats = group_stats(stage_ids(boundaries, times), durations, failed, n_stages, stage_seconds)
+    targets = np.array([target for _, target in stages], dtype=np.float64)
+    stats['stage'] = np.arange(1, n_stages + 1)
+    stats['start_vus'] = np.concatenate(([0.0], targets[:-1]))
+    stats['target_vus'] = targets
+    stats['kind'] = np.where(targets > stats['start_vus'], 'ramp up',
+                             np.where(targets < stats['start_vus'], 'ramp down', 'steady'))
+    stats['start_ns'] = boundaries[:-1].astype(np.int64)
+
+    vus_times, vus_values = points.series('vus')
+    if len(vus_values):
+        vu_groups = stage_ids(boundaries, vus_times)
+        vu_counts = np.bincount(vu_groups, minlength=n_stages)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['mean_vus'] = np.bincount(vu_groups, weights=vus_values, minlength=n_stages) / vu_counts
+    else:
+        stats['mean_vus'] = (stats['start_vus'] + targets) / 2
+    return stats
@@ -0,0 +1,398 @@
+"""
+Synthetic Nova test runs for benchmarking the analyzer
+Writes a k6 `--out json` point stream that follows the nova-load-test.js stage profile and
+endpoints, with latency that degrades past a configurable knee and injected error bursts,
+plus matching HPA and resource CSVs in the monitor-scaling.sh schema
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from nova_perf.sampler import targets_column
+
+BASE_URL = 'https://34-49-196-23.nip.io'
+
+# Requests of one nova-load-test.js iteration:
+# (method, path, service, status, median latency ms, requests per iteration)
+ENDPOINTS = (
+    ('GET', '', 'frontend', 200, 40.0, 1.0),
+    ('GET', '/api/country-codes', 'user-product-svc', 200, 25.0, 4.0),
+    ('POST', '/api/login', 'auth-svc', 200, 90.0, 1.0),
+    ('POST', '/api/users', 'user-product-svc', 201, 120.0, 0.1),
+    ('GET', '/api/users/test-user-id', 'user-product-svc', 200, 45.0, 0.9),
+    ('GET', '/favicon.ico', 'frontend', 200, 15.0, 1.0),
+)
+
+# Mean time a VU sleeps per iteration of the script (the random sleeps add up to ~7.8s)
+ITERATION_SLEEP_S = 7.8
+
+# Requests of one iteration (the per-iteration counts of ENDPOINTS add up to it)
+REQUESTS_PER_ITERATION = 8
+
+# Point records k6 writes for every HTTP request
+REQUEST_METRICS = ('http_reqs', 'http_req_duration', 'http_req_waiting', 'http_req_failed',
+                   'data_sent', 'data_received')
+
+# Metric records (`{"type":"Metric",...}`) announced at the start of the stream
+METRIC_TYPES = (
+    ('vus', 'gauge'),
+    ('vus_max', 'gauge'),
+    ('http_reqs', 'counter'),
+    ('http_req_duration', 'trend'),
+    ('http_req_waiting', 'trend'),
+    ('http_req_failed', 'rate'),
+    ('data_sent', 'counter'),
+    ('data_received', 'counter'),
+    ('iteration_duration', 'trend'),
+)
+
+# Status of the requests that fail during an error burst or at the background error rate
+ERROR_STATUS = 503
+
+# Cluster side of the run, mirroring k8s/*.yaml and k8s/hpa-autoscaling.yaml:
+# (HPA name, pod prefix, min, max, cpu request m, memory request Mi, cpu ms per request, memory MiB per VU)
+CLUSTER = (
+    ('api-gateway-hpa', 'api-gateway', 2, 10, 100, 128, 1.5, 0.04),
+    ('frontend-hpa', 'frontend', 2, 8, 50, 64, 0.8, 0.02),
+    ('auth-svc-hpa', 'auth-svc', 2, 6, 100, 128, 6.0, 0.03),
+    ('user-product-hpa', 'user-product-svc', 2, 8, 100, 128, 2.5, 0.05),
+)
+
+# HPA behaviour: target utilization, scale-down stabilization, at most doubling per minute,
+# and how long a new pod takes to become ready
+CPU_TARGET = 70
+SCALE_DOWN_STABILIZATION_S = 300
+SCALE_UP_PERIOD_S = 60
+POD_READY_S = 40
+
+# Matches the monitor-scaling.sh sampling cadence
+MONITOR_INTERVAL_S = 15
+
+# Lines are formatted in blocks of about this many requests
+BLOCK_REQUESTS = 20_000
+
+_MONITOR_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def vus_per_second(stages):
+    """Active VUs for every second of a stage profile (linear ramps between targets)"""
+    ends = np.cumsum([duration for duration, _ in stages])
+    targets = [target for _, target in stages]
+    seconds = np.arange(int(np.ceil(ends[-1])))
+    return np.interp(seconds, np.concatenate([[0], ends]), np.concatenate([[0], targets])).round().astype(np.int64)
+
+
+def latency_factor(vus, knee_vus, degradation):
+    """Latency multiplier at each VU level: flat up to the knee, quadratic past it"""
+    overload = np.maximum(0.0, np.asarray(vus, dtype=np.float64) / knee_vus - 1.0)
+    return 1.0 + degradation * overload ** 2
+
+
+def error_burst_mask(n_seconds, bursts, burst_seconds, rng):
+    """Seconds covered by `bursts` randomly placed error bursts"""
+    mask = np.zeros(n_seconds, dtype=bool)
+    if bursts <= 0 or n_seconds <= burst_seconds:
+        return mask
+    for start in rng.choice(n_seconds - burst_seconds, size=bursts, replace=False):
+        mask[start:start + burst_seconds] = True
+    return mask
+
+
+def iteration_rate(vus, knee_vus, degradation):
+    """Script iterations per second: closed-model throughput, VUs / (sleep + request latency)"""
+    weights = np.array([endpoint[5] for endpoint in ENDPOINTS])
+    medians = np.array([endpoint[4] for endpoint in ENDPOINTS])
+    iteration_s = ITERATION_SLEEP_S + (weights * medians).sum() / 1000 * latency_factor(vus, knee_vus, degradation)
+    return vus / iteration_s
+
+
+def _tag_json(method, url, status):
+    """The tags object k6 writes for an HTTP request point"""
+    return json.dumps({
+        'expected_response': 'true' if status < 400 else 'false',
+        'group': '',
+        'method': method,
+        'name': url,
+        'proto': 'HTTP/2.0',
+        'scenario': 'default',
+        'status': str(status),
+        'tls_version': 'tls1.3',
+        'url': url,
+    }, separators=(',', ':'))
+
+
+def _with_vu(tags, vu_tags):
+    """%-escaped tags JSON, plus the `vu` system tag as a %(vu)d placeholder when enabled"""
+    tags = tags.replace('%', '%%')
+    return tags[:-1] + ',"vu":"%(vu)d"}' if vu_tags else tags
+
+
+def _request_templates(vu_tags=True):
+    """One %-template per (endpoint, failed) holding all REQUEST_METRICS lines of a request
+
+    Placeholders: %(t)s, %(duration)f, %(waiting)f, %(received)d and, with vu_tags, %(vu)d.
+    """
+    templates = []
+    for method, path, _, status, _, _ in ENDPOINTS:
+        url = BASE_URL + path
+        for failed in (False, True):
+            tags = _with_vu(_tag_json(method, url, ERROR_STATUS if failed else status), vu_tags)
+            values = ('1', '%(duration).6f', '%(waiting).6f', '1' if failed else '0', '%d' % (180 + len(url)),
+                      '%(received)d')
+            templates.append(''.join(
+                f'{{"metric":"{metric}","type":"Point","data":{{"time":"%(t)s","value":{value},"tags":{tags}}}}}\n'
+                for metric, value in zip(REQUEST_METRICS, values)))
+    return templates
+
+
+def _iteration_template(vu_tags=True):
+    """%-template of an iteration_duration point; placeholders %(t)s, %(duration)f and, with vu_tags, %(vu)d"""
+    tags = _with_vu(json.dumps({'group': '', 'scenario': 'default'}, separators=(',', ':')), vu_tags)
+    return f'{{"metric":"iteration_duration","type":"Point","data":{{"time":"%(t)s","value":%(duration).6f,"tags":{tags}}}}}\n'
+
+
+def _header_lines():
+    """Metric declaration records k6 writes before the first point"""
+    return ''.join(json.dumps({'type': 'Metric', 'data': {'name': name, 'type': kind, 'contains': 'default',
+                                                          'thresholds': [], 'submetrics': None}, 'metric': name},
+                              separators=(',', ':')) + '\n'
+                   for name, kind in METRIC_TYPES)
+
+
+def _gauge_line(metric, stamp, value):
+    """An untagged gauge point such as vus"""
+    return f'{{"metric":"{metric}","type":"Point","data":{{"time":"{stamp}","value":{value},"tags":null}}}}\n'
+
+
+def vu_scale(stages, n_points, knee_vus=1000, degradation=8.0):
+    """VU multiplier that fits the stage profile into about n_points points at the script's per-VU request rate"""
+    vus = vus_per_second(stages)
+    requests = (iteration_rate(vus, knee_vus, degradation) * REQUESTS_PER_ITERATION).sum()
+    budget = max(0, n_points - 2 * len(vus)) / (len(REQUEST_METRICS) + 1 / REQUESTS_PER_ITERATION)
+    return budget / requests if requests > 0 else 1.0
+
+
+def simulate_vus(vus, knee_vus, degradation, rng):
+    """Closed-loop run of a per-second VU profile: every active VU sends one request at a time and sleeps
+    between them as the script does
+
+    Returns (end time s, duration ms, endpoint, vu) per request and (end time s, duration ms, vu) per
+    iteration: REQUESTS_PER_ITERATION requests and their sleeps, cut short when the profile stops the VU.
+    """
+    n_seconds = len(vus)
+    n_vus = int(vus.max(initial=0))
+    weights = np.array([endpoint[5] for endpoint in ENDPOINTS])
+    medians = np.array([endpoint[4] for endpoint in ENDPOINTS])
+    factor = latency_factor(vus, knee_vus, degradation)
+    sleep_s = ITERATION_SLEEP_S / REQUESTS_PER_ITERATION
+
+    # VU k runs while the profile has at least k VUs, starting in the first such second
+    vu = np.arange(1, n_vus + 1)
+    t = np.searchsorted(np.maximum.accumulate(vus), vu) + rng.random(n_vus)
+    # Requests sent in the current iteration and when it began
+    sent = np.zeros(n_vus, dtype=np.int64)
+    began = t.copy()
+    requests, iterations = [], []
+    while len(vu):
+        second = t.astype(np.int64)
+        running = second < n_seconds
+        t, vu, second, sent, began = t[running], vu[running], second[running], sent[running], began[running]
+        active = vus[second] >= vu
+        # Stopped VUs drop their iteration and check again every second until the profile brings them back
+        t[~active] = second[~active] + 1
+        sent[~active] = 0
+        sending = np.nonzero(active)[0]
+        n = len(sending)
+        finished = sending[sent[sending] == REQUESTS_PER_ITERATION]
+        iterations.append((t[finished], (t[finished] - began[finished]) * 1000, vu[finished]))
+        sent[finished] = 0
+        starting = sending[sent[sending] == 0]
+        began[starting] = t[starting]
+        sent[sending] += 1
+        endpoint = rng.choice(len(ENDPOINTS), size=n, p=weights / weights.sum())
+        duration = medians[endpoint] * factor[second[sending]] * rng.lognormal(0.0, 0.35, size=n)
+        end = t[sending] + duration / 1000
+        requests.append((end, duration, endpoint, vu[sending]))
+        t[sending] = end + sleep_s * rng.uniform(0.5, 1.5, size=n)
+
+    return _by_end(requests, 4, n_seconds), _by_end(iterations, 3, n_seconds)
+
+
+def _by_end(batches, n_columns, n_seconds):
+    """Concatenated (end, ...) column batches in end-time order, without the ones ending after the run"""
+    if not batches:
+        return (np.empty(0),) * n_columns
+    columns = [np.concatenate(column) for column in zip(*batches)]
+    order = np.argsort(columns[0], kind='stable')
+    order = order[columns[0][order] < n_seconds]
+    return tuple(column[order] for column in columns)
+
+
+def write_k6_points(path, stages, n_points, start, knee_vus=1000, degradation=8.0, error_rate=0.002,
+                    bursts=3, burst_seconds=20, burst_error_rate=0.3, vu_tags=True, seed=0):
+    """Write a k6 NDJSON point stream of about n_points points; returns the per-second load it holds
+
+    The VUs keep the script's own request rate (about one per VU-second), so the point budget is met
+    by scaling the VU count of every stage (vu_scale); knee_vus is scaled with it. Requests and
+    iterations carry the `vu` tag unless vu_tags is off. `start` is a timezone-aware datetime;
+    point times carry its UTC offset like k6 does.
+    """
+    rng = np.random.default_rng(seed)
+    scale = vu_scale(stages, n_points, knee_vus, degradation)
+    vus = np.round(vus_per_second(stages) * scale).astype(np.int64)
+    n_seconds = len(vus)
+    (end, duration, endpoint, vu), (iteration_end, iteration_ms, iteration_vu) = simulate_vus(
+        vus, knee_vus * scale, degradation, rng)
+    second = end.astype(np.int64)
+    micros = np.minimum(((end - second) * 1_000_000).astype(np.int64), 999_999)
+    counts = np.bincount(second, minlength=n_seconds)
+    iteration_second = iteration_end.astype(np.int64)
+    iteration_micros = np.minimum(((iteration_end - iteration_second) * 1_000_000).astype(np.int64), 999_999)
+    iteration_bounds = np.concatenate([[0], np.cumsum(np.bincount(iteration_second, minlength=n_seconds))])
+    burst = error_burst_mask(n_seconds, bursts, burst_seconds, rng)
+    waiting = duration * rng.uniform(0.8, 0.97, size=len(end))
+    received = rng.integers(300, 4000, size=len(end))
+    failed = rng.random(len(end)) < np.where(burst[second], burst_error_rate, error_rate)
+    template_ids = endpoint * 2 + failed
+
+    templates = _request_templates(vu_tags)
+    iteration_template = _iteration_template(vu_tags)
+    zone = start.strftime('%z')
+    zone = f'{zone[:3]}:{zone[3:]}'
+    seconds_prefix = [(start + timedelta(seconds=int(s))).strftime('%Y-%m-%dT%H:%M:%S') for s in range(n_seconds)]
+
+    bounds = np.concatenate([[0], np.cumsum(counts)])
+    with open(path, 'w') as f:
+        f.write(_header_lines())
+        first = 0
+        while first < n_seconds:
+            # Block of whole seconds holding about BLOCK_REQUESTS requests
+            last = max(first + 1, int(np.searchsorted(bounds, bounds[first] + BLOCK_REQUESTS, side='right')) - 1)
+            last = min(last, n_seconds)
+            lines = []
+            for s in range(first, last):
+                stamp = f'{seconds_prefix[s]}.000000{zone}'
+                lines.append(_gauge_line('vus', stamp, vus[s]))
+                lines.append(_gauge_line('vus_max', stamp, vus.max()))
+                prefix = seconds_prefix[s]
+                for i in range(bounds[s], bounds[s + 1]):
+                    lines.append(templates[template_ids[i]] % {
+                        't': f'{prefix}.{micros[i]:06d}{zone}', 'duration': duration[i], 'waiting': waiting[i],
+                        'received': received[i], 'vu': vu[i]})
+                for i in range(iteration_bounds[s], iteration_bounds[s + 1]):
+                    lines.append(iteration_template % {
+                        't': f'{prefix}.{iteration_micros[i]:06d}{zone}', 'duration': iteration_ms[i],
+                        'vu': iteration_vu[i]})
+            f.write(''.join(lines))
+            first = last
+
+    service_rps = {}
+    for index, (_, _, service, _, _, _) in enumerate(ENDPOINTS):
+        rps = np.bincount(second[endpoint == index], minlength=n_seconds).astype(np.float64)
+        service_rps[service] = service_rps.get(service, 0) + rps
+    return {'vus': vus, 'service_rps': service_rps, 'vu_scale': scale}
+
+
+def simulate_scaling(load, seed=0):
+    """HPA replicas and per-pod CPU/memory at every monitor tick for the per-second load
+
+    Returns {hpa_name: dict of per-tick arrays}; services behind the api-gateway also load it.
+    """
+    rng = np.random.default_rng(seed + 1)
+    vus = load['vus']
+    service_rps = dict(load['service_rps'])
+    service_rps['api-gateway'] = service_rps['auth-svc'] + service_rps['user-product-svc']
+    ticks = np.arange(0, len(vus), MONITOR_INTERVAL_S)
+
+    scaling = {}
+    for hpa, service, low, high, cpu_request, memory_request, cpu_ms, memory_per_vu in CLUSTER:
+        tick_rps = np.add.reduceat(service_rps[service], ticks) / np.diff(np.append(ticks, len(vus)))
+        ready = np.empty(len(ticks), dtype=np.int64)
+        desired = np.empty(len(ticks), dtype=np.int64)
+        cpu = np.empty(len(ticks))
+        replicas, pending, last_up = low, [], -SCALE_UP_PERIOD_S
+        history = []
+        for tick, second in enumerate(ticks):
+            # Pods scheduled earlier become ready POD_READY_S later
+            replicas += sum(1 for at in pending if at <= second)
+            pending = [at for at in pending if at > second]
+            total_millicores = 5 * replicas + cpu_ms * tick_rps[tick]
+            utilization = total_millicores / replicas / cpu_request * 100
+            wanted = int(np.clip(np.ceil(replicas * utilization / CPU_TARGET), low, high))
+            history.append((second, wanted))
+            history = [(at, value) for at, value in history if at > second - SCALE_DOWN_STABILIZATION_S]
+            target = replicas + len(pending)
+            if wanted > target and second - last_up >= SCALE_UP_PERIOD_S:
+                new = min(wanted, 2 * target) - target
+                pending += [second + POD_READY_S] * new
+                last_up = second
+                target += new
+            elif wanted < target and not pending:
+                # Scale down only to the highest recommendation of the stabilization window
+                target = max(max(value for _, value in history), low)
+                replicas = target
+            ready[tick], desired[tick], cpu[tick] = replicas, target, utilization
+        memory = (0.55 * memory_request + memory_per_vu * vus[ticks] / ready) * rng.uniform(0.97, 1.03, len(ticks))
+        scaling[hpa] = {
+            'second': ticks,
+            'service': service,
+            'min': low,
+            'max': high,
+            'ready': ready,
+            'desired': desired,
+            'cpu_percent': cpu,
+            'memory_percent': memory / memory_request * 100,
+            'pod_millicores': cpu / 100 * cpu_request,
+            'pod_memory_mib': memory,
+        }
+    return scaling
+
+
+def _current_metrics(cpu, memory):
+    """HPA .status.currentMetrics entries for the given utilization percentages"""
+    return [{'type': 'Resource', 'resource': {'name': name, 'current': {'averageUtilization': value}}}
+            for name, value in (('cpu', cpu), ('memory', memory))]
+
+
+def write_monitor_csvs(hpa_path, resource_path, scaling, start, seed=0):
+    """Write the HPA and resource CSVs monitor-scaling.sh would have collected"""
+    rng = np.random.default_rng(seed + 2)
+    local_start = start.astimezone().replace(tzinfo=None)
+    hpa_rows = ['timestamp,service,current_replicas,desired_replicas,min_replicas,max_replicas,'
+                'cpu_percent,memory_percent,targets']
+    resource_rows = ['timestamp,pod_name,cpu_cores,memory_bytes,service']
+    alphabet = np.array(list('bcdfghjklmnpqrstvwxz2456789'))
+    pod_names = {hpa: [f"{s['service']}-{rng.integers(16 ** 9):09x}-{''.join(rng.choice(alphabet, 5))}"
+                       for _ in range(s['max'])] for hpa, s in scaling.items()}
+
+    ticks = next(iter(scaling.values()))['second']
+    for tick, second in enumerate(ticks):
+        stamp = (local_start + timedelta(seconds=int(second))).strftime(_MONITOR_TIME_FORMAT)
+        for hpa, s in scaling.items():
+            cpu, memory = int(round(s['cpu_percent'][tick])), int(round(s['memory_percent'][tick]))
+            hpa_rows.append(f"{stamp},{hpa},{s['ready'][tick]},{s['desired'][tick]},{s['min']},{s['max']},"
+                            f"{cpu},{memory},{targets_column(_current_metrics(cpu, memory))}")
+        for hpa, s in scaling.items():
+            for pod in pod_names[hpa][:s['ready'][tick]]:
+                millicores = max(1, int(s['pod_millicores'][tick] * rng.uniform(0.9, 1.1)))
+                mib = int(s['pod_memory_mib'][tick] * rng.uniform(0.98, 1.02))
+                resource_rows.append(f"{stamp},{pod},{millicores},{mib},{s['service']}")
+
+    for path, rows in ((hpa_path, hpa_rows), (resource_path, resource_rows)):
+        with open(path, 'w') as f:
+            f.write('\n'.join(rows) + '\n')
+
+
+def generate_run(output_dir, test_name, stages, n_points, start=None, seed=0, **load_options):
+    """Write <test_name>_results.json plus the matching HPA/resource CSVs; returns their paths"""
+    start = start or datetime.now().astimezone().replace(microsecond=0)
+    paths = {
+        'k6_results': f'{output_dir}/{test_name}_results.json',
+        'hpa_data': f'{output_dir}/hpa_scaling_{test_name}.csv',
+        'resource_metrics': f'{output_dir}/resource_metrics_{test_name}.csv',
+    }
+    load = write_k6_points(paths['k6_results'], stages, n_points, start, seed=seed, **load_options)
+    write_monitor_csvs(paths['hpa_data'], paths['resource_metrics'], simulate_scaling(load, seed), start, seed)
+    return paths
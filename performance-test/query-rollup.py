@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Use virtual environment for dependencies
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'venv', 'lib', 'python3.13', 'site-packages'))
+"""
+Nova Rollup Query
+Answers time-range questions about a finished run ("p99 and RPS between minute 22 and 27")
+from its rollup index instead of rescanning the raw results
+"""
+
+import argparse
+import re
+import time
+
+import numpy as np
+
+from nova_perf import run_cache
+from nova_perf.correlate import format_time
+from nova_perf.k6_stream import read_k6_points
+from nova_perf.rollup import SECOND_NS, RollupIndex, load_rollup
+from nova_perf.stages import parse_stage_profile
+
+_OFFSET_RE = re.compile(r'(\d+(?:\.\d+)?)(h|m|s)')
+_UNIT_SECONDS = {'h': 3600, 'm': 60, 's': 1}
+
+def parse_offset(text):
+    """Seconds from a run offset such as 90, 90s, 22m or 1h5m30s"""
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _OFFSET_RE.findall(text)
+    if not parts or ''.join(amount + unit for amount, unit in parts) != text:
+        raise argparse.ArgumentTypeError(f"invalid offset {text!r} (use e.g. 90, 90s, 22m or 1h5m)")
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+def open_index(run, rebuild=False):
+    """Rollup index of a results file (built on first use) or an existing _rollup.npz"""
+    if run.endswith('_rollup.npz'):
+        return RollupIndex.load(run)
+    index, loaded = load_rollup(run, lambda: run_cache.load_points(run, read_k6_points)[0], rebuild)
+    print(f"🗂️  {'Loaded' if loaded else 'Built'} rollup index of {run}", file=sys.stderr)
+    return index
+
+def format_result(label, result):
+    sketch = result['sketch']
+    percentiles = sketch.percentiles((50, 90, 95, 99))
+    errors = f"{result['error_rate'] * 100:.2f}%" if np.isfinite(result['error_rate']) else '-'
+    return (f"{label:<24} {result['requests']:>9,} req {result['rps']:9.1f} RPS  "
+            f"p50 {percentiles['p50']:8.1f}  p90 {percentiles['p90']:8.1f}  p95 {percentiles['p95']:8.1f}  "
+            f"p99 {percentiles['p99']:8.1f} ms  errors {errors}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the rollup index of a Nova performance test run')
+    parser.add_argument('run', help='k6 results file (its index is built on first use) or a _rollup.npz index')
+    parser.add_argument('--from', dest='start', type=parse_offset, default=0,
+                        help='Range start as an offset from the run start (e.g. 22m, 1h5m, 90)')
+    parser.add_argument('--to', dest='end', type=parse_offset, help='Range end as an offset (default end of the run)')
+    parser.add_argument('--stage', type=int, help='Query one options.stages entry of --load-script instead of --from/--to')
+    parser.add_argument('--load-script', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nova-load-test.js'),
+                        help='k6 script whose options.stages defines --stage')
+    parser.add_argument('--method', help='Only requests with this HTTP method')
+    parser.add_argument('--path', help='Only endpoints whose path starts with this')
+    parser.add_argument('--status', help='Only responses with this status code')
+    parser.add_argument('--window', type=parse_offset, help='Also print one line per window of this length within the range')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index from the raw results')
+
+    args = parser.parse_args()
+    index = open_index(args.run, args.rebuild)
+    if index is None:
+        print("❌ The run has no request samples")
+        sys.exit(1)
+
+    start_s, end_s = args.start, args.end
+    if args.stage is not None:
+        stages = parse_stage_profile(args.load_script) if os.path.exists(args.load_script) else []
+        if not 1 <= args.stage <= len(stages):
+            parser.error(f"--stage must be between 1 and {len(stages)} for {args.load_script}")
+        bounds = np.concatenate(([0], np.cumsum([duration for duration, _ in stages])))
+        start_s, end_s = bounds[args.stage - 1], bounds[args.stage]
+    start_ns = index.start_ns + int(start_s * SECOND_NS)
+    end_ns = index.end_ns if end_s is None else index.start_ns + int(end_s * SECOND_NS)
+    groups = index.select(args.method, args.path, args.status)
+    if groups is not None and not len(groups):
+        print("❌ No endpoint matches the --method/--path/--status filter")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    result = index.query(start_ns, end_ns, groups)
+    elapsed = time.perf_counter() - started
+    print(f"🔎 {format_time(start_ns)} - {format_time(end_ns)} ({(end_ns - start_ns) / 1e9:,.0f}s)"
+          f"{f' matching {len(groups)} endpoint group(s)' if groups is not None else ''}")
+    print(format_result('range', result))
+    if args.window:
+        window_ns = int(args.window * SECOND_NS)
+        for window_start in range(start_ns, end_ns, window_ns):
+            print(format_result(format_time(window_start), index.query(window_start, min(window_start + window_ns, end_ns), groups)))
+    print(f"⚡ {result['buckets']} buckets read in {elapsed * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
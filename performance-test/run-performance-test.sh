@@ -12,6 +12,17 @@ echo "=============================="
 TIMESTAMP=$(date +%Y%m%d_%H%M%S)
 RESULTS_DIR="performance-tests/results"
 TEST_NAME="nova_load_test_${TIMESTAMP}"
+BASELINE_RESULTS="${BASELINE_RESULTS:-}"  # Optional k6 results file of a known-good run to gate against
+COMPRESS_RESULTS="${COMPRESS_RESULTS:-true}"  # Recompress the k6 point stream once the run is analyzed
+K6_RESULTS_FILE="${TEST_NAME}_results.json"
+MOCK_GATEWAY="${MOCK_GATEWAY:-false}"  # Run against mock-gateway.py on this machine instead of the GKE cluster
+MOCK_GATEWAY_PORT="${MOCK_GATEWAY_PORT:-8080}"
+MOCK_GATEWAY_RUN="${MOCK_GATEWAY_RUN:-}"  # Optional recorded k6 results (or _rollup.npz) the mock's service times are fitted to
+if [ "$MOCK_GATEWAY" = "true" ]; then
+    TARGET_URL="http://127.0.0.1:${MOCK_GATEWAY_PORT}"
+else
+    TARGET_URL="https://34-49-196-23.nip.io"
+fi
 
 # Colors for output
 GREEN='\033[0;32m'
@@ -26,7 +37,7 @@ mkdir -p "$RESULTS_DIR"
 echo -e "${BLUE}📋 Test Configuration:${NC}"
 echo "   Test Name: $TEST_NAME"
 echo "   Results Directory: $RESULTS_DIR"
-echo "   Target System: https://34-49-196-23.nip.io"
+echo "   Target System: $TARGET_URL"
 echo "   Duration: ~50 minutes (1 → 2000 users)"
 echo ""
 
@@ -40,8 +51,8 @@ check_prerequisites() {
         exit 1
     fi
     
-    # Check kubectl
-    if ! kubectl cluster-info > /dev/null 2>&1; then
+    # Check kubectl (the mock gateway needs no cluster)
+    if [ "$MOCK_GATEWAY" != "true" ] && ! kubectl cluster-info > /dev/null 2>&1; then
         echo -e "${RED}❌ kubectl not configured or cluster not accessible${NC}"
         exit 1
     fi
@@ -62,16 +73,61 @@ check_prerequisites() {
     fi
     
     # Test system accessibility
-    if ! curl -s -f https://34-49-196-23.nip.io/ > /dev/null; then
-        echo -e "${RED}❌ Nova system not accessible at https://34-49-196-23.nip.io/${NC}"
+    if ! curl -s -f "$TARGET_URL/" > /dev/null; then
+        echo -e "${RED}❌ Nova system not accessible at $TARGET_URL/${NC}"
         exit 1
     fi
     
     echo -e "${GREEN}✅ All prerequisites met${NC}"
 }
 
+# Function to start the local mock gateway
+start_mock_gateway() {
+    echo -e "${YELLOW}🧪 Starting mock gateway on port $MOCK_GATEWAY_PORT...${NC}"
+    
+    MOCK_CMD="performance-tests/venv/bin/python3 performance-tests/mock-gateway.py --port $MOCK_GATEWAY_PORT"
+    if [ -n "$MOCK_GATEWAY_RUN" ]; then
+        MOCK_CMD="$MOCK_CMD --from-run $MOCK_GATEWAY_RUN --save-model $RESULTS_DIR/mock_model_${TEST_NAME}.json"
+    fi
+    
+    # Started directly (not in a subshell) so the SIGINT from stop_mock_gateway reaches it
+    $MOCK_CMD > "$RESULTS_DIR/mock_gateway_${TEST_NAME}.log" 2>&1 &
+    MOCK_PID=$!
+    
+    # Fitting the model may build a rollup index first; wait until the gateway answers
+    for _ in $(seq 1 120); do
+        if curl -s -f "$TARGET_URL/" > /dev/null; then
+            echo -e "${GREEN}✅ Mock gateway started (PID: $MOCK_PID)${NC}"
+            echo "   Log file: $RESULTS_DIR/mock_gateway_${TEST_NAME}.log"
+            return 0
+        fi
+        if ! kill -0 $MOCK_PID 2>/dev/null; then
+            break
+        fi
+        sleep 1
+    done
+    
+    echo -e "${RED}❌ Mock gateway did not start - see $RESULTS_DIR/mock_gateway_${TEST_NAME}.log${NC}"
+    exit 1
+}
+
+# Function to stop the local mock gateway
+stop_mock_gateway() {
+    if [ ! -z "$MOCK_PID" ] && kill -0 $MOCK_PID 2>/dev/null; then
+        echo -e "${YELLOW}🛑 Stopping mock gateway...${NC}"
+        kill -INT $MOCK_PID
+        wait $MOCK_PID 2>/dev/null || true
+        echo -e "${GREEN}✅ Mock gateway stopped${NC}"
+    fi
+}
+
 # Function to start HPA monitoring
 start_hpa_monitoring() {
+    if [ "$MOCK_GATEWAY" = "true" ]; then
+        echo -e "${YELLOW}⚠️  Mock gateway run - no cluster to monitor${NC}"
+        return 0
+    fi
+    
     echo -e "${YELLOW}📊 Starting HPA monitoring...${NC}"
     
     # Make monitoring script executable
@@ -109,6 +165,7 @@ run_k6_test() {
     
     # Run k6 test with JSON output
     k6 run \
+        -e BASE_URL="$TARGET_URL" \
         --out json="$RESULTS_DIR/${TEST_NAME}_results.json" \
         --summary-export="$RESULTS_DIR/${TEST_NAME}_summary.json" \
         performance-tests/nova-load-test.js \
@@ -141,8 +198,8 @@ stop_hpa_monitoring() {
 analyze_results() {
     echo -e "${YELLOW}📊 Analyzing test results...${NC}"
     
-    # Find the most recent result files
-    K6_RESULTS="$RESULTS_DIR/${TEST_NAME}_summary.json"
+    # Find the most recent result files (the point stream carries the per-stage data)
+    K6_RESULTS="$RESULTS_DIR/${TEST_NAME}_results.json"
     HPA_DATA=$(ls "$RESULTS_DIR"/hpa_scaling_*.csv 2>/dev/null | tail -1)
     RESOURCE_DATA=$(ls "$RESULTS_DIR"/resource_metrics_*.csv 2>/dev/null | tail -1)
     
@@ -176,6 +233,36 @@ analyze_results() {
     fi
 }
 
+# Function to compare against a baseline run
+compare_with_baseline() {
+    if [ -z "$BASELINE_RESULTS" ]; then
+        return 0
+    fi
+    
+    echo -e "${YELLOW}🔬 Comparing against baseline $BASELINE_RESULTS...${NC}"
+    source performance-tests/venv/bin/activate && python3 performance-tests/compare-runs.py \
+        "$BASELINE_RESULTS" "$RESULTS_DIR/${TEST_NAME}_results.json" \
+        --output-dir "$RESULTS_DIR/analysis_$TEST_NAME"
+}
+
+# Function to compress the k6 point stream (the analyzers read it compressed)
+compress_results() {
+    if [ "$COMPRESS_RESULTS" != "true" ]; then
+        return 0
+    fi
+    
+    echo -e "${YELLOW}🗜️  Compressing k6 results...${NC}"
+    source performance-tests/venv/bin/activate && python3 performance-tests/compress-results.py \
+        "$RESULTS_DIR/${TEST_NAME}_results.json"
+    
+    if [ $? -eq 0 ]; then
+        K6_RESULTS_FILE=$(cd "$RESULTS_DIR" && ls "${TEST_NAME}"_results.json.* 2>/dev/null | head -1)
+        echo -e "${GREEN}✅ k6 results compressed: $K6_RESULTS_FILE${NC}"
+    else
+        echo -e "${YELLOW}⚠️  Compression failed - keeping the uncompressed results${NC}"
+    fi
+}
+
 # Function to generate final report
 generate_final_report() {
     echo -e "${YELLOW}📋 Generating final report...${NC}"
@@ -187,13 +274,13 @@ generate_final_report() {
 **Test ID:** $TEST_NAME  
 **Date:** $(date)  
 **Duration:** ~50 minutes  
-**Target:** https://34-49-196-23.nip.io  
+**Target:** $TARGET_URL  
 
 ## 📁 Generated Files
 
 ### Test Results
 - **k6 Console Output:** \`${TEST_NAME}_console.log\`
-- **k6 JSON Results:** \`${TEST_NAME}_results.json\`
+- **k6 JSON Results:** \`${K6_RESULTS_FILE}\`
 - **k6 Summary:** \`${TEST_NAME}_summary.json\`
 
 ### Monitoring Data
@@ -267,6 +354,7 @@ cleanup() {
     echo ""
     echo -e "${YELLOW}🧹 Cleaning up...${NC}"
     stop_hpa_monitoring
+    stop_mock_gateway
     echo -e "${GREEN}✅ Cleanup completed${NC}"
 }
 
@@ -278,7 +366,11 @@ main() {
     echo -e "${BLUE}Starting performance test execution...${NC}"
     echo ""
     
-    # Step 1: Check prerequisites
+    # Step 1: Check prerequisites (the mock gateway has to be up for the accessibility check)
+    if [ "$MOCK_GATEWAY" = "true" ]; then
+        start_mock_gateway
+        echo ""
+    fi
     check_prerequisites
     echo ""
     
@@ -291,14 +383,24 @@ main() {
     K6_RESULT=$?
     echo ""
     
-    # Step 4: Stop monitoring
+    # Step 4: Stop monitoring (and the mock gateway, which prints its request summary)
     stop_hpa_monitoring
+    stop_mock_gateway
     echo ""
     
     # Step 5: Analyze results (even if k6 failed partially)
     analyze_results
     echo ""
     
+    # Step 5b: Gate on regressions against the baseline run, if one is configured
+    COMPARE_RESULT=0
+    compare_with_baseline || COMPARE_RESULT=$?
+    echo ""
+    
+    # Step 5c: Shrink the raw point stream now that nothing writes to it
+    compress_results || true
+    echo ""
+    
     # Step 6: Generate final report
     generate_final_report
     echo ""
@@ -306,7 +408,10 @@ main() {
     # Step 7: Display summary
     display_summary
     
-    # Return k6 exit code
+    # Return k6 exit code, or the comparison's if k6 passed but the run regressed
+    if [ $K6_RESULT -eq 0 ]; then
+        return $COMPARE_RESULT
+    fi
     return $K6_RESULT
 }
 
@@ -0,0 +1,21 @@
+"""
+pytest setup: the tests import nova_perf from the performance-test directory
+"""
+
+import os
+import sys
+
+import pytest
+
+PERFORMANCE_TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PERFORMANCE_TEST_DIR)
+
+from nova_perf.stages import parse_stage_profile  # noqa: E402
+from nova_perf.synthetic import generate_run  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def synthetic_run(tmp_path_factory):
+    """Paths of a small synthetic run of nova-load-test.js (k6 results, HPA and resource CSVs)"""
+    stages = parse_stage_profile(os.path.join(PERFORMANCE_TEST_DIR, 'nova-load-test.js'))
+    return generate_run(str(tmp_path_factory.mktemp('run')), 'synthetic', stages, 100_000, seed=1)
@@ -0,0 +1,17 @@
+"""
+USL replica projections (nova_perf.capacity)
+"""
+
+import pytest
+
+from nova_perf.capacity import replica_projections, usl_peak
+
+
+def test_gain_of_doubling_is_relative_to_the_peak_at_max_replicas():
+    lam, sigma, kappa = 2.0, 0.02, 1e-4
+    peak_users, peak_rps = usl_peak(lam, sigma, kappa)
+    fit = {'lambda': lam, 'sigma': sigma, 'kappa': kappa, 'peak_users': peak_users, 'peak_rps': peak_rps}
+    hpa_summary = {'auth-svc-hpa': {'max_replicas_reached': 2, 'max_replicas_configured': 6}}
+    row, = replica_projections(fit, hpa_summary)
+    assert row['peak_rps_at_max'] > peak_rps
+    assert row['gain_doubled'] == pytest.approx(row['peak_rps_doubled'] / row['peak_rps_at_max'] - 1)
@@ -0,0 +1,21 @@
+"""
+Error-rate bootstrap of the run comparison (nova_perf.compare)
+"""
+
+import numpy as np
+
+from nova_perf.compare import bootstrap_ratios
+
+
+def test_error_burst_widens_the_interval():
+    rng = np.random.default_rng(0)
+    samples = np.full(600, 20.0)
+    failures = rng.binomial(20, 0.002, size=600).astype(np.float64)
+    failures[300:320] = rng.binomial(20, 0.3, size=20)
+    rate = failures.sum() / samples.sum()
+
+    low, high = np.percentile(bootstrap_ratios(failures, samples, 2000, rng), [2.5, 97.5])
+    # Treating every request as independent (the binomial interval) hides the burst's weight
+    binomial_low, binomial_high = np.percentile(rng.binomial(int(samples.sum()), rate, 2000) / samples.sum(), [2.5, 97.5])
+    assert high - low > 3 * (binomial_high - binomial_low)
+    assert low < rate < high
@@ -0,0 +1,27 @@
+"""
+compress-results.py: a compressed run leaves no analysis cache of the plain file behind
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+from conftest import PERFORMANCE_TEST_DIR
+from nova_perf import run_cache
+from nova_perf.k6_stream import read_k6_points
+
+SCRIPT = os.path.join(PERFORMANCE_TEST_DIR, 'compress-results.py')
+
+
+def test_compressing_drops_the_cache_of_the_original(synthetic_run, tmp_path):
+    path = str(tmp_path / 'run_results.json')
+    shutil.copy(synthetic_run['k6_results'], path)
+    run_cache.load_points(path, read_k6_points)
+    run_cache.load_points([path, synthetic_run['k6_results']], lambda paths: read_k6_points(paths[0]))
+    cache_root = tmp_path / run_cache.CACHE_DIRNAME
+    assert len(os.listdir(cache_root)) == 2
+
+    subprocess.run([sys.executable, SCRIPT, path, '--format', 'gzip'], check=True, capture_output=True)
+    assert os.path.exists(path + '.gz') and not os.path.exists(path)
+    assert os.listdir(cache_root) == []
@@ -0,0 +1,42 @@
+"""
+hpa-what-if.py: costs are fitted to the recorded load, so --load-scale raises the predicted CPU
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+from conftest import PERFORMANCE_TEST_DIR
+
+SCRIPT = os.path.join(PERFORMANCE_TEST_DIR, 'hpa-what-if.py')
+
+_PEAK_CPU_RE = re.compile(r'^\s+(\S+)\s+replicas .*peak CPU (\d+)% of request', re.MULTILINE)
+_COST_RE = re.compile(r'^\s+(\S+)\s+([\d.]+) CPU ms/request', re.MULTILINE)
+
+
+def _what_if(synthetic_run, *options):
+    output = subprocess.run([sys.executable, SCRIPT, synthetic_run['k6_results'],
+                             '--resource-metrics', synthetic_run['resource_metrics'], *options],
+                            capture_output=True, text=True, check=True, cwd=PERFORMANCE_TEST_DIR).stdout
+    costs = {service: float(value) for service, value in _COST_RE.findall(output)}
+    peaks = {service: int(value) for service, value in _PEAK_CPU_RE.findall(output)}
+    return costs, peaks
+
+
+def test_load_scale_raises_peak_cpu(synthetic_run):
+    costs, peaks = _what_if(synthetic_run)
+    scaled_costs, scaled_peaks = _what_if(synthetic_run, '--load-scale', '20')
+    assert scaled_costs == costs
+    assert costs['auth-svc'] > 3
+    assert peaks.keys() == scaled_peaks.keys() and peaks
+    for service in peaks:
+        assert scaled_peaks[service] > 2 * peaks[service]
+
+
+def test_repeated_sweeps_combine(synthetic_run):
+    output = subprocess.run([sys.executable, SCRIPT, synthetic_run['k6_results'],
+                             '--sweep', 'cpu_target=50,70', '--sweep', 'max=5:7:1'],
+                            capture_output=True, text=True, check=True, cwd=PERFORMANCE_TEST_DIR).stdout
+    # 2 x 3 variants plus the configured policy
+    assert 'Simulated 7 variant(s)' in output
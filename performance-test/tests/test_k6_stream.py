@@ -0,0 +1,84 @@
+"""
+Memory footprint and parallel/compressed ingest of the decoded sample columns (nova_perf.k6_stream)
+"""
+
+import json
+import shutil
+
+import numpy as np
+
+from nova_perf.compression import compress_file
+from nova_perf.k6_stream import DEFAULT_TAGS, NO_TAG, read_k6_points, sample_nbytes
+
+N_REQUESTS = 5000
+
+
+def _write_run(path, n_requests):
+    """k6 --out json lines: http_reqs/http_req_duration/http_req_failed per request plus a vus gauge per 100"""
+    with open(path, 'w') as f:
+        for i in range(n_requests):
+            stamp = f"2026-10-17T12:{i // 6000:02d}:{i // 100 % 60:02d}.{i % 100:02d}0000000Z"
+            tags = {'group': '', 'method': 'GET', 'name': 'https://x/api/country-codes', 'scenario': 'default',
+                    'status': '200', 'vu': str(i % 50 + 1)}
+            for metric, value in (('http_reqs', 1), ('http_req_duration', 25.5), ('http_req_failed', 0)):
+                point = {'metric': metric, 'type': 'Point', 'data': {'time': stamp, 'value': value, 'tags': tags}}
+                f.write(json.dumps(point, separators=(',', ':')) + '\n')
+            if i % 100 == 0:
+                point = {'metric': 'vus', 'type': 'Point', 'data': {'time': stamp, 'value': 50, 'tags': None}}
+                f.write(json.dumps(point, separators=(',', ':')) + '\n')
+
+
+def test_default_tags_cost_26_bytes_per_sample():
+    # int64 time + float32 value + uint16 metric id + one uint16 code per tag
+    assert sample_nbytes() == 8 + 4 + 2 + 2 * len(DEFAULT_TAGS) == 26
+
+
+def test_decoded_run_holds_exactly_sample_nbytes_per_sample(tmp_path):
+    path = tmp_path / 'run.json'
+    _write_run(path, N_REQUESTS)
+    points = read_k6_points(str(path))
+
+    n_samples = 3 * N_REQUESTS + N_REQUESTS // 100
+    assert len(points) == n_samples
+    assert points.nbytes == n_samples * sample_nbytes()
+    assert points.bytes_per_sample == sample_nbytes()
+
+
+def test_vu_counts_are_exact_in_the_value_column(tmp_path):
+    path = tmp_path / 'run.json'
+    _write_run(path, N_REQUESTS)
+    _, vus = read_k6_points(str(path)).series('vus')
+    assert np.array_equal(vus, np.full(N_REQUESTS // 100, 50.0))
+
+
+def _decoded(points):
+    """Request columns with tags as text, independent of the tag code assignment"""
+    times, durations, codes = points.tagged_series('http_req_duration')
+    tags = {}
+    for key in points.tag_keys:
+        text = np.full(NO_TAG + 1, '', dtype=object)
+        text[:len(points.tag_values[key])] = points.tag_values[key]
+        tags[key] = text[codes[key].astype(np.int64)]
+    return times, durations, tags
+
+
+def _assert_same_columns(points, expected):
+    assert len(points) == len(expected)
+    times, durations, tags = _decoded(points)
+    expected_times, expected_durations, expected_tags = _decoded(expected)
+    assert np.array_equal(times, expected_times)
+    assert np.array_equal(durations, expected_durations)
+    for key in expected.tag_keys:
+        assert np.array_equal(tags[key], expected_tags[key])
+
+
+def test_parallel_ingest_matches_serial(synthetic_run):
+    serial = read_k6_points(synthetic_run['k6_results'])
+    _assert_same_columns(read_k6_points(synthetic_run['k6_results'], chunk_bytes=1 << 20, workers=2), serial)
+
+
+def test_gzip_results_read_like_plain(synthetic_run, tmp_path):
+    path = str(tmp_path / 'run_results.json')
+    shutil.copy(synthetic_run['k6_results'], path)
+    compressed, _, _ = compress_file(path, 'gzip')
+    _assert_same_columns(read_k6_points(compressed), read_k6_points(path))
@@ -0,0 +1,51 @@
+"""
+Knee detection and its bootstrap interval (nova_perf.knee)
+"""
+
+import time
+
+import numpy as np
+
+from nova_perf.knee import BOOTSTRAP_POINTS, MIN_SMOOTHING_WINDOW, default_window, detect_knee
+
+
+def _latency_curve(n_levels, noise_ms, seed=0):
+    """p95 vs VUs in 50-VU levels like a real run: flat, then rising steeply past 1300 VUs"""
+    rng = np.random.default_rng(seed)
+    vus = np.arange(n_levels) * 50 + 25.0
+    p95 = 100 + 2000 / (1 + np.exp(-(vus - 1300) / 80)) + rng.normal(0, noise_ms, n_levels)
+    return vus, p95
+
+
+def test_default_window_smooths_short_curves():
+    assert default_window(40) == MIN_SMOOTHING_WINDOW
+    assert default_window(3) == 1
+    assert default_window(1000) == 41
+
+
+def test_noisy_curve_has_a_nonzero_interval():
+    vus, p95 = _latency_curve(40, noise_ms=30)
+    knee = detect_knee(vus, p95, curve='convex')
+    assert knee['ci_high'] > knee['ci_low']
+    assert knee['ci_low'] <= knee['x'] <= knee['ci_high']
+    assert 800 <= knee['x'] <= 1400
+
+
+def test_bootstrap_is_reproducible():
+    vus, p95 = _latency_curve(40, noise_ms=30)
+    first = detect_knee(vus, p95, seed=3)
+    second = detect_knee(vus, p95, seed=3)
+    assert (first['ci_low'], first['ci_high']) == (second['ci_low'], second['ci_high'])
+
+
+def test_long_curve_bootstrap_stays_cheap():
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 2000, 100_000)
+    y = 100 + 2000 / (1 + np.exp(-(x - 1300) / 80)) + rng.normal(0, 30, len(x))
+    started = time.perf_counter()
+    knee = detect_knee(x, y)
+    # Every replicate on all 10^5 points took over a second
+    assert time.perf_counter() - started < 0.5
+    assert len(x) > BOOTSTRAP_POINTS
+    assert knee['ci_low'] < knee['ci_high']
+    assert knee['ci_low'] - 20 <= knee['x'] <= knee['ci_high'] + 20
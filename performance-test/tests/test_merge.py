@@ -0,0 +1,38 @@
+"""
+Clock-skew estimation when merging several generators (nova_perf.merge)
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from conftest import PERFORMANCE_TEST_DIR
+from nova_perf.merge import SECOND_NS, merge_k6_points
+from nova_perf.stages import parse_stage_profile
+from nova_perf.synthetic import generate_run
+
+SKEW_S = 7
+
+
+def test_shifted_generator_clock_is_estimated_and_removed(tmp_path):
+    stages = parse_stage_profile(os.path.join(PERFORMANCE_TEST_DIR, 'nova-load-test.js'))
+    start = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    # Both generators start together, but the second one's clock runs SKEW_S ahead
+    first = generate_run(str(tmp_path), 'gen-a', stages, 30_000, start=start, seed=1)
+    second = generate_run(str(tmp_path), 'gen-b', stages, 30_000, start=start + timedelta(seconds=SKEW_S), seed=2)
+
+    merged = merge_k6_points([first['k6_results'], second['k6_results']])
+    skews = merged.generators['skew_s']
+    assert skews[0] == 0.0
+    assert abs(skews[1] - SKEW_S) < 0.5
+    assert merged.generators['corrected'] == [False, True]
+
+    # After the correction both generators' requests start within the estimate's error
+    times, _, tags = merged.tagged_series('http_req_duration', ('generator',))
+    starts = [times[tags['generator'] == i].min() for i in range(2)]
+    assert abs(starts[1] - starts[0]) < SECOND_NS
+
+    unshifted = merge_k6_points([first['k6_results'], second['k6_results']], correct_skew=False)
+    assert unshifted.generators['corrected'] == [False, False]
+    assert np.isclose(unshifted.generators['skew_s'][1], skews[1])
@@ -0,0 +1,48 @@
+"""
+Rollup queries against the raw samples (nova_perf.rollup)
+"""
+
+import numpy as np
+import pytest
+
+from nova_perf.k6_stream import read_k6_points
+from nova_perf.rollup import build_rollup
+
+SECOND_NS = 1_000_000_000
+PERCENTILES = (50, 90, 95, 99)
+
+
+@pytest.fixture(scope='module')
+def points(synthetic_run):
+    return read_k6_points(synthetic_run['k6_results'])
+
+
+def _assert_percentiles_match(sketch, durations, accuracy):
+    estimates = sketch.percentiles(PERCENTILES)
+    for p in PERCENTILES:
+        lower = np.percentile(durations, p, method='lower')
+        higher = np.percentile(durations, p, method='higher')
+        assert lower * (1 - accuracy) <= estimates[f'p{p}'] <= higher * (1 + accuracy)
+
+
+def test_whole_run_query_matches_raw_samples(points):
+    index = build_rollup(points)
+    _, durations = points.series('http_req_duration')
+    result = index.query()
+    assert result['requests'] == len(durations)
+    assert result['avg'] == pytest.approx(durations.mean())
+    _assert_percentiles_match(result['sketch'], durations, index.meta['relative_accuracy'])
+
+
+def test_unaligned_range_query_matches_raw_samples(points):
+    index = build_rollup(points)
+    times, durations = points.series('http_req_duration')
+    # Whole seconds that start and end off the 10s/60s grid, so every resolution is used
+    start_ns = (times[0] // SECOND_NS + 137) * SECOND_NS
+    end_ns = start_ns + 1213 * SECOND_NS
+    inside = (times >= start_ns) & (times < end_ns)
+    result = index.query(start_ns, end_ns)
+    cover = index.cover(start_ns // SECOND_NS, end_ns // SECOND_NS)
+    assert {resolution for resolution, _, _ in cover} == {1, 10, 60}
+    assert result['requests'] == inside.sum()
+    _assert_percentiles_match(result['sketch'], durations[inside], index.meta['relative_accuracy'])
@@ -0,0 +1,92 @@
+"""
+monitor-scaling sampler: recorded kubectl responses replayed through kubectl-replay.py end up in the CSV schemas
+"""
+
+import json
+import os
+
+from nova_perf.sampler import HPA_HEADER, RESOURCE_HEADER, run_sampler
+
+REPLAY_STUB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'kubectl-replay.py')
+
+HPA_DOCUMENT = {
+    'apiVersion': 'v1',
+    'kind': 'List',
+    'items': [{
+        'metadata': {'name': 'auth-svc-hpa', 'namespace': 'nova'},
+        'spec': {
+            'minReplicas': 2,
+            'maxReplicas': 10,
+            'metrics': [
+                {'type': 'Resource', 'resource': {'name': 'cpu', 'target': {'type': 'Utilization', 'averageUtilization': 70}}},
+                {'type': 'Resource', 'resource': {'name': 'memory', 'target': {'type': 'Utilization', 'averageUtilization': 80}}},
+            ],
+        },
+        'status': {
+            'currentReplicas': 3,
+            'desiredReplicas': 4,
+            'currentMetrics': [
+                {'type': 'Resource', 'resource': {'name': 'cpu', 'current': {'averageUtilization': 85, 'averageValue': '170m'}}},
+                {'type': 'Resource', 'resource': {'name': 'memory', 'current': {'averageUtilization': 41, 'averageValue': '105Mi'}}},
+            ],
+        },
+    }, {
+        'metadata': {'name': 'frontend-hpa', 'namespace': 'nova'},
+        'spec': {'minReplicas': 1, 'maxReplicas': 5},
+        'status': {'currentReplicas': 1, 'desiredReplicas': 1},
+    }],
+}
+
+POD_METRICS_DOCUMENT = {
+    'kind': 'PodMetricsList',
+    'apiVersion': 'metrics.k8s.io/v1beta1',
+    'items': [{
+        'metadata': {'name': 'auth-svc-6d5f8b7c9d-x2k4q', 'namespace': 'nova'},
+        'timestamp': '2026-10-17T10:00:00Z',
+        'window': '15s',
+        'containers': [
+            {'name': 'auth-svc', 'usage': {'cpu': '123456789n', 'memory': '131072Ki'}},
+            {'name': 'istio-proxy', 'usage': {'cpu': '5m', 'memory': '40Mi'}},
+        ],
+    }, {
+        'metadata': {'name': 'user-product-7f9c-abcde', 'namespace': 'nova'},
+        'containers': [{'name': 'user-product', 'usage': {'cpu': '1', 'memory': '1Gi'}}],
+    }],
+}
+
+
+def _record(directory, key, document):
+    os.makedirs(directory / key)
+    (directory / key / '000001.json').write_text(json.dumps(document))
+
+
+def test_replayed_documents_become_csv_rows(tmp_path, monkeypatch):
+    recording = tmp_path / 'recording'
+    _record(recording, 'hpa', HPA_DOCUMENT)
+    _record(recording, 'pod-metrics', POD_METRICS_DOCUMENT)
+    monkeypatch.setenv('KUBECTL_REPLAY_DIR', str(recording))
+
+    hpa_path, resource_path = tmp_path / 'hpa.csv', tmp_path / 'resources.csv'
+    stats = run_sampler(str(hpa_path), str(resource_path), kubectl=REPLAY_STUB, interval=1,
+                        status_interval=0, duration=1)
+    assert stats['ticks'] == 1
+    assert stats['kubectl_failures'] == {}
+
+    hpa_lines = hpa_path.read_text().splitlines()
+    assert hpa_lines[0] == HPA_HEADER
+    rows = [line.split(',', 1)[1] for line in hpa_lines[1:]]
+    assert rows == [
+        'auth-svc-hpa,3,4,2,10,85,41,'
+        '[map[resource:map[current:map[averageUtilization:85_averageValue:170m]_name:cpu]_type:Resource]_'
+        'map[resource:map[current:map[averageUtilization:41_averageValue:105Mi]_name:memory]_type:Resource]]',
+        'frontend-hpa,1,1,1,5,0,0,<none>',
+    ]
+
+    resource_lines = resource_path.read_text().splitlines()
+    assert resource_lines[0] == RESOURCE_HEADER
+    rows = [line.split(',', 1)[1] for line in resource_lines[1:]]
+    # 123456789n + 5m = 128.46 millicores; 131072Ki + 40Mi = 168 MiB; 1 core; 1Gi
+    assert rows == [
+        'auth-svc-6d5f8b7c9d-x2k4q,128,168,auth-svc',
+        'user-product-7f9c-abcde,1000,1024,user-product-svc',
+    ]
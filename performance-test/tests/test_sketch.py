@@ -0,0 +1,34 @@
+"""
+Relative-error bound and merging of the latency sketch (nova_perf.sketch)
+"""
+
+import numpy as np
+
+from nova_perf.sketch import DEFAULT_ACCURACY, LatencySketch
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+def _latencies(seed, n=50_000):
+    return np.random.default_rng(seed).lognormal(np.log(120), 0.8, n)
+
+
+def _exact(values):
+    return np.quantile(values, QUANTILES, method='lower'), np.quantile(values, QUANTILES, method='higher')
+
+
+def test_quantiles_within_relative_accuracy():
+    values = _latencies(0)
+    estimates = LatencySketch().add(values).quantiles(QUANTILES)
+    lower, higher = _exact(values)
+    assert np.all(estimates >= lower * (1 - DEFAULT_ACCURACY))
+    assert np.all(estimates <= higher * (1 + DEFAULT_ACCURACY))
+
+
+def test_merged_sketch_equals_sketch_of_all_samples():
+    first, second = _latencies(1), _latencies(2) * 3
+    merged = LatencySketch().add(first).merge(LatencySketch().add(second))
+    combined = LatencySketch().add(np.concatenate([first, second]))
+    assert merged.count == combined.count == len(first) + len(second)
+    assert np.array_equal(merged.quantiles(QUANTILES), combined.quantiles(QUANTILES))
+    assert (merged.min, merged.max) == (combined.min, combined.max)
@@ -0,0 +1,53 @@
+"""
+Late samples in the sliding-window SLO tracker (nova_perf.slo)
+"""
+
+import numpy as np
+
+from nova_perf.slo import SECOND_NS, SloTracker, error_slo, latency_slo
+
+SLOS = [latency_slo(500, 0.9), error_slo(0.1)]
+
+
+def _tracker():
+    return SloTracker(SLOS, slo_window_s=10, burn_alerts=(('fast', 30, 10, 2.0),), min_requests=1)
+
+
+def _samples(seconds, duration_ms, failed):
+    times = np.repeat(np.asarray(seconds, dtype=np.int64) * SECOND_NS, 10) + np.tile(np.arange(10), len(seconds))
+    return times, np.full(len(times), float(duration_ms)), times, np.full(len(times), float(failed))
+
+
+def _same_row(row, expected):
+    assert row.keys() == expected.keys()
+    for key, value in expected.items():
+        assert np.isclose(row[key], value, equal_nan=True), key
+
+
+def test_late_samples_are_folded_into_open_windows():
+    on_time = _samples(range(20), 100, 0)
+    late = _samples([14, 15], 900, 1)
+
+    batch = _tracker()
+    batch.add(*[np.concatenate([a, b]) for a, b in zip(on_time, late)])
+    batch.flush()
+
+    streamed = _tracker()
+    streamed.add(*on_time)
+    assert streamed.closed == 17
+    streamed.add(*late)
+    streamed.flush()
+
+    _same_row(streamed.latest_row(), batch.latest_row())
+    # The 10s window ending at second 19 holds 100 on-time requests plus the 20 slow, failed ones
+    assert streamed.latest_row()['requests'] == 120
+    assert np.isclose(streamed.latest_row()[SLOS[0]['name']], 100 / 120)
+
+
+def test_samples_older_than_every_window_are_dropped():
+    tracker = _tracker()
+    tracker.add(*_samples(range(40), 100, 0))
+    before = {w: sums.copy() for w, sums in tracker.sums.items()}
+    tracker.add(*_samples([2], 900, 1))
+    for w, sums in tracker.sums.items():
+        assert np.array_equal(sums, before[w])